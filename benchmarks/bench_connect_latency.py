@@ -0,0 +1,87 @@
+#
+# bench_connect_latency.py
+#
+# Measures connect-to-first-token latency of the /ws endpoint in main.py.
+# Each simulated client opens a WebSocket, waits for the stream status frame
+# (sent once the server admits the session), sends one prompt and records the
+# time until the first text/plain frame arrives.
+#
+# Requirements:
+# - websockets: pip install websockets
+#
+# Usage (with the app already running, e.g. `python main.py`):
+#   python benchmarks/bench_connect_latency.py --url ws://localhost:8080 --levels 1 50 500
+#
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import websockets
+
+
+async def _one_client(base_url: str, prompt: str, timeout: float) -> float | None:
+    """
+    Opens one socket, waits until the session is admitted, sends `prompt` and
+    waits for the first text chunk.
+
+    Returns:
+        float | None: Seconds from connect start to first token, or None on failure.
+    """
+    user_id = random.randint(1, 10**12)
+    start = time.perf_counter()
+    try:
+        async with websockets.connect(f"{base_url}/ws/{user_id}?is_audio=false", max_size=None) as ws:
+            # The stream status frame follows any queue position frames
+            while "stream" not in json.loads(await asyncio.wait_for(ws.recv(), timeout=timeout)):
+                pass
+            await ws.send(json.dumps({"mime_type": "text/plain", "data": prompt}))
+            while True:
+                raw = await asyncio.wait_for(ws.recv(), timeout=timeout)
+                message = json.loads(raw)
+                if message.get("mime_type") == "text/plain":
+                    return time.perf_counter() - start
+    except Exception:
+        return None
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_level(base_url: str, concurrency: int, prompt: str, timeout: float) -> dict:
+    """Runs `concurrency` clients at once and summarizes their latencies."""
+    results = await asyncio.gather(
+        *(_one_client(base_url, prompt, timeout) for _ in range(concurrency))
+    )
+    latencies = [r for r in results if r is not None]
+    summary = {"concurrency": concurrency, "ok": len(latencies), "failed": concurrency - len(latencies)}
+    if latencies:
+        summary.update({
+            "p50_ms": round(statistics.median(latencies) * 1000, 1),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+            "max_ms": round(max(latencies) * 1000, 1),
+        })
+    return summary
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Connect-to-first-token latency benchmark")
+    parser.add_argument("--url", default="ws://localhost:8080", help="Base WebSocket URL of the app")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 50, 500], help="Concurrent sockets per run")
+    parser.add_argument("--prompt", default="Show market movers")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for the first token")
+    args = parser.parse_args()
+
+    for level in args.levels:
+        print(json.dumps(await run_level(args.url, level, args.prompt, args.timeout)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
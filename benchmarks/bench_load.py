@@ -0,0 +1,363 @@
+#
+# bench_load.py
+#
+# Load test of main.py without Gemini quota or market data sites.
+#
+# For each level of N concurrent clients a fresh server is started with:
+# - the model of root_agent and of every sub-agent replaced by ScriptedLlm
+#   (fake_llm.py), which streams tokens and makes tool calls at the rates set
+#   on the command line;
+# - the tools' TradingView, Yahoo and Polygon requests sent to a local stub
+#   server (stub_market_data.py) that replays recorded responses from
+#   --fixtures, or synthetic ones in the same shape;
+# and then N WebSocket clients connect at once, each sending --turns prompts
+# (cycled from --prompts; "{tickers}" is replaced by three random tickers).
+#
+# Reported per level:
+# - connect latency: connect start to the stream status frame;
+# - time to first token: prompt sent to the first text frame;
+# - tokens per second: per turn, from the first text frame to turn_complete,
+#   and in aggregate over the whole run;
+# - turn time: prompt sent to turn_complete (p50/p99);
+# - RSS: server RSS after one warm-up turn, its peak while the N sessions are
+#   open, and the difference per session.
+#
+# The stubs patch the app from the outside (http_client.fetch_text, yfinance's
+# YfData and the Polygon client); nothing in the app knows about them.
+#
+# Requirements:
+# - websockets: pip install websockets
+# - Linux (RSS is read from /proc)
+#
+# Usage:
+#   python benchmarks/bench_load.py --levels 10 50 --turns 3 --tokens-per-second 60
+#
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import websockets
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+
+DEFAULT_PROMPTS = [
+    "What is the price of {tickers}?",
+    "Show the world indices",
+    "Show commodities",
+    "Show the top market movers",
+    "Give me the morning brief",
+    "Hello",
+]
+TICKER_POOL = [
+    "AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "JPM", "V", "XOM",
+    "UNH", "LLY", "AVGO", "COST", "WMT", "NFLX", "AMD", "ORCL", "CRM", "KO",
+]
+
+# Hosts the tools call, sent to the stub server instead.
+STUBBED_HOSTS = {
+    "www.tradingview.com",
+    "query1.finance.yahoo.com",
+    "query2.finance.yahoo.com",
+    "api.polygon.io",
+}
+
+# Fake model options, passed through to the server process.
+MODEL_OPTIONS = [
+    ("--tokens-per-second", float, 50.0, "Generation rate of every answer"),
+    ("--answer-tokens", int, 200, "Tokens streamed by root_agent per turn"),
+    ("--tokens-per-chunk", int, 4, "Tokens per streamed partial response"),
+    ("--sub-agent-tokens", int, 40, "Tokens in each sub-agent answer"),
+    ("--first-token-ms", float, 300.0, "Model latency before the first token or tool call"),
+    ("--tool-call-rate", float, 1.0, "Share of prompts (0-1) that call a tool"),
+]
+
+
+def _to_stub(url: str, stub_url: str) -> str:
+    parts = urlsplit(url)
+    if parts.netloc not in STUBBED_HOSTS:
+        return url
+    stub = urlsplit(stub_url)
+    return parts._replace(scheme=stub.scheme, netloc=stub.netloc).geturl()
+
+
+def route_to_stub(stub_url: str):
+    """Sends the tools' market data requests to the stub server."""
+    from finagent import http_client, polygon_Treasury_yields
+    from yfinance.data import YfData
+
+    fetch_text = http_client.fetch_text
+
+    async def fetch_text_from_stub(url, *args, **kwargs):
+        return await fetch_text(_to_stub(url, stub_url), *args, **kwargs)
+
+    http_client.fetch_text = fetch_text_from_stub
+
+    make_request = YfData._make_request
+
+    def make_request_to_stub(self, url, *args, **kwargs):
+        return make_request(self, _to_stub(url, stub_url), *args, **kwargs)
+
+    YfData._make_request = make_request_to_stub
+    # The stub needs no cookie or crumb.
+    YfData._get_cookie_and_crumb = lambda self, timeout=30: (None, "basic")
+
+    def polygon_client():
+        from polygon import RESTClient
+        if polygon_Treasury_yields._client is None:
+            polygon_Treasury_yields._client = RESTClient(polygon_Treasury_yields.POLYGON_API_KEY, base=stub_url)
+        return polygon_Treasury_yields._client
+
+    polygon_Treasury_yields._get_client = polygon_client
+
+
+def serve(args):
+    """Runs main.py's app with the fake model and the stubbed data sources (server process)."""
+    sys.path.insert(0, str(ROOT))
+    import uvicorn
+    import main as app_main
+    from finagent.agent import root_agent
+    from fake_llm import ScriptedLlm, install
+
+    llm = ScriptedLlm(**{
+        flag[2:].replace("-", "_"): getattr(args, flag[2:].replace("-", "_"))
+        for flag, *_ in MODEL_OPTIONS
+    })
+    install(root_agent, llm)
+    route_to_stub(args.stub)
+    uvicorn.run(app_main.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _wait_for_port(port: int, process, timeout: float):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"process exited with status {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise TimeoutError(f"nothing listening on port {port} after {timeout}s")
+
+
+async def run_client(base_url: str, prompts: list[str], turns: int, offset: int,
+                     pause: float, timeout: float, hold: asyncio.Barrier | None = None) -> dict:
+    """
+    One client: connects, sends `turns` prompts one after another and, with
+    `hold`, stays connected until every client is through, so all sessions
+    are open at once.
+    """
+    rng = random.Random(offset)
+    result = {"connect_s": None, "turns": [], "failed_turns": 0, "error": None}
+    start = time.perf_counter()
+    held = False
+    try:
+        url = f"{base_url}/ws/{random.randint(1, 10**12)}?is_audio=false"
+        async with websockets.connect(url, max_size=None, open_timeout=timeout) as ws:
+            async def frames():
+                while True:
+                    yield json.loads(await asyncio.wait_for(ws.recv(), timeout=timeout))
+
+            async for message in frames():
+                if "stream" in message:
+                    result["connect_s"] = time.perf_counter() - start
+                    break
+
+            for turn in range(turns):
+                prompt = prompts[(offset + turn) % len(prompts)]
+                prompt = prompt.replace("{tickers}", " ".join(rng.sample(TICKER_POOL, 3)))
+                sent = time.perf_counter()
+                await ws.send(json.dumps({"mime_type": "text/plain", "data": prompt}))
+                first = None
+                tokens = 0
+                async for message in frames():
+                    if message.get("mime_type") == "text/plain":
+                        first = first or time.perf_counter()
+                        # Every scripted token ends with a space.
+                        tokens += message["data"].count(" ")
+                    elif message.get("turn_complete") or message.get("interrupted"):
+                        break
+                    elif message.get("busy") or message.get("rate_limited"):
+                        first = None
+                        break
+                end = time.perf_counter()
+                if first is None or tokens == 0:
+                    result["failed_turns"] += 1
+                else:
+                    result["turns"].append({
+                        "ttft_s": first - sent,
+                        "turn_s": end - sent,
+                        "tokens": tokens,
+                        "stream_s": end - first,
+                    })
+                await asyncio.sleep(pause)
+
+            if hold is not None:
+                held = True
+                await hold.wait()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    if hold is not None and not held:
+        await hold.wait()
+    return result
+
+
+def summarize(clients: int, results: list[dict], elapsed: float, rss: dict) -> dict:
+    turns = [t for r in results for t in r["turns"]]
+    connect = [r["connect_s"] for r in results if r["connect_s"] is not None]
+    errors = [r["error"] for r in results if r["error"]]
+
+    def ms(values, pct):
+        return round(_percentile(values, pct) * 1000, 1) if values else None
+
+    stream_rates = [t["tokens"] / t["stream_s"] for t in turns if t["stream_s"] > 0]
+    summary = {
+        "clients": clients,
+        "turns_ok": len(turns),
+        "turns_failed": sum(r["failed_turns"] for r in results),
+        "client_errors": len(errors),
+        "connect_p50_ms": ms(connect, 50),
+        "connect_p99_ms": ms(connect, 99),
+        "ttft_p50_ms": ms([t["ttft_s"] for t in turns], 50),
+        "ttft_p99_ms": ms([t["ttft_s"] for t in turns], 99),
+        "tokens_per_s_per_turn_p50": round(statistics.median(stream_rates), 1) if stream_rates else None,
+        "tokens_per_s_total": round(sum(t["tokens"] for t in turns) / elapsed, 1),
+        "turn_p50_ms": ms([t["turn_s"] for t in turns], 50),
+        "turn_p99_ms": ms([t["turn_s"] for t in turns], 99),
+        "rss_baseline_mb": round(rss["baseline"] / 2**20, 1),
+        "rss_peak_mb": round(rss["peak"] / 2**20, 1),
+        "rss_per_session_kb": round((rss["peak"] - rss["baseline"]) / clients / 1024, 1),
+    }
+    if errors:
+        summary["first_error"] = errors[0]
+    return summary
+
+
+async def run_level(clients: int, args, stub_url: str, env: dict) -> dict:
+    """Starts a server, warms it up with one session, then runs `clients` sessions at once."""
+    port = _free_port()
+    base_url = f"ws://127.0.0.1:{port}"
+    command = [sys.executable, __file__, "--serve", "--port", str(port), "--stub", stub_url]
+    for flag, *_ in MODEL_OPTIONS:
+        command += [flag, str(getattr(args, flag[2:].replace("-", "_")))]
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stderr=None if args.verbose else subprocess.DEVNULL)
+    try:
+        await _wait_for_port(port, server, args.timeout)
+        # Loads the tool dependencies and fills the tool cache for the first prompt.
+        await run_client(base_url, args.prompts, 1, 0, 0, args.timeout)
+        rss = {"baseline": _rss_bytes(server.pid)}
+        rss["peak"] = rss["baseline"]
+
+        hold = asyncio.Barrier(clients)
+
+        async def sample_rss():
+            while True:
+                rss["peak"] = max(rss["peak"], _rss_bytes(server.pid))
+                await asyncio.sleep(0.1)
+
+        start = time.perf_counter()
+        sampler = asyncio.create_task(sample_rss())
+        results = await asyncio.gather(*(
+            run_client(base_url, args.prompts, args.turns, i, args.pause, args.timeout, hold)
+            for i in range(clients)
+        ))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+        return summarize(clients, results, elapsed, rss)
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("GOOGLE_API_KEY", "benchmark")
+        env.setdefault("LOG_LEVEL", "WARNING")
+        # Keep the benchmark's sessions, snapshots and the stub's synthetic
+        # quotes out of the real stores.
+        env["SESSION_DB"] = str(Path(tmp) / "sessions.db")
+        env["FINAGENT_SNAPSHOT_DIR"] = str(Path(tmp) / "snapshots")
+        env["FINAGENT_HISTORY_DB"] = str(Path(tmp) / "history.db")
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+        for setting in args.env:
+            key, _, value = setting.partition("=")
+            env[key] = value
+
+        stub_port = _free_port()
+        stub_command = [sys.executable, str(BENCH_DIR / "stub_market_data.py"),
+                        "--port", str(stub_port), "--latency-ms", str(args.stub_latency_ms)]
+        if args.fixtures:
+            stub_command += ["--fixtures", str(args.fixtures)]
+        stub = subprocess.Popen(stub_command, stderr=subprocess.DEVNULL)
+        try:
+            await _wait_for_port(stub_port, stub, args.timeout)
+            for clients in args.levels:
+                print(json.dumps(await run_level(clients, args, f"http://127.0.0.1:{stub_port}", env)), flush=True)
+        finally:
+            stub.terminate()
+            stub.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test with a scripted model and stub market data")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 50], help="Concurrent clients per run")
+    parser.add_argument("--turns", type=int, default=3, help="Prompts per client")
+    parser.add_argument("--pause", type=float, default=0.5, help="Seconds between a client's turns")
+    parser.add_argument("--prompts", nargs="+", default=DEFAULT_PROMPTS)
+    parser.add_argument("--fixtures", type=Path, help="Directory of recorded responses (see stub_market_data.py)")
+    parser.add_argument("--stub-latency-ms", type=float, default=50, help="Delay of every stub response")
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="Extra server settings, e.g. MAX_CONCURRENT_TURNS=64")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--verbose", action="store_true", help="Show the server's log")
+    for flag, type_, default, help_ in MODEL_OPTIONS:
+        parser.add_argument(flag, type=type_, default=default, help=help_)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--stub", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#
+# bench_outbound_stream.py
+#
+# Load test for streaming/outbound.py. Simulates N concurrent clients, each
+# receiving a token stream from the agent, and compares per-chunk sending
+# (one frame per partial event, the previous behavior) with coalesced sending.
+#
+# Each fake socket charges a fixed cost per frame (JSON framing, syscall,
+# network), so per-chunk sending saturates long before coalescing does.
+# Reports frames per second and p50/p99 token-to-screen latency, i.e. the time
+# from the agent emitting a chunk to the frame containing it being written.
+#
+# Usage:
+#   python benchmarks/bench_outbound_stream.py --clients 200 --tokens-per-sec 100 --seconds 3
+#
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from streaming.outbound import OutboundStream
+
+
+class FakeWebSocket:
+    """Records when each chunk reaches the 'screen'."""
+
+    def __init__(self, per_frame_cost: float, produced_at: dict, latencies: list):
+        self.per_frame_cost = per_frame_cost
+        self.produced_at = produced_at
+        self.latencies = latencies
+        self.frames = 0
+
+    async def send_text(self, payload: str):
+        await asyncio.sleep(self.per_frame_cost)
+        now = time.perf_counter()
+        message = json.loads(payload)
+        for chunk_id in message.get("data", "").split():
+            self.latencies.append(now - self.produced_at.pop(chunk_id))
+        self.frames += 1
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        pass
+
+
+async def _client(index: int, args, mode: str, latencies: list) -> int:
+    produced_at = {}
+    websocket = FakeWebSocket(args.frame_cost_ms / 1000, produced_at, latencies)
+    if mode == "per-chunk":
+        outbound = OutboundStream(websocket, flush_interval=0, max_frame_bytes=1)
+    else:
+        outbound = OutboundStream(websocket, flush_interval=args.flush_ms / 1000, max_frame_bytes=args.frame_bytes)
+    outbound.start()
+
+    interval = 1 / args.tokens_per_sec
+    total = int(args.tokens_per_sec * args.seconds)
+    for n in range(total):
+        chunk_id = f"c{index}_{n}"
+        produced_at[chunk_id] = time.perf_counter()
+        outbound.send_text(chunk_id + " ")
+        await asyncio.sleep(interval)
+    outbound.send_message({"turn_complete": True, "interrupted": None})
+    await outbound.aclose(drain_timeout=60)
+    return websocket.frames
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+async def run(mode: str, args) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    frames = await asyncio.gather(*(_client(i, args, mode, latencies) for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "clients": args.clients,
+        "frames": sum(frames),
+        "frames_per_sec": round(sum(frames) / elapsed),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Outbound stream load test")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--tokens-per-sec", type=float, default=100, help="Partial events per second per client")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--frame-cost-ms", type=float, default=15.0, help="Simulated cost of writing one frame")
+    parser.add_argument("--flush-ms", type=float, default=30)
+    parser.add_argument("--frame-bytes", type=int, default=4096)
+    args = parser.parse_args()
+
+    for mode in ("per-chunk", "coalesced"):
+        print(json.dumps(asyncio.run(run(mode, args))))
+
+
+if __name__ == "__main__":
+    main()
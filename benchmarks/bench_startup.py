@@ -0,0 +1,147 @@
+#
+# bench_startup.py
+#
+# Cold start benchmark for the streaming server, with a regression threshold.
+#
+# Measures, each in fresh processes:
+# - import time of main.py, and which heavy tool dependencies (pandas,
+#   yfinance, bs4, ...) were loaded by the import; they should load lazily on
+#   the first tool call instead;
+# - time from spawning `python main.py` to the first accepted WebSocket,
+#   which includes building the agent and the runner pool in the lifespan.
+#
+# Exits with status 1 when a median is above its threshold or a heavy module
+# is imported eagerly, so it can run in CI.
+#
+# Requirements:
+# - websockets: pip install websockets
+#
+# Usage:
+#   python benchmarks/bench_startup.py [--runs 5] [--max-import-ms 2000] [--max-ready-ms 4000]
+#
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import websockets
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules only the tools need; main.py must not import them.
+HEAVY_MODULES = ["pandas", "numpy", "yfinance", "bs4", "requests", "polygon"]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "eager": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _env(tmp: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "benchmark")
+    # Keep the benchmark's sessions out of the real store.
+    env["SESSION_DB"] = str(Path(tmp) / "sessions.db")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def measure_import(env: dict) -> dict:
+    """Imports main.py in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_for_websocket(url: str, process, timeout: float) -> float:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            async with websockets.connect(url, open_timeout=1):
+                return time.perf_counter()
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.InvalidHandshake):
+            await asyncio.sleep(0.02)
+    raise TimeoutError(f"no WebSocket accepted within {timeout}s")
+
+
+def measure_ready(env: dict, timeout: float) -> float:
+    """Seconds from spawning the server to its first accepted WebSocket."""
+    port = _free_port()
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY="1")
+    url = f"ws://127.0.0.1:{port}/ws/1?is_audio=false"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        return asyncio.run(_wait_for_websocket(url, process, timeout)) - start
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=2000, help="Threshold for the median import time")
+    parser.add_argument("--max-ready-ms", type=float, default=4000, help="Threshold for the median time to first WebSocket")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(tmp)
+        imports = [measure_import(env) for _ in range(args.runs)]
+        ready = [measure_ready(env, args.timeout) for _ in range(args.runs)]
+
+    import_ms = statistics.median(r["seconds"] for r in imports) * 1000
+    ready_ms = statistics.median(ready) * 1000
+    eager = sorted({module for r in imports for module in r["eager"]})
+    result = {
+        "runs": args.runs,
+        "import_ms": round(import_ms, 1),
+        "ready_ms": round(ready_ms, 1),
+        "eager_modules": eager,
+        "max_import_ms": args.max_import_ms,
+        "max_ready_ms": args.max_ready_ms,
+    }
+    print(json.dumps(result))
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append(f"import time {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+    if ready_ms > args.max_ready_ms:
+        failures.append(f"time to first WebSocket {ready_ms:.0f} ms > {args.max_ready_ms:.0f} ms")
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
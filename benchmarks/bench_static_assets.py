@@ -0,0 +1,205 @@
+#
+# bench_static_assets.py
+#
+# Requests per second for the page and its script, served the previous way
+# (app.js read from disk on every request, index.html through FileResponse, no
+# validators on /app.js) and from the preloaded AssetStore in
+# streaming/assets.py.
+#
+# Each variant runs as its own uvicorn process. Two scenarios are loaded with
+# concurrent keep-alive clients:
+# - first visit: GET / and the script with Accept-Encoding "gzip, br";
+# - repeat visit: the same requests with If-None-Match from the first visit
+#   (a browser revalidating; the hashed script is not requested at all then,
+#   as it is immutable, but /app.js is for comparison).
+#
+# Bodies are read raw (not decompressed), so the client costs the same for
+# both variants.
+#
+# Usage:
+#   python benchmarks/bench_static_assets.py [--seconds 5] [--concurrency 32]
+#
+
+import argparse
+import asyncio
+import json
+import re
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+STATIC_DIR = ROOT / "static"
+
+
+def legacy_app():
+    """The handlers main.py used before the asset store."""
+    from fastapi import FastAPI
+    from fastapi.responses import FileResponse, Response
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def root():
+        index_path = STATIC_DIR / "index.html"
+        if not index_path.exists():
+            return {"error": f"index.html not found at {index_path}"}
+        return FileResponse(str(index_path))
+
+    @app.get("/app.js")
+    async def serve_app_js():
+        js_path = STATIC_DIR / "js" / "app.js"
+        if js_path.exists():
+            with open(js_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            return Response(content=content, media_type="application/javascript; charset=utf-8")
+        return Response(status_code=404)
+
+    return app
+
+
+def assets_app():
+    """The same routes served from streaming/assets.py, as in main.py."""
+    from fastapi import FastAPI, Request
+    from streaming.assets import AssetStore
+
+    assets = AssetStore(STATIC_DIR, aliases={"/app.js": "js/app.js"})
+    assets.load()
+    app = FastAPI()
+
+    @app.get("/")
+    async def root(request: Request):
+        return assets.response(request, "index.html")
+
+    @app.get("/app.js")
+    async def serve_app_js(request: Request):
+        return assets.response(request, "js/app.js")
+
+    @app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+    async def serve_static(request: Request, path: str):
+        return assets.response(request, path)
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_up(base_url: str, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                await client.get(base_url + "/")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+    raise TimeoutError("server did not start")
+
+
+async def _get_raw(client, url, headers) -> int:
+    async with client.stream("GET", url, headers=headers) as response:
+        size = 0
+        async for chunk in response.aiter_raw():
+            size += len(chunk)
+        return size
+
+
+async def load(base_url: str, requests: list, seconds: float, concurrency: int) -> dict:
+    """Cycles through `requests` (url, headers) from `concurrency` clients for `seconds`."""
+    done = 0
+    transferred = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        async def worker(offset):
+            nonlocal done, transferred
+            i = offset
+            while time.perf_counter() < deadline:
+                url, headers = requests[i % len(requests)]
+                # Await first: `transferred += await ...` would lose updates
+                size = await _get_raw(client, url, headers)
+                transferred += size
+                done += 1
+                i += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"rps": round(done / elapsed), "bytes_per_request": round(transferred / max(done, 1))}
+
+
+async def _scenarios(base_url: str) -> dict:
+    """First-visit and repeat-visit request lists, discovered from the page itself."""
+    encodings = {"accept-encoding": "gzip, br"}
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        page = await client.get("/", headers=encodings)
+        script = re.search(r'src="(/static/js/app\.\w+\.js|/app\.js)"', page.text).group(1)
+        first = [("/", encodings), (script, encodings)]
+        repeat = []
+        for url in ("/", "/app.js"):
+            response = await client.get(url, headers=encodings)
+            headers = dict(encodings)
+            if "etag" in response.headers:
+                headers["if-none-match"] = response.headers["etag"]
+            repeat.append((url, headers))
+    return {"first_visit": first, "repeat_visit": repeat}
+
+
+def run_variant(variant: str, seconds: float, concurrency: int) -> dict:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", variant, "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        async def run():
+            await _wait_until_up(base_url)
+            results = {}
+            for name, requests in (await _scenarios(base_url)).items():
+                results[name] = await load(base_url, requests, seconds, concurrency)
+            return results
+        return asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static asset serving benchmark")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration of each scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--serve", choices=["legacy", "assets"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        import uvicorn
+        app = legacy_app() if args.serve == "legacy" else assets_app()
+        uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+        return
+
+    results = {variant: run_variant(variant, args.seconds, args.concurrency) for variant in ("legacy", "assets")}
+    for scenario in results["legacy"]:
+        before, after = results["legacy"][scenario], results["assets"][scenario]
+        print(json.dumps({
+            "scenario": scenario,
+            "legacy": before,
+            "assets": after,
+            "rps_change_pct": round(100 * (after["rps"] / before["rps"] - 1), 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
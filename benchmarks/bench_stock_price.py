@@ -0,0 +1,135 @@
+#
+# bench_stock_price.py
+#
+# Compares get_stock_price (one bulk quote request for all tickers, derived
+# fields computed over the batch with pandas) against the per-ticker approach
+# (one yf.Ticker(t).info lookup per ticker) for 1, 10 and 100 tickers. The
+# cache is bypassed.
+#
+# By default Yahoo is simulated: every HTTP request sleeps --latency ms and
+# returns synthetic quotes (Ticker().info costs two requests, like yfinance's
+# quoteSummary + quote). Pass --live to hit Yahoo Finance for real.
+#
+# Usage:
+#   python benchmarks/bench_stock_price.py [--live] [--latency 150] [--sizes 1 10 100]
+#
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yfinance as yf
+import yfinance.data
+
+from finagent import yahoo_stock_price
+
+# 100 large US stocks, used with --live.
+TICKERS = """
+AAPL MSFT NVDA AMZN GOOGL META BRK-B AVGO TSLA LLY JPM V UNH XOM MA JNJ PG HD COST ABBV
+MRK ORCL CVX BAC KO PEP ADBE CRM NFLX AMD TMO WMT MCD ACN CSCO LIN ABT DHR INTU WFC
+TXN DIS PM VZ AMGN CAT IBM QCOM NEE GE UNP HON SPGI LOW COP BA RTX AMAT GS PFE
+NKE ELV SBUX PLD T ISRG MDT BKNG BLK DE MS LMT SYK GILD AXP ADP TJX MDLZ ADI VRTX
+MMC C CVS REGN SCHW CB MO LRCX ZTS CI SO BDX PGR EOG DUK SLB BSX ITW NOC
+""".split()
+
+
+def _synthetic_quote(symbol: str) -> dict:
+    rng = random.Random(symbol)
+    price = rng.uniform(20, 900)
+    return {
+        "symbol": symbol,
+        "shortName": f"{symbol} Inc.",
+        "currency": "USD",
+        "regularMarketPrice": price,
+        "regularMarketPreviousClose": price * rng.uniform(0.97, 1.03),
+        "trailingPE": rng.uniform(8, 60),
+        "epsTrailingTwelveMonths": price / rng.uniform(8, 60),
+        "marketCap": int(price * rng.uniform(1e8, 1e10)),
+        "fiftyTwoWeekLow": price * rng.uniform(0.6, 0.95),
+        "fiftyTwoWeekHigh": price * rng.uniform(1.02, 1.5),
+    }
+
+
+class _FakeTicker:
+    def __init__(self, symbol, latency, counter):
+        self._symbol, self._latency, self._counter = symbol, latency, counter
+
+    @property
+    def info(self):
+        time.sleep(2 * self._latency)
+        self._counter[0] += 2
+        return _synthetic_quote(self._symbol)
+
+
+def simulate(latency: float, counter: list):
+    """Replaces Yahoo with `latency` seconds per request and synthetic quotes."""
+    def get_raw_json(self, url, params=None, timeout=30):
+        time.sleep(latency)
+        counter[0] += 1
+        return {"quoteResponse": {"result": [_synthetic_quote(s) for s in params["symbols"].split(",")]}}
+
+    yfinance.data.YfData.get_raw_json = get_raw_json
+    yf.Ticker = lambda symbol: _FakeTicker(symbol, latency, counter)
+
+
+def per_ticker(tickers: list[str]) -> str:
+    """The per-ticker baseline: one Ticker().info lookup per symbol."""
+    rows = []
+    for ticker in tickers:
+        info = yf.Ticker(ticker).info
+        rows.append({
+            "symbol": ticker,
+            "price": info.get("regularMarketPrice"),
+            "pe_ratio": info.get("trailingPE"),
+            "market_cap": info.get("marketCap"),
+            "week52_low": info.get("fiftyTwoWeekLow"),
+            "week52_high": info.get("fiftyTwoWeekHigh"),
+        })
+    return json.dumps(rows)
+
+
+def _timed(func, tickers, counter):
+    counter[0] = 0
+    start = time.perf_counter()
+    func(tickers)
+    return time.perf_counter() - start, counter[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stock price tool benchmark")
+    parser.add_argument("--live", action="store_true", help="Query Yahoo Finance instead of simulating it")
+    parser.add_argument("--latency", type=float, default=150, help="Simulated request latency in ms")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    counter = [0]
+    if args.live:
+        symbols = TICKERS
+    else:
+        simulate(args.latency / 1000, counter)
+        symbols = [f"T{i:03d}" for i in range(max(args.sizes))]
+
+    # Bypass the cache.
+    batched = yahoo_stock_price.get_stock_price.__wrapped__
+    for size in args.sizes:
+        tickers = symbols[:size]
+        batched_s, batched_requests = _timed(batched, tickers, counter)
+        baseline_s, baseline_requests = _timed(per_ticker, tickers, counter)
+        row = {
+            "tickers": size,
+            "batched_ms": round(batched_s * 1000, 1),
+            "per_ticker_ms": round(baseline_s * 1000, 1),
+            "speedup": round(baseline_s / batched_s, 1) if batched_s else None,
+        }
+        if not args.live:
+            row.update({"batched_requests": batched_requests, "per_ticker_requests": baseline_requests})
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#
+# bench_tool_output.py
+#
+# Compares the size of the tool results that go into the model context for one
+# morning brief: the previous pretty-printed JSON (indent=4, list of dicts with
+# internal fields, dict of dicts for commodities) against the columnar format
+# from finagent/tool_output.py.
+#
+# Tokens are counted with tiktoken's cl100k_base encoding when tiktoken is
+# installed (a proxy; Gemini's tokenizer is not available offline), otherwise
+# with a word/punctuation approximation.
+#
+# Usage:
+#   python benchmarks/bench_tool_output.py [--html movers.html]
+#
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_tv_parser import synthetic_page
+from finagent import tv_market_movers_scraper as tv
+from finagent.tool_output import dumps_table
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+    TOKENIZER = "tiktoken cl100k_base"
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+except ImportError:
+    TOKENIZER = "approximate (words + punctuation)"
+    _TOKEN = re.compile(r"\w+|[^\w\s]|\s+")
+
+    def count_tokens(text: str) -> int:
+        return len(_TOKEN.findall(text))
+
+
+COMMODITIES = [
+    ("gold", "GC=F", 2412.3, 14.2, 0.5922),
+    ("silver", "SI=F", 30.184, -0.211, -0.6942),
+    ("copper", "HG=F", 4.5215, 0.0385, 0.8588),
+    ("natural gas", "NG=F", 2.871, -0.064, -2.1806),
+    ("brent crude", "BZ=F", 82.41, 0.66, 0.8073),
+    ("crude oil", "CL=F", 78.15, 0.52, 0.6699),
+]
+
+YIELDS = {
+    "date": "2025-10-10", "yield_1_month": 4.21, "yield_3_month": 4.05, "yield_6_month": 3.92,
+    "yield_1_year": 3.71, "yield_2_year": 3.52, "yield_3_year": 3.49, "yield_5_year": 3.61,
+    "yield_7_year": 3.8, "yield_10_year": 4.03, "yield_20_year": 4.58, "yield_30_year": 4.61,
+}
+
+
+def market_mover_rows(html: str) -> list[dict]:
+    """Parsed rows (display strings plus _parsed_market_cap) before serialization."""
+    captured = []
+    original = tv._serialize
+    tv._serialize = lambda stocks: captured.extend(stocks) or ""
+    try:
+        tv._parse_market_movers(html)
+    finally:
+        tv._serialize = original
+    return captured
+
+
+def legacy_outputs(movers: list[dict]) -> dict:
+    commodities = {
+        name: {"name": name, "symbol": symbol, "price": price, "change": change, "change_percent": pct}
+        for name, symbol, price, change, pct in COMMODITIES
+    }
+    return {
+        "market_movers": json.dumps(movers, indent=4),
+        # ADK serializes dict results itself; json.dumps' default spacing is close.
+        "commodities": json.dumps(commodities),
+        "treasury_yields": json.dumps([YIELDS], indent=4),
+    }
+
+
+def columnar_outputs(movers: list[dict]) -> dict:
+    return {
+        "market_movers": tv._serialize(movers),
+        "commodities": dumps_table(
+            [dict(zip(("name", "symbol", "price", "change", "change_percent"), row)) for row in COMMODITIES],
+            numeric=("price", "change", "change_percent"),
+        ),
+        "treasury_yields": dumps_table([YIELDS]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tool output size benchmark")
+    parser.add_argument("--html", type=Path, help="Recorded market movers page")
+    args = parser.parse_args()
+
+    html = args.html.read_text(encoding="utf-8") if args.html else synthetic_page()
+    movers = market_mover_rows(html)
+    before, after = legacy_outputs(movers), columnar_outputs(movers)
+
+    print(f"tokenizer: {TOKENIZER}")
+    totals = {"bytes_before": 0, "bytes_after": 0, "tokens_before": 0, "tokens_after": 0}
+    for tool in before:
+        row = {
+            "tool": tool,
+            "bytes_before": len(before[tool].encode("utf-8")),
+            "bytes_after": len(after[tool].encode("utf-8")),
+            "tokens_before": count_tokens(before[tool]),
+            "tokens_after": count_tokens(after[tool]),
+        }
+        for key in totals:
+            totals[key] += row[key]
+        print(json.dumps(row))
+
+    print(json.dumps({
+        "per_brief": totals,
+        "bytes_saved_pct": round(100 * (1 - totals["bytes_after"] / totals["bytes_before"]), 1),
+        "tokens_saved_pct": round(100 * (1 - totals["tokens_after"] / totals["tokens_before"]), 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#
+# bench_tv_parser.py
+#
+# Compares parse time and peak memory of the TradingView market movers parsers:
+# the original BeautifulSoup('html.parser') implementation and the streaming
+# lxml engine.
+#
+# Pass a recorded page with --html (e.g. saved with
+# `curl -A Mozilla https://www.tradingview.com/markets/stocks-usa/market-movers-large-cap/ > movers.html`).
+# Without --html a synthetic page with the same table layout is generated.
+#
+# Usage:
+#   python benchmarks/bench_tv_parser.py --html movers.html --repeat 20
+#
+
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+HEADERS = [
+    "Symbol 100", "Market cap", "Price", "Change %", "Volume", "Rel Volume", "P/E",
+    "EPS dil TTM", "EPS dil growth TTM YoY", "Div yield % TTM", "Sector", "Analyst Rating",
+]
+
+
+def synthetic_page(rows: int = 100, padding_kb: int = 600) -> str:
+    """Builds a page shaped like TradingView's large-cap movers table."""
+    rng = random.Random(7)
+    head = "".join(f'<th class="cell"><div>{h}</div></th>' for h in HEADERS)
+    body = []
+    for i in range(rows):
+        cells = [
+            f'<td><a class="ticker">T{i}</a><sup>D</sup> <span class="name">Company {i} Inc.</span></td>',
+            f'<td>{rng.uniform(10, 4000):.2f} <span>B</span><span>USD</span></td>',
+            f'<td>{rng.uniform(5, 900):.2f}<span>USD</span></td>',
+            f'<td><span class="positive">+{rng.uniform(0, 5):.2f}%</span></td>',
+            f'<td>{rng.uniform(1, 90):.2f} M</td>',
+            f'<td>{rng.uniform(0, 3):.2f}</td>',
+            f'<td>{rng.uniform(5, 80):.2f}</td>',
+            f'<td>{rng.uniform(0, 20):.2f}<span>USD</span></td>',
+            f'<td>{rng.uniform(-50, 50):.2f}%</td>',
+            f'<td>{rng.uniform(0, 5):.2f}%</td>',
+            '<td><a>Technology Services</a></td>',
+            '<td><span>Buy</span></td>',
+        ]
+        body.append(f'<tr class="row">{"".join(cells)}</tr>')
+    # Real pages carry a lot of markup and inline script around the table.
+    padding = "<script>" + "x" * (padding_kb * 1024) + "</script>"
+    return (
+        f"<html><head>{padding}</head><body><div><table><thead><tr>{head}</tr></thead>"
+        f"<tbody>{''.join(body)}</tbody></table></div></body></html>"
+    )
+
+
+def _measure(engine: str, html: str, repeat: int, queue):
+    """Runs in a fresh process so ru_maxrss reflects only this parser."""
+    from finagent import tv_market_movers_scraper as tv
+
+    parse = {"bs4": tv._parse_market_movers_bs4, "lxml": tv._parse_market_movers_lxml}[engine]
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = parse(html)
+        timings.append(time.perf_counter() - start)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        "engine": engine,
+        "best_ms": round(min(timings) * 1000, 2),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 2),
+        "peak_rss_delta_kb": peak_kb - baseline_kb,
+        "output": output,
+    })
+
+
+def run(engine: str, html: str, repeat: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(engine, html, repeat, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TradingView parser benchmark")
+    parser.add_argument("--html", type=Path, help="Recorded market movers page")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    html = args.html.read_text(encoding="utf-8") if args.html else synthetic_page()
+    print(f"page size: {len(html) / 1024:.0f} KB")
+
+    results = [run(engine, html, args.repeat) for engine in ("bs4", "lxml")]
+    same_output = results[0].pop("output") == results[1].pop("output")
+    for result in results:
+        print(json.dumps(result))
+    print(json.dumps({
+        "speedup": round(results[0]["best_ms"] / max(results[1]["best_ms"], 1e-6), 1),
+        "same_output": same_output,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#
+# fake_llm.py
+#
+# A scripted stand-in for Gemini, used by bench_load.py to put the app under
+# load without calling the real model.
+#
+# ScriptedLlm answers both ways ADK talks to a model:
+# - live (root_agent): `connect()` returns a connection that routes each
+#   prompt to one of the agent's tools by keyword (see ROUTES), waits for the
+#   tool's response and then streams `answer_tokens` tokens at
+#   `tokens_per_second`, followed by turn_complete, as the Live API does;
+# - request/response (the sub-agents behind AgentTool): each call makes the
+#   next function call the agent has not made yet (arguments from TOOL_ARGS),
+#   and once every tool has answered, returns `sub_agent_tokens` tokens after
+#   the time it would take to generate them.
+#
+# Every token is one word followed by a space, so clients can count tokens by
+# splitting the streamed text on whitespace.
+#
+# Usage:
+#   from fake_llm import ScriptedLlm, install
+#
+#   install(root_agent, ScriptedLlm(tokens_per_second=40, answer_tokens=300))
+#
+
+import asyncio
+import random
+import re
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.base_llm_connection import BaseLlmConnection
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+# Prompt keyword -> tool of root_agent to call, checked in order.
+ROUTES = [
+    ("brief", "morning_brief_pipeline"),
+    ("indices", "world_indicesdata_agent"),
+    ("commodit", "commodities_data_agent"),
+    ("movers", "market_movers_agent"),
+    ("tone", "market_brief_agent"),
+    ("price", "stock_price_agent"),
+]
+
+# Arguments of the function tools the sub-agents call. Callables get the
+# request text the sub-agent was given.
+TOOL_ARGS = {
+    "get_stock_price": lambda request: {"tickers": re.findall(r"\b[A-Z]{1,5}\b", request) or ["AAPL"]},
+    "fetch_commodity_data": lambda request: {
+        "commodity_names": ["Gold", "Silver", "Copper", "Natural Gas", "Brent Crude", "Crude Oil"],
+    },
+    "scrape_world_indices": {},
+    "scrape_tradingview_market_movers_async": {},
+    "load_brief_snapshot": {},
+}
+
+_WORDS = (
+    "the market opened higher as investors weighed earnings guidance yields and "
+    "the dollar while energy lagged and technology led the gains into the close"
+).split()
+
+
+def _text(content: types.Content | None) -> str:
+    if content is None or not content.parts:
+        return ""
+    return "".join(part.text or "" for part in content.parts)
+
+
+def _usage(tokens: int) -> types.GenerateContentResponseUsageMetadata:
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=0, candidates_token_count=tokens, total_token_count=tokens,
+    )
+
+
+def _function_responses(content: types.Content | None) -> list:
+    if content is None or not content.parts:
+        return []
+    return [part.function_response for part in content.parts if part.function_response]
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Scripted model for load tests.
+
+    Args:
+        tokens_per_second (float): Generation rate of every answer
+        answer_tokens (int): Tokens streamed by root_agent per turn
+        tokens_per_chunk (int): Tokens per streamed partial response
+        sub_agent_tokens (int): Tokens in each sub-agent answer
+        first_token_ms (float): Model latency before the first token or tool call
+        tool_call_rate (float): Share of prompts (0-1) that call the routed tool
+        seed (int): Seed of the tool call and word choice
+    """
+
+    # A Gemini-style name: ADK only attaches built-in tools such as
+    # google_search to requests for Gemini models.
+    model: str = "gemini-2.0-flash-scripted"
+    tokens_per_second: float = 50.0
+    answer_tokens: int = 200
+    tokens_per_chunk: int = 4
+    sub_agent_tokens: int = 40
+    first_token_ms: float = 300.0
+    tool_call_rate: float = 1.0
+    seed: int = 7
+
+    def route(self, prompt: str, tools: dict, rng: random.Random) -> str | None:
+        """Tool of root_agent to call for `prompt`, or None to answer directly."""
+        if rng.random() >= self.tool_call_rate:
+            return None
+        prompt = prompt.lower()
+        for keyword, tool in ROUTES:
+            if keyword in prompt and tool in tools:
+                return tool
+        return None
+
+    def tokens(self, count: int, rng: random.Random) -> list[str]:
+        return [rng.choice(_WORDS) + " " for _ in range(count)]
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        """Sub-agent turn: the next tool call, or the answer once every tool has responded."""
+        rng = random.Random(self.seed)
+        await asyncio.sleep(self.first_token_ms / 1000)
+
+        contents = llm_request.contents or []
+        called = {r.name for content in contents for r in _function_responses(content)}
+        request = next((_text(c) for c in contents if c.role == "user" and _text(c)), "")
+        for name, tool in llm_request.tools_dict.items():
+            # Built-in tools (google_search, url_context) run inside Gemini; skip them.
+            if name in called or not (name in TOOL_ARGS or isinstance(tool, AgentTool)):
+                continue
+            args = TOOL_ARGS.get(name, {"request": request})
+            args = args(request) if callable(args) else dict(args)
+            call = types.FunctionCall(name=name, args=args)
+            yield LlmResponse(
+                content=types.Content(role="model", parts=[types.Part(function_call=call)]),
+                usage_metadata=_usage(1),
+            )
+            return
+
+        text = "".join(self.tokens(self.sub_agent_tokens, rng))
+        await asyncio.sleep(self.sub_agent_tokens / self.tokens_per_second)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part.from_text(text=text)]),
+            usage_metadata=_usage(self.sub_agent_tokens),
+        )
+
+    def connect(self, llm_request):
+        return _Connect(ScriptedConnection(self, llm_request.tools_dict))
+
+
+class _Connect:
+    """Async context manager returned by ScriptedLlm.connect()."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def __aenter__(self):
+        return self.connection
+
+    async def __aexit__(self, *exc_info):
+        await self.connection.close()
+
+
+class ScriptedConnection(BaseLlmConnection):
+    """Live connection of ScriptedLlm: one scripted turn per prompt."""
+
+    def __init__(self, llm: ScriptedLlm, tools: dict):
+        self.llm = llm
+        self.tools = tools
+        self.rng = random.Random(llm.seed)
+        self._inbox = asyncio.Queue()
+        self._closed = False
+
+    async def send_history(self, history):
+        # Nothing to replay: the script does not depend on earlier turns.
+        pass
+
+    async def send_content(self, content: types.Content):
+        await self._inbox.put(content)
+
+    async def send_realtime(self, input):
+        pass
+
+    async def close(self):
+        if not self._closed:
+            self._closed = True
+            self._inbox.put_nowait(None)
+
+    async def _stream_answer(self):
+        tokens = self.llm.tokens(self.llm.answer_tokens, self.rng)
+        interval = self.llm.tokens_per_chunk / self.llm.tokens_per_second
+        for start in range(0, len(tokens), self.llm.tokens_per_chunk):
+            await asyncio.sleep(interval)
+            chunk = "".join(tokens[start:start + self.llm.tokens_per_chunk])
+            yield LlmResponse(
+                content=types.Content(role="model", parts=[types.Part.from_text(text=chunk)]),
+                partial=True,
+            )
+        # The Live API ends a turn with the full text, then turn_complete.
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part.from_text(text="".join(tokens))]),
+            partial=False,
+            usage_metadata=_usage(len(tokens)),
+        )
+        yield LlmResponse(turn_complete=True)
+
+    async def receive(self):
+        while not self._closed:
+            content = await self._inbox.get()
+            if content is None:
+                return
+            if _function_responses(content):
+                # The tool answered: finish the turn.
+                async for response in self._stream_answer():
+                    yield response
+                continue
+
+            await asyncio.sleep(self.llm.first_token_ms / 1000)
+            tool = self.llm.route(_text(content), self.tools, self.rng)
+            if tool is None:
+                async for response in self._stream_answer():
+                    yield response
+                continue
+            call = types.FunctionCall(name=tool, args={"request": _text(content)})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+
+def install(root_agent, llm: ScriptedLlm) -> int:
+    """
+    Replaces the model of `root_agent` and of every agent below it (sub-agents
+    and agents behind AgentTool) with `llm`.
+
+    Returns:
+        int: Number of LLM agents patched
+    """
+    patched = 0
+    seen = set()
+    pending = [root_agent]
+    while pending:
+        agent = pending.pop()
+        if id(agent) in seen:
+            continue
+        seen.add(id(agent))
+        pending.extend(agent.sub_agents)
+        if isinstance(agent, LlmAgent):
+            agent.model = llm
+            patched += 1
+            pending.extend(tool.agent for tool in agent.tools if isinstance(tool, AgentTool))
+    return patched
@@ -0,0 +1,195 @@
+#
+# stub_market_data.py
+#
+# Local stand-in for the market data sites the tools call, used by
+# bench_load.py so a load test does not hit TradingView, Yahoo or Polygon.
+#
+# Routes (one server for all three sites):
+# - GET /markets/stocks-usa/market-movers-large-cap/   TradingView movers page
+# - GET /v7/finance/quote?symbols=...                  Yahoo bulk quotes
+# - GET /v8/finance/chart/{symbol}?range=...           Yahoo daily bars (yf.download)
+# - GET /fed/v1/treasury-yields                        Polygon treasury yields
+#
+# Responses are replayed from recordings in --fixtures when present:
+#   tradingview.html           the movers page, e.g. saved with curl
+#   yahoo_quote.json           a v7 quote response; rows are served per symbol
+#   yahoo_chart/<SYMBOL>.json  a v8 chart response for one symbol
+#   polygon_treasury_yields.json
+# and otherwise generated, deterministically per symbol, in the same shape.
+# Every response is delayed by --latency-ms to stand in for the network.
+#
+# Usage:
+#   python benchmarks/stub_market_data.py --port 8090 [--fixtures recordings/] [--latency-ms 80]
+#
+
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import sys
+import zlib
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_tv_parser import synthetic_page  # noqa: E402
+
+TV_PATH = "/markets/stocks-usa/market-movers-large-cap/"
+
+
+def _rng(symbol: str) -> random.Random:
+    return random.Random(zlib.crc32(symbol.encode()))
+
+
+def synthetic_quote(symbol: str) -> dict:
+    """A v7 quote result for `symbol` with the fields yahoo_quotes.py reads."""
+    rng = _rng(symbol)
+    price = round(rng.uniform(5, 900), 2)
+    previous_close = round(price * rng.uniform(0.96, 1.04), 2)
+    eps = round(rng.uniform(-2, 20), 2)
+    return {
+        "symbol": symbol,
+        "shortName": f"{symbol} Holdings",
+        "currency": "USD",
+        "regularMarketPrice": price,
+        "regularMarketPreviousClose": previous_close,
+        "trailingPE": round(price / eps, 2) if eps > 0 else None,
+        "epsTrailingTwelveMonths": eps,
+        "marketCap": int(price * rng.uniform(1e8, 1e10)),
+        "fiftyTwoWeekLow": round(price * rng.uniform(0.6, 0.95), 2),
+        "fiftyTwoWeekHigh": round(price * rng.uniform(1.05, 1.5), 2),
+        "regularMarketTime": int(datetime.datetime.now(datetime.timezone.utc).timestamp()) - 3600,
+    }
+
+
+def _trading_days(count: int) -> list[datetime.datetime]:
+    """The last `count` weekdays before today, at the 09:30 New York open (UTC)."""
+    days = []
+    day = datetime.datetime.now(datetime.timezone.utc).replace(hour=13, minute=30, second=0, microsecond=0)
+    while len(days) < count:
+        day -= datetime.timedelta(days=1)
+        if day.weekday() < 5:
+            days.append(day)
+    return days[::-1]
+
+
+_RANGE_DAYS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504}
+
+
+def synthetic_chart(symbol: str, params) -> dict:
+    """A v8 chart response with daily bars for `symbol`, sized by range or period1/period2."""
+    if "period1" in params and "period2" in params:
+        span = (int(params["period2"]) - int(params["period1"])) / 86400
+        count = max(1, int(span * 5 / 7))
+    else:
+        count = _RANGE_DAYS.get(params.get("range", "5d"), 5)
+    days = _trading_days(count)
+
+    rng = _rng(symbol)
+    close = rng.uniform(5, 900)
+    bars = {"open": [], "high": [], "low": [], "close": [], "volume": []}
+    for _ in days:
+        open_ = close
+        close = max(0.01, close * rng.uniform(0.97, 1.03))
+        bars["open"].append(round(open_, 2))
+        bars["high"].append(round(max(open_, close) * 1.01, 2))
+        bars["low"].append(round(min(open_, close) * 0.99, 2))
+        bars["close"].append(round(close, 2))
+        bars["volume"].append(rng.randint(10**5, 10**7))
+
+    return {"chart": {"result": [{
+        "meta": {
+            "currency": "USD",
+            "symbol": symbol,
+            "exchangeName": "NMS",
+            "instrumentType": "EQUITY",
+            "regularMarketPrice": bars["close"][-1],
+            "chartPreviousClose": bars["open"][0],
+            "gmtoffset": -14400,
+            "timezone": "EDT",
+            "exchangeTimezoneName": "America/New_York",
+            "dataGranularity": "1d",
+            "range": params.get("range", ""),
+            "validRanges": [*_RANGE_DAYS, "max"],
+            "priceHint": 2,
+        },
+        "timestamp": [int(day.timestamp()) for day in days],
+        "indicators": {"quote": [bars], "adjclose": [{"adjclose": list(bars["close"])}]},
+    }], "error": None}}
+
+
+def synthetic_treasury_yields() -> dict:
+    rng = _rng("treasury")
+    day = _trading_days(1)[0].date().isoformat()
+    row = {"date": day}
+    for tenor in ("1_month", "3_month", "1_year", "2_year", "5_year", "10_year", "30_year"):
+        row[f"yield_{tenor}"] = round(rng.uniform(3.5, 5.2), 2)
+    return {"status": "OK", "request_id": "stub", "results": [row]}
+
+
+def build_app(fixtures: Path | None = None, latency_ms: float = 50) -> FastAPI:
+    """The stub server; `fixtures` is a directory of recorded responses (optional)."""
+    def recorded(name: str):
+        path = fixtures / name if fixtures else None
+        return path.read_bytes() if path and path.is_file() else None
+
+    tv_page = recorded("tradingview.html") or synthetic_page().encode()
+    quote_recording = recorded("yahoo_quote.json")
+    recorded_quotes = {}
+    if quote_recording:
+        for row in json.loads(quote_recording)["quoteResponse"]["result"]:
+            recorded_quotes[row["symbol"]] = row
+    treasury_yields = json.loads(recorded("polygon_treasury_yields.json") or "null") or synthetic_treasury_yields()
+
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def network_latency(request: Request, call_next):
+        await asyncio.sleep(latency_ms / 1000)
+        return await call_next(request)
+
+    @app.get(TV_PATH)
+    async def tradingview_movers():
+        return Response(content=tv_page, media_type="text/html; charset=utf-8")
+
+    @app.get("/v7/finance/quote")
+    async def yahoo_quote(symbols: str = ""):
+        requested = [s for s in symbols.split(",") if s]
+        if recorded_quotes:
+            result = [recorded_quotes[s] for s in requested if s in recorded_quotes]
+        else:
+            result = [synthetic_quote(s) for s in requested]
+        return {"quoteResponse": {"result": result, "error": None}}
+
+    @app.get("/v8/finance/chart/{symbol}")
+    async def yahoo_chart(symbol: str, request: Request):
+        body = recorded(f"yahoo_chart/{symbol}.json")
+        if body is not None:
+            return Response(content=body, media_type="application/json")
+        return JSONResponse(synthetic_chart(symbol, request.query_params))
+
+    @app.get("/fed/v1/treasury-yields")
+    async def polygon_treasury_yields():
+        return treasury_yields
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub TradingView / Yahoo / Polygon server")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fixtures", type=Path, help="Directory of recorded responses")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Delay added to every response")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(build_app(args.fixtures, args.latency_ms), host="127.0.0.1", port=args.port,
+                log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
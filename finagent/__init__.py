@@ -1 +1,10 @@
-from . import agent
+# The agent tree (and through it every tool module) is imported on first use
+# of `finagent.agent`, not when a finagent submodule such as telemetry is
+# imported; main.py builds it in the app lifespan.
+
+
+def __getattr__(name):
+    if name == "agent":
+        from . import agent
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,23 +1,18 @@
-import os
-import sys
-from google.adk.agents import Agent, LlmAgent
-from google.genai import types
+from google.adk.agents import Agent, LlmAgent, ParallelAgent, SequentialAgent
+from google.adk.tools import google_search, url_context
 
-from finagent.tv_market_movers_scraper import scrape_tradingview_market_movers
+# Tool modules import their heavy dependencies (pandas, yfinance, bs4, ...)
+# lazily, on the first tool call; see lazy.py.
+from finagent.tv_market_movers_scraper import scrape_tradingview_market_movers_async
 from finagent.yahoo_comm import fetch_commodity_data
 from finagent.yahoo_indices import scrape_world_indices
 from finagent.yahoo_stock_price import get_stock_price
-
-import warnings
-import yfinance as yf
-from google.adk.tools import google_search
-from google.adk.agents import ParallelAgent
-import warnings
-# Load environment variables from .env file
-from dotenv import load_dotenv
-load_dotenv()
-from google.adk.tools import agent_tool
-from google.adk.tools import url_context
+from finagent.threadpool import offloaded
+from finagent.instrumentation import instrumented, InstrumentedAgentTool
+from finagent.snapshot import load_brief_snapshot
+from finagent.history import get_price_history
+from finagent.brief_modes import BRIEF_MODES, DEFAULT_BRIEF_MODE  # noqa: F401  (re-exported)
+from finagent import brief_timing
 
 # Use gemini-2.0-flash-exp which supports Live API
 LIVE_MODEL = "gemini-2.0-flash-exp"
@@ -72,7 +67,7 @@ stock_price_agent = Agent(
     instruction="""
 You are a helpful stock market assistant. If you don't know something, say so. Provide a detailed summary of key financial metrics, including the P/E ratio, Market Cap, 52-Week Range, and current price using the get_stock_price tool for the ticker symbol mentioned. Show all the metrics as a table. Call the tool formating the tickers as a list
     """,
-    tools=[get_stock_price],
+    tools=[instrumented(offloaded(get_stock_price))],
 )
 
 market_brief_agent = Agent(
@@ -98,7 +93,10 @@ market_brief_agent = Agent(
     
 
     """,
-    tools=[agent_tool.AgentTool(agent=information_gathering_agent),agent_tool.AgentTool(agent=url_context_agent)],
+    tools=[InstrumentedAgentTool(agent=information_gathering_agent),InstrumentedAgentTool(agent=url_context_agent)],
+    output_key="market_brief_section",
+    before_agent_callback=brief_timing.start_section,
+    after_agent_callback=brief_timing.finish_section,
 )
 
 world_indicesdata_agent= Agent (
@@ -107,8 +105,7 @@ world_indicesdata_agent= Agent (
     description="you are a helpful stock market assisstant. If you dont know something say so. you are going to display the world indices as a table. There will be three tables. one for Americas, one for Europe, one for Asia",
     instruction="""
     you are a helpful stock market assisstant.  If you dont know something say so. Do not use this agent for getting data on stock tickers. This will be read by a portfolio manger in the morning before market opens in the US. This data will be used to get the current status of the financial markets all over the world. This will be used by the portfolio mangers to see the overall health of the economy across various countries.  If I ask for a morning brief,you are going to display the world indices as a table. There will be three tables.      
-    Scrape a predefined list of global indices and currencies from Yahoo Finance and return the data as a JSON string.
-    The function fetches data for specific indices across three groups: Americas, Europe, and Asia. It returns a JSON formatted string containing a list of dictionaries, with each dictionary representing an index and its key metrics.
+    Use the scrape_world_indices tool to fetch a predefined list of global indices and currency indices from Yahoo Finance. It fetches all of them in one request and returns a compact JSON table.
 
     Targeted Indices
     Americas: IBOVESPA, Russell 2000, S&P/TSX, Nasdaq, S&P 500, DOW 30, US Dollar, VIX.
@@ -117,13 +114,17 @@ world_indicesdata_agent= Agent (
 
     Asia: Hang Seng, Shanghai, Nikkei 225, S&P/ASX 200, S&P BSE Sensex, KOSPI Composite Index, Japanese Yen Index, Australian Dollar Index.
 
-    Returned Metrics
-    Each dictionary includes: symbol, name, price, change, percent_change, market_time, volume, avg_volume, market_cap, and the group (Americas, Europe, or Asia).
+    Returned Data
+    The table has the columns region, symbol, name, price, change, change_percent and market_time (the time of the quote in UTC), with the rows grouped by region (Americas, Europe, Asia). Build one table per region from the rows of that region.
+    Symbols that could not be fetched are listed per region under "missing", and regions with no data at all under "unavailable_regions".
 
-    If the scraping fails, it returns a descriptive error message as a string.
+    If the tool fails, it returns a descriptive error message as a string.
     If the tool fails to extract specific indices for a region, report that the data for that region is unavailable or incomplete. Do not add any index data that was not retrieved by the tool. Display the data as a table. You are not required to provide data on stock tickers.
         """,
-    tools=[scrape_world_indices],
+    tools=[instrumented(offloaded(scrape_world_indices))],
+    output_key="world_indices_section",
+    before_agent_callback=brief_timing.start_section,
+    after_agent_callback=brief_timing.finish_section,
 )
 
 commodities_data_agent= Agent (
@@ -149,7 +150,10 @@ commodities_data_agent= Agent (
     Do not include any financial data other than the commodity table unless specifically asked for in addition to the brief.
     If you do not know something or cannot perform a step, state so clearly and concisely.
         """,
-    tools=[fetch_commodity_data],
+    tools=[instrumented(offloaded(fetch_commodity_data))],
+    output_key="commodities_section",
+    before_agent_callback=brief_timing.start_section,
+    after_agent_callback=brief_timing.finish_section,
 )
 
 
@@ -160,11 +164,11 @@ market_movers_agent= Agent (
     instruction="""
     You are a helpful stock market assistant designed to provide a concise and actionable Morning Brief for a portfolio manager before the US market opens. Do not use this agent to get data on a stock ticker.
 
-    Your primary function is to leverage the scrape_tradingview_market_movers tool to fetch the Top 100 Large-Cap Stocks data from TradingView. The brief must present this data as of the close of the last business day, clearly indicating the source as TradingView's Large-Cap Market Movers.
+    Your primary function is to leverage the scrape_tradingview_market_movers_async tool to fetch the Top 100 Large-Cap Stocks data from TradingView. The brief must present this data as of the close of the last business day, clearly indicating the source as TradingView's Large-Cap Market Movers.
 
     User Request Format: When the user asks for a 'Morning Brief' or 'market movers', you must:
 
-    Execute the scrape_tradingview_market_movers tool.
+    Execute the scrape_tradingview_market_movers_async tool.
 
     Display the returned stock data in a clear, easy-to-read table format. Include key metrics like ticker, name, market cap, price, change percent, volume, P/E ratio, and analyst rating.
     Please mention the as of date of the data. The header of the tabke should be Market movers.
@@ -172,16 +176,51 @@ market_movers_agent= Agent (
 
     For any other non-market data queries, answer directly. If you don't know the answer to a question, say so.
     """,
-    tools=[scrape_tradingview_market_movers],
+    tools=[instrumented(scrape_tradingview_market_movers_async)],
+    output_key="market_movers_section",
+    before_agent_callback=brief_timing.start_section,
+    after_agent_callback=brief_timing.finish_section,
 )
 
 
 parallel_research_agent = ParallelAgent(
      name="parallel_research_agent",
-     sub_agents=[market_brief_agent, stock_price_agent, world_indicesdata_agent, commodities_data_agent, market_movers_agent],
-     description="Runs multiple research agents in parallel to gather information."
+     sub_agents=[market_brief_agent, world_indicesdata_agent, commodities_data_agent, market_movers_agent],
+     description="Runs multiple research agents in parallel to gather information.",
+     before_agent_callback=brief_timing.start_stage,
+     after_agent_callback=brief_timing.finish_stage,
  )
 
+brief_composer_agent = LlmAgent(
+    name="brief_composer_agent",
+    model=LIVE_MODEL,
+    description="Merges the independently gathered sections into one morning brief.",
+    instruction="""You are composing a US Stock Market Morning Brief for a portfolio manager from sections that were gathered concurrently by specialist agents.
+
+    Merge them into one brief in this order, keeping every table and number exactly as given:
+    1. Market tone and key developments:
+    {market_brief_section?}
+
+    2. World indices:
+    {world_indices_section?}
+
+    3. Commodities:
+    {commodities_section?}
+
+    4. Market movers:
+    {market_movers_section?}
+
+    If a section is empty or reports an error, keep its heading and state that the data is unavailable. Do not add, estimate or change any numerical data.""",
+)
+
+# Fan-out brief: the four independent data sections run concurrently, then a
+# single compose step merges their outputs.
+morning_brief_pipeline = SequentialAgent(
+    name="morning_brief_pipeline",
+    sub_agents=[parallel_research_agent, brief_composer_agent],
+    description="Builds a complete morning brief by gathering market tone, world indices, commodities and market movers concurrently and merging them.",
+)
+
 # Root agent using LlmAgent with agent_tool instead of ParallelAgent
 root_agent = LlmAgent(
     model=LIVE_MODEL,
@@ -189,20 +228,33 @@ root_agent = LlmAgent(
     description="Generates financial analyst reports using specialized sub-agents.",
     instruction="""You are a helpful agent that provides research about markets and stocks. The research is about how the markets, stocks and commodities performed the previous day. This will help the portfolio managers to plan their investment the next day.
 
-    When the user asks you to generate a morning brief:
+    The morning brief mode for this session is: "{brief_mode?}".
+
+    When the user asks you to generate a morning brief, first call load_brief_snapshot.
+    If it returns data, build the world indices, commodities, market movers and treasury yields tables directly from its sections, use market_brief_agent only for the market tone, and do not call the other data agents.
+    If it returns an error, continue as described below.
+
+    When the user asks you to generate a morning brief and the mode is "parallel":
+    Call morning_brief_pipeline once. It gathers every section concurrently and returns the complete brief; present it to the user as is.
+
+    Otherwise, when the user asks you to generate a morning brief:
     1. Use market_brief_agent for market tone and key developments
     2. Use world_indicesdata_agent for world indices data
     3. Use commodities_data_agent for commodity prices
     4. Use market_movers_agent for top market movers
+    Coordinate the sub-agents sequentially and compile their responses into a comprehensive morning brief.
     
     If the user provides stock tickers (e.g., "AAPL", "TSLA"), use the stock_price_agent to get detailed stock data.
-    
-    Coordinate the sub-agents sequentially and compile their responses into a comprehensive morning brief.""",
+
+    When the user asks how something moved over several days (e.g. "how did gold move vs last week"), call get_price_history with the symbols or commodity names first, and compare it with the current data from the data agents. Only fetch the current day again; never scrape past days.""",
     tools=[
-        agent_tool.AgentTool(agent=market_brief_agent),
-        agent_tool.AgentTool(agent=stock_price_agent),
-        agent_tool.AgentTool(agent=world_indicesdata_agent),
-        agent_tool.AgentTool(agent=commodities_data_agent),
-        agent_tool.AgentTool(agent=market_movers_agent),
+        instrumented(load_brief_snapshot),
+        instrumented(offloaded(get_price_history)),
+        InstrumentedAgentTool(agent=market_brief_agent),
+        InstrumentedAgentTool(agent=stock_price_agent),
+        InstrumentedAgentTool(agent=world_indicesdata_agent),
+        InstrumentedAgentTool(agent=commodities_data_agent),
+        InstrumentedAgentTool(agent=market_movers_agent),
+        InstrumentedAgentTool(agent=morning_brief_pipeline),
     ],
 )
@@ -0,0 +1,15 @@
+#
+# brief_modes.py
+#
+# How the root agent builds a morning brief:
+# - "sequential": calls the section agents one after another
+# - "parallel": calls morning_brief_pipeline, which fetches all sections concurrently
+#
+# Kept apart from agent.py so the server can validate the brief_mode query
+# parameter without building the agent tree.
+#
+
+import os
+
+BRIEF_MODES = ("sequential", "parallel")
+DEFAULT_BRIEF_MODE = os.environ.get("FINAGENT_BRIEF_MODE", "sequential")
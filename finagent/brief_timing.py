@@ -0,0 +1,84 @@
+#
+# brief_timing.py
+#
+# Wall-clock instrumentation for the parallel morning brief.
+#
+# The callbacks below are attached to parallel_research_agent (the fan-out
+# stage) and to each of its section agents. When the stage finishes, the
+# section durations are compared with the stage's wall time: the sum of the
+# sections is what the sequential brief would have spent, so the difference
+# is the time saved by running them concurrently. The latest summaries are
+# served by the server's /debug/tool-stats endpoint.
+#
+
+import logging
+import time
+from collections import deque
+
+from google.adk.agents.callback_context import CallbackContext
+
+logger = logging.getLogger(__name__)
+
+# invocation_id -> {"started": float, "sections": {agent_name: [start, end]}}
+_stages = {}
+
+# A brief that fails or is cancelled never reaches finish_stage; its entry is
+# dropped once it is this old (seconds).
+STAGE_MAX_AGE = 10 * 60
+
+# Summaries of the most recent parallel briefs, newest last.
+recent_briefs = deque(maxlen=50)
+
+
+def start_stage(callback_context: CallbackContext):
+    """before_agent_callback for the fan-out stage."""
+    now = time.perf_counter()
+    for invocation_id in [i for i, stage in _stages.items() if now - stage["started"] > STAGE_MAX_AGE]:
+        del _stages[invocation_id]
+    _stages[callback_context.invocation_id] = {"started": now, "sections": {}}
+    return None
+
+
+def start_section(callback_context: CallbackContext):
+    """before_agent_callback for a section agent."""
+    stage = _stages.get(callback_context.invocation_id)
+    if stage is not None:
+        stage["sections"][callback_context.agent_name] = [time.perf_counter(), None]
+    return None
+
+
+def finish_section(callback_context: CallbackContext):
+    """after_agent_callback for a section agent."""
+    stage = _stages.get(callback_context.invocation_id)
+    if stage is not None and callback_context.agent_name in stage["sections"]:
+        stage["sections"][callback_context.agent_name][1] = time.perf_counter()
+    return None
+
+
+def finish_stage(callback_context: CallbackContext):
+    """after_agent_callback for the fan-out stage; records and prints the saving."""
+    stage = _stages.pop(callback_context.invocation_id, None)
+    if stage is None:
+        return None
+
+    wall = time.perf_counter() - stage["started"]
+    sections = {
+        name: round(end - start, 3)
+        for name, (start, end) in stage["sections"].items()
+        if end is not None
+    }
+    serial = sum(sections.values())
+    summary = {
+        "invocation_id": callback_context.invocation_id,
+        "wall_s": round(wall, 3),
+        "serial_s": round(serial, 3),
+        "saved_s": round(serial - wall, 3),
+        "sections_s": sections,
+    }
+    recent_briefs.append(summary)
+    callback_context.state["brief_timing"] = summary
+    logger.info(
+        "Brief timing: wall %ss, sequential %ss, saved %ss",
+        summary["wall_s"], summary["serial_s"], summary["saved_s"],
+    )
+    return None
@@ -0,0 +1,270 @@
+#
+# cache.py
+#
+# TTL + LRU cache shared by the finagent tools.
+#
+# Every morning brief asks for the same previous-close data, so tool results are
+# cached per (tool, normalized arguments, as-of trading date). Each data source
+# has its own TTL, the cache is bounded in size (least recently used entries are
+# evicted first), and concurrent identical requests are coalesced so only one of
+# them reaches the upstream API. On a miss, a precomputed snapshot for the
+# trading date (see snapshot.py) is used before going upstream, and upstream
+# results are appended to the local price history (see history.py).
+#
+# Usage:
+#   from finagent.cache import cached
+#
+#   @cached("commodities")
+#   def fetch_commodity_data(commodity_names: list[str]): ...
+#
+
+import asyncio
+import copy
+import datetime
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from finagent import history, snapshot
+from finagent.market_calendar import last_trading_day
+from finagent.instrumentation import note_cache
+
+# Time-to-live in seconds for each data source.
+SOURCE_TTLS = {
+    "commodities": 30 * 60,
+    "market_movers": 30 * 60,
+    "treasury_yields": 60 * 60,
+    "world_indices": 30 * 60,
+    # Intraday prices: just long enough to absorb repeated asks for the same tickers
+    "stock_prices": 60,
+}
+DEFAULT_TTL = 15 * 60
+
+# Maximum number of cached results across all sources.
+MAX_ENTRIES = int(os.environ.get("FINAGENT_CACHE_MAX_ENTRIES", "256"))
+
+# Tools return error strings instead of raising; those are never cached.
+_ERROR_PREFIXES = ("Error", "An unexpected error occurred")
+
+
+def _as_of_trading_date() -> datetime.date:
+    """Returns the last trading day before today, i.e. the close the data refers to."""
+    return last_trading_day()
+
+
+def _normalize(value):
+    """
+    Normalizes an argument so equivalent calls share a cache key. Lists keep
+    their order: the tools return rows in the order they were asked for.
+    """
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((_normalize(v) for v in value), key=repr))
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in value.items()))
+    return value
+
+
+def _is_cacheable(result) -> bool:
+    return not (isinstance(result, str) and result.startswith(_ERROR_PREFIXES))
+
+
+class TTLCache:
+    """
+    Thread-safe TTL cache with an LRU size bound and request coalescing.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight = {}  # key -> Future of the leader's fetch
+        self._in_flight_async = {}  # key -> asyncio.Task running the fetch
+        self._lock = threading.Lock()
+        self._counters = {}  # source -> {"hits": n, "misses": n, "coalesced": n, "snapshot": n}
+
+    def _count(self, key, counter: str):
+        source = key[0] if isinstance(key, tuple) and key else "default"
+        counters = self._counters.setdefault(source, {"hits": 0, "misses": 0, "coalesced": 0, "snapshot": 0})
+        counters[counter] += 1
+
+    def get_or_fetch(self, key, ttl: float, fetch):
+        """
+        Returns the cached value for `key`, or calls `fetch()` to produce it.
+
+        If another thread is already fetching the same key, this waits for that
+        result instead of issuing a second upstream request.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(key, "hits")
+                note_cache("hit")
+                return copy.deepcopy(entry[1])
+
+            pending = self._in_flight.get(key)
+            is_leader = pending is None
+            if is_leader:
+                self._count(key, "misses")
+                pending = Future()
+                self._in_flight[key] = pending
+            else:
+                self._count(key, "coalesced")
+        note_cache("miss" if is_leader else "coalesced")
+
+        if not is_leader:
+            return copy.deepcopy(pending.result())
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+        if _is_cacheable(value):
+            self.put(key, value, ttl)
+        pending.set_result(value)
+        return copy.deepcopy(value)
+
+    async def get_or_fetch_async(self, key, ttl: float, fetch):
+        """
+        Async counterpart of `get_or_fetch`; `fetch` is a coroutine function.
+
+        The fetch runs in its own task, which every caller (the leader
+        included) awaits through a shield: a caller that is cancelled, e.g.
+        because its WebSocket closed, stops waiting without cancelling the
+        fetch the other sessions are waiting for.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(key, "hits")
+                note_cache("hit")
+                return copy.deepcopy(entry[1])
+
+            task = self._in_flight_async.get(key)
+            is_leader = task is None
+            if is_leader:
+                self._count(key, "misses")
+                task = asyncio.ensure_future(self._fetch_async(key, ttl, fetch))
+                # Nobody may be left waiting; don't warn about an unretrieved exception.
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self._in_flight_async[key] = task
+            else:
+                self._count(key, "coalesced")
+        note_cache("miss" if is_leader else "coalesced")
+
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _fetch_async(self, key, ttl: float, fetch):
+        try:
+            value = await fetch()
+        finally:
+            with self._lock:
+                self._in_flight_async.pop(key, None)
+        if _is_cacheable(value):
+            self.put(key, value, ttl)
+        return value
+
+    def put(self, key, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def from_snapshot(self, key):
+        """Returns the precomputed snapshot result for `key`, or snapshot.MISSING."""
+        result = snapshot.lookup(key)
+        if result is not snapshot.MISSING:
+            with self._lock:
+                self._count(key, "snapshot")
+            note_cache("snapshot")
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns per-source counters plus totals under the "total" key."""
+        with self._lock:
+            stats = {source: dict(counters) for source, counters in self._counters.items()}
+            stats["total"] = {
+                name: sum(counters[name] for counters in self._counters.values())
+                for name in ("hits", "misses", "coalesced", "snapshot")
+            }
+            stats["total"]["entries"] = len(self._entries)
+            return stats
+
+
+# Process-wide cache used by all tools.
+tool_cache = TTLCache()
+
+
+def make_key(source: str, func, args: tuple, kwargs: dict, name: str | None = None) -> tuple:
+    """Builds the (tool, normalized arguments, as-of trading date) cache key."""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    normalized = tuple((arg, _normalize(value)) for arg, value in bound.arguments.items())
+    return (source, name or func.__name__, normalized, _as_of_trading_date().isoformat())
+
+
+def cached(source: str, ttl: float | None = None, name: str | None = None):
+    """
+    Decorator that routes a tool function (sync or async) through the shared cache.
+
+    Args:
+        source (str): Data source name used to look up the TTL in SOURCE_TTLS.
+        ttl (float | None): Overrides the per-source TTL, in seconds.
+        name (str | None): Tool name used in the cache key. Lets a sync tool and
+                           its async variant share entries. Defaults to the
+                           function name.
+    """
+    effective_ttl = ttl if ttl is not None else SOURCE_TTLS.get(source, DEFAULT_TTL)
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = make_key(source, func, args, kwargs, name)
+
+                async def fetch():
+                    result = tool_cache.from_snapshot(key)
+                    if result is snapshot.MISSING:
+                        result = await func(*args, **kwargs)
+                        history.record(source, result)
+                    return result
+                return await tool_cache.get_or_fetch_async(key, effective_ttl, fetch)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(source, func, args, kwargs, name)
+
+            def fetch():
+                result = tool_cache.from_snapshot(key)
+                if result is snapshot.MISSING:
+                    result = func(*args, **kwargs)
+                    history.record(source, result)
+                return result
+            return tool_cache.get_or_fetch(key, effective_ttl, fetch)
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> dict:
+    """Returns the hit, miss, coalesce and snapshot counters of the shared cache."""
+    return tool_cache.stats()
@@ -0,0 +1,293 @@
+#
+# history.py
+#
+# Local history of tool results.
+#
+# Every fresh (upstream) fetch of the data tools is appended to a SQLite file,
+# one row per symbol and date, so the agents can compare prices over several
+# days without scraping the past again. get_price_history is the tool that
+# reads it.
+#
+# Table layout (history.db next to main.py):
+#   observations(date, symbol, name, source, price, change, change_percent,
+#                fetched_at, data)
+#   indexed on (symbol, date) and on (name, date) for commodity names, both
+#   case-insensitive.
+#
+# `date` is the trading date the values refer to: the row's own date or quote
+# time when the tool reports one (yields, indices, stock prices), otherwise the
+# US trading session the fetch happened in: today once the exchange has opened
+# on a trading day, else the last trading day (whose close the data then
+# shows). Treasury yields are stored as one row per tenor, with the tenor
+# ("yield_10_year") as the symbol and the yield as the price. `data` keeps the
+# whole tool row as JSON.
+#
+# Writes are queued and done by one background thread, so recording never
+# delays a tool result; a fetch is recorded once even when many sessions
+# share it through the cache.
+#
+# Configuration (environment variables):
+#   FINAGENT_HISTORY       "0" disables recording (default "1")
+#   FINAGENT_HISTORY_DB    SQLite file path (default: history.db next to main.py)
+#
+
+import datetime
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from finagent.market_calendar import is_trading_day, previous_trading_day
+from finagent.tool_output import dumps_table, table_records
+
+logger = logging.getLogger(__name__)
+
+HISTORY_ENABLED = os.environ.get("FINAGENT_HISTORY", "1") != "0"
+HISTORY_DB = os.environ.get(
+    "FINAGENT_HISTORY_DB",
+    str(Path(__file__).resolve().parent.parent / "history.db"),
+)
+
+# Longest window get_price_history returns, in calendar days.
+MAX_DAYS = 366
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = datetime.time(9, 30)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    date TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    name TEXT,
+    source TEXT NOT NULL,
+    price REAL,
+    change REAL,
+    change_percent REAL,
+    fetched_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+DROP INDEX IF EXISTS observations_symbol_date;
+CREATE INDEX IF NOT EXISTS observations_symbol_nocase_date ON observations (symbol COLLATE NOCASE, date);
+CREATE INDEX IF NOT EXISTS observations_name_date ON observations (name COLLATE NOCASE, date);
+"""
+
+_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path, timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(_SCHEMA)
+    return db
+
+
+def session_date(now: datetime.datetime | None = None) -> str:
+    """
+    The US trading session a fetch at `now` (default: now) sees: today once the
+    exchange has opened on a trading day, otherwise the last trading day.
+    """
+    local = (now or datetime.datetime.now(datetime.timezone.utc)).astimezone(EXCHANGE_TZ)
+    today = local.date()
+    if is_trading_day(today) and local.time() >= MARKET_OPEN:
+        return today.isoformat()
+    return previous_trading_day(today).isoformat()
+
+
+def _row_date(row: dict, fallback: str) -> str:
+    """The trading date of a tool row: its "date", the day of its "market_time", or `fallback`."""
+    for field in ("date", "market_time"):
+        value = row.get(field)
+        if isinstance(value, str) and len(value) >= 10:
+            return value[:10]
+    return fallback
+
+
+def observations(source: str, result, fetched: datetime.datetime | None = None) -> list[tuple]:
+    """
+    Converts a tool result into observation rows.
+
+    Args:
+        source (str): Cache source of the tool, e.g. "commodities"
+        result: The tool's result (a columnar JSON table; anything else is ignored)
+        fetched (datetime): When the result was fetched (default: now); dates
+                            rows that carry no date of their own
+
+    Returns:
+        list[tuple]: (date, symbol, name, source, price, change, change_percent, data)
+    """
+    try:
+        records = table_records(result)
+    except (TypeError, ValueError, KeyError):
+        return []
+
+    fallback = session_date(fetched)
+    rows = []
+    for record in records:
+        date = _row_date(record, fallback)
+        data = json.dumps(record, separators=(',', ':'), default=str)
+        if source == "treasury_yields":
+            for field, value in record.items():
+                if field.startswith("yield_") and value is not None:
+                    rows.append((date, field, None, source, value, None, None, data))
+            continue
+
+        symbol = record.get("symbol") or record.get("ticker")
+        if not symbol:
+            continue
+        rows.append((
+            date, symbol, record.get("name"), source,
+            record.get("price"), record.get("change"), record.get("change_percent"), data,
+        ))
+    return rows
+
+
+def _write_loop(path: str):
+    db = None
+    while True:
+        batch = [_queue.get()]
+        # Everything queued meanwhile goes into the same transaction.
+        while not _queue.empty():
+            batch.append(_queue.get_nowait())
+
+        rows = [row for item in batch if item is not None for row in item]
+        try:
+            if db is None:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                db = _connect(path)
+            if rows:
+                with db:
+                    db.executemany(
+                        "INSERT INTO observations (date, symbol, name, source, price, change,"
+                        " change_percent, data, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+        except sqlite3.Error as e:
+            logger.warning("Could not record %d history row(s) in %s: %s", len(rows), path, e)
+
+        for _ in batch:
+            _queue.task_done()
+        if None in batch:
+            if db is not None:
+                db.close()
+            return
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_write_loop, args=(HISTORY_DB,), name="finagent-history", daemon=True)
+            _writer.start()
+
+
+def record(source: str, result):
+    """
+    Queues a fresh tool result for the history store. Error strings and
+    results that are not columnar tables are skipped.
+    """
+    if not HISTORY_ENABLED:
+        return
+    fetched = datetime.datetime.now(datetime.timezone.utc)
+    rows = observations(source, result, fetched)
+    if not rows:
+        return
+    fetched_at = fetched.isoformat(timespec="seconds")
+    _ensure_writer()
+    _queue.put([(*row, fetched_at) for row in rows])
+
+
+def flush():
+    """Waits until every queued result is written and stops the writer thread."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None and writer.is_alive():
+        _queue.put(None)
+        writer.join(timeout=10)
+
+
+def get_price_history(symbols: list[str], days: int = 10) -> str:
+    """
+    Returns the recorded daily prices of symbols over the last `days` days from
+    the local history store, without any network request.
+
+    Use this to compare today's data with previous days (e.g. "how did gold
+    move vs last week"). The store only holds what the data tools fetched on
+    earlier days, so recent days or symbols may be missing.
+
+    Args:
+        symbols (list[str]): Ticker or index symbols (e.g. "AAPL", "^GSPC",
+                             "GC=F"), commodity names (e.g. "gold") or treasury
+                             tenors (e.g. "yield_10_year")
+        days (int): Number of calendar days to look back (default 10)
+
+    Returns:
+        str: A compact JSON table {"columns": [...], "rows": [[...]]} with one
+             row per symbol and date (symbol, name, date, price, change,
+             change_percent, source), oldest first, using the last fetch of
+             each day. Symbols without history are listed under "missing".
+    """
+    if isinstance(symbols, str):
+        symbols = [symbols]
+    wanted = [s.strip() for s in symbols if s and s.strip()]
+    if not wanted:
+        return "Error: No symbols given."
+    try:
+        days = max(1, min(int(days), MAX_DAYS))
+    except (TypeError, ValueError):
+        return f"Error: days must be a whole number of days, got {days!r}."
+    since = (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+
+    if not Path(HISTORY_DB).exists():
+        return "Error: No price history has been recorded yet."
+
+    placeholders = ", ".join("?" * len(wanted))
+    try:
+        with closing(sqlite3.connect(HISTORY_DB, timeout=30)) as db:
+            db.row_factory = sqlite3.Row
+            # The last fetch of each (symbol, date): observations are appended
+            # in fetch order, so that is the highest rowid.
+            found = db.execute(
+                f"""
+                SELECT symbol, name, date, price, change, change_percent, source
+                FROM observations
+                WHERE rowid IN (
+                    SELECT MAX(rowid) FROM observations
+                    WHERE date >= ?
+                      AND (symbol COLLATE NOCASE IN ({placeholders}) OR name COLLATE NOCASE IN ({placeholders}))
+                    GROUP BY symbol, date
+                )
+                ORDER BY symbol, date
+                """,
+                (since, *wanted, *wanted),
+            ).fetchall()
+    except sqlite3.Error as e:
+        logger.error("Could not read price history from %s: %s", HISTORY_DB, e)
+        return f"Error: Could not read price history: {e}"
+
+    records = [dict(row) for row in found]
+    seen = {r["symbol"].lower() for r in records} | {(r["name"] or "").lower() for r in records}
+    missing = [s for s in wanted if s.lower() not in seen]
+    return dumps_table(
+        records,
+        columns=["symbol", "name", "date", "price", "change", "change_percent", "source"],
+        missing=missing or None,
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    result = get_price_history(sys.argv[1:] or ["^GSPC"])
+    try:
+        print(json.dumps(json.loads(result), indent=2))
+    except ValueError:
+        # Failures come back as "Error: ..." strings
+        print(result)
@@ -0,0 +1,127 @@
+#
+# http_client.py
+#
+# Shared async HTTP client for the scraping tools.
+#
+# All tools reuse one keep-alive connection pool (HTTP/2 when the `h2` package is
+# installed) instead of opening a new connection per call, and requests to the
+# same host are capped so one slow site cannot hog the pool.
+#
+# The sync clients report their response sizes here too: `count_yfinance_bytes`
+# hooks yfinance's session (see lazy_import's on_load), so tool records get
+# upstream_bytes whichever client fetched the data.
+#
+# Requirements:
+# - httpx: pip install "httpx[http2]"
+#
+
+import asyncio
+import functools
+import os
+from urllib.parse import urlsplit
+
+import httpx
+
+from finagent.instrumentation import note_bytes
+
+try:
+    import h2  # noqa: F401  (only needed to enable HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+
+# Maximum concurrent requests per host.
+PER_HOST_LIMIT = int(os.environ.get("FINAGENT_HTTP_PER_HOST_LIMIT", "4"))
+
+# The client and semaphores are bound to the event loop that created them.
+_client = None
+_client_loop = None
+_host_semaphores = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared AsyncClient for the running event loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=TIMEOUT,
+            limits=LIMITS,
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+        )
+        _client_loop = loop
+        _host_semaphores.clear()
+    return _client
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    if host not in _host_semaphores:
+        _host_semaphores[host] = asyncio.Semaphore(PER_HOST_LIMIT)
+    return _host_semaphores[host]
+
+
+async def fetch_text(url: str, headers: dict | None = None, timeout: float | None = None) -> str:
+    """
+    Fetches `url` through the shared pool and returns the response body.
+
+    Raises:
+        httpx.HTTPError: On network errors, timeouts and 4xx/5xx responses.
+    """
+    client = get_client()
+    async with _host_semaphore(url):
+        response = await client.get(
+            url,
+            headers=headers,
+            timeout=timeout if timeout is not None else TIMEOUT,
+        )
+    note_bytes(len(response.content))
+    response.raise_for_status()
+    return response.text
+
+
+def count_yfinance_bytes(yf):
+    """
+    Counts the body of every yfinance HTTP response as upstream bytes of the
+    tool call in progress. Wraps YfData.get/post once; get_raw_json and the
+    download/Ticker helpers all go through them.
+
+    Args:
+        yf: The yfinance module, as passed by lazy_import's on_load
+    """
+    # Imported here: yfinance is only imported once a tool needs it.
+    from yfinance.data import YfData
+
+    for name in ("get", "post"):
+        method = getattr(YfData, name)
+        if not getattr(method, "_counts_bytes", False):
+            setattr(YfData, name, _counting_bytes(method))
+
+
+def _counting_bytes(method):
+    @functools.wraps(method)
+    def counted(*args, **kwargs):
+        response = method(*args, **kwargs)
+        note_bytes(len(response.content or b""))
+        return response
+
+    counted._counts_bytes = True
+    return counted
+
+
+async def aclose():
+    """Closes the shared client. Called from the FastAPI lifespan at shutdown."""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _host_semaphores.clear()
@@ -0,0 +1,222 @@
+#
+# instrumentation.py
+#
+# Per-tool latency and error instrumentation for the ADK tools and sub-agents.
+#
+# Every function tool is wrapped with `instrumented` and every sub-agent is
+# exposed through `InstrumentedAgentTool`. Each call produces one record with
+# wall time, upstream bytes, cache status and error class. Records feed:
+#
+# - the Prometheus histogram/counters in telemetry.py,
+# - an in-memory rolling window per tool (p50/p95/p99, see `tool_stats()`),
+# - an optional per-turn trace list that main.py sends to debug clients,
+# - an optional per-connection listener that gets each function tool's result
+#   as soon as the tool returns (main.py turns data results into tables for
+#   the client before the model has digested them).
+#
+# The cache layer and the HTTP client annotate the call in progress through
+# `note_cache()` / `note_bytes()`; the current record travels in a context
+# variable, which the tool thread pool copies into worker threads.
+#
+
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from google.adk.tools import agent_tool
+
+from finagent import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Number of recent calls per tool used for the rolling percentiles.
+WINDOW_SIZE = 500
+
+# Record of the tool call currently running in this context.
+_current_call = contextvars.ContextVar("finagent_current_call", default=None)
+
+# Per-turn trace list; set by the server for each connection.
+_turn_trace = contextvars.ContextVar("finagent_turn_trace", default=None)
+
+# Callback(tool, result) for function tool results; set by the server for each connection.
+_result_listener = contextvars.ContextVar("finagent_result_listener", default=None)
+
+_lock = threading.Lock()
+_durations = defaultdict(lambda: deque(maxlen=WINDOW_SIZE))
+_calls = defaultdict(int)
+_errors = defaultdict(lambda: defaultdict(int))
+
+
+def note_cache(status: str):
+    """Marks the current tool call as a cache hit, miss, coalesced or snapshot."""
+    record = _current_call.get()
+    if record is not None:
+        record["cache"] = status
+
+
+def note_bytes(count: int):
+    """Adds `count` upstream response bytes to the current tool call."""
+    record = _current_call.get()
+    if record is not None:
+        record["upstream_bytes"] = (record["upstream_bytes"] or 0) + count
+
+
+def start_turn_trace() -> list:
+    """
+    Starts collecting tool records for the current context (one connection)
+    and returns the list they are appended to. Tasks created afterwards from
+    this context share the same list.
+    """
+    trace = []
+    _turn_trace.set(trace)
+    return trace
+
+
+def watch_tool_results(listener):
+    """
+    Calls `listener(tool, result)` with the result of every function tool
+    that returns in the current context (one connection), including tools of
+    sub-agents called through AgentTool. Tasks created afterwards from this
+    context share the listener.
+    """
+    _result_listener.set(listener)
+
+
+def _publish(tool: str, result):
+    listener = _result_listener.get()
+    if listener is None or _error_class(result, None):
+        return
+    try:
+        listener(tool, result)
+    except Exception as e:
+        # A listener must never fail the tool call.
+        logger.warning("Tool result listener failed for %s: %s", tool, e)
+
+
+def _error_class(result, error: BaseException | None) -> str | None:
+    if error is not None:
+        return type(error).__name__
+    # Tools report failures as strings starting with "Error..." instead of raising.
+    if isinstance(result, str) and result.startswith(("Error", "An unexpected error occurred")):
+        return "ToolError"
+    return None
+
+
+def _begin(tool: str) -> tuple[dict, contextvars.Token]:
+    parent = _current_call.get()
+    record = {
+        "tool": tool,
+        "parent": parent["tool"] if parent else None,
+        "wall_ms": None,
+        "upstream_bytes": None,
+        "cache": None,
+        "error": None,
+    }
+    return record, _current_call.set(record)
+
+
+def _finish(record: dict, token: contextvars.Token, start: float, result, error: BaseException | None):
+    _current_call.reset(token)
+    elapsed = time.perf_counter() - start
+    record["wall_ms"] = round(elapsed * 1000, 1)
+    record["error"] = _error_class(result, error)
+
+    tool = record["tool"]
+    telemetry.TOOL_LATENCY.labels(tool=tool).observe(elapsed)
+    if record["error"]:
+        telemetry.TOOL_ERRORS.labels(tool=tool, error=record["error"]).inc()
+    with _lock:
+        _durations[tool].append(elapsed)
+        _calls[tool] += 1
+        if record["error"]:
+            _errors[tool][record["error"]] += 1
+
+    trace = _turn_trace.get()
+    if trace is not None:
+        trace.append(record)
+
+
+def instrumented(func):
+    """
+    Wraps a tool function (sync or async) so every call is measured.
+    The wrapper keeps the function's name, signature and docstring.
+    """
+    tool = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            record, token = _begin(tool)
+            start = time.perf_counter()
+            result, error = None, None
+            try:
+                result = await func(*args, **kwargs)
+                _publish(tool, result)
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _finish(record, token, start, result, error)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        record, token = _begin(tool)
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = func(*args, **kwargs)
+            _publish(tool, result)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _finish(record, token, start, result, error)
+    return wrapper
+
+
+class InstrumentedAgentTool(agent_tool.AgentTool):
+    """AgentTool that records each sub-agent call like a function tool."""
+
+    async def run_async(self, *, args, tool_context):
+        record, token = _begin(self.name)
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = await super().run_async(args=args, tool_context=tool_context)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _finish(record, token, start, result, error)
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    index = min(len(ordered) - 1, int(pct / 100 * len(ordered)))
+    return ordered[index]
+
+
+def tool_stats() -> dict:
+    """Returns rolling p50/p95/p99 (ms), call counts and error classes per tool."""
+    with _lock:
+        snapshot = {tool: sorted(durations) for tool, durations in _durations.items()}
+        calls = dict(_calls)
+        errors = {tool: dict(classes) for tool, classes in _errors.items()}
+
+    stats = {}
+    for tool, ordered in snapshot.items():
+        stats[tool] = {
+            "calls": calls.get(tool, 0),
+            "errors": errors.get(tool, {}),
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 1),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 1),
+            "p99_ms": round(_percentile(ordered, 99) * 1000, 1),
+        }
+    return stats
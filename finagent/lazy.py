@@ -0,0 +1,67 @@
+#
+# lazy.py
+#
+# Deferred imports for the heavy third-party libraries used by the tools.
+#
+# pandas, yfinance, bs4, requests and friends take most of the app's import
+# time, but they are only needed once a tool actually runs. A tool module binds
+# them with `lazy_import` instead of `import`; the real import happens on the
+# first attribute access, i.e. on the first tool call.
+#
+# Usage:
+#   from finagent.lazy import lazy_import
+#
+#   pd = lazy_import("pandas")
+#   pd.DataFrame(...)  # pandas is imported here
+#
+# `on_load` runs once with the real module right after it is imported, e.g. to
+# instrument it:
+#
+#   yf = lazy_import("yfinance", on_load=count_yfinance_bytes)
+#
+# Attributes used in annotations are evaluated at import time, so modules
+# using a lazy module in signatures quote those annotations ("pd.DataFrame").
+#
+
+import importlib
+import threading
+import types
+
+_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first attribute access."""
+
+    def __init__(self, name: str, on_load=None):
+        super().__init__(name)
+        self._module = None
+        self._on_load = on_load
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    module = importlib.import_module(self.__name__)
+                    if self._on_load is not None:
+                        self._on_load(module)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        # Only called for attributes missing from the placeholder itself.
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str, on_load=None) -> LazyModule:
+    """
+    Returns a placeholder for module `name` that is imported when first used.
+
+    Args:
+        name (str): Module to import
+        on_load: Optional callback(module), called once after the import
+    """
+    return LazyModule(name, on_load)
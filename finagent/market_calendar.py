@@ -0,0 +1,121 @@
+#
+# market_calendar.py
+#
+# US exchange (NYSE/Nasdaq) trading calendar shared by the finagent tools.
+#
+# Full-day market holidays are computed from the exchange rules, so there is no
+# yearly table to maintain:
+#
+# - New Year's Day, Juneteenth (from 2022), Independence Day and Christmas, moved
+#   to Friday when they fall on Saturday and to Monday when they fall on Sunday
+#   (a Saturday New Year's Day is not moved back into the previous year),
+# - Martin Luther King Jr. Day, Washington's Birthday, Memorial Day, Labor Day
+#   and Thanksgiving (fixed weekdays),
+# - Good Friday.
+#
+# One-off closures (e.g. a national day of mourning) can be added with the
+# FINAGENT_EXTRA_CLOSURES environment variable, a comma separated list of
+# YYYY-MM-DD dates.
+#
+# Usage:
+#   from finagent.market_calendar import last_trading_day
+#
+#   as_of = last_trading_day()  # the close the morning brief refers to
+#
+
+import datetime
+import functools
+import os
+
+EXTRA_CLOSURES = frozenset(
+    datetime.date.fromisoformat(day.strip())
+    for day in os.environ.get("FINAGENT_EXTRA_CLOSURES", "").split(",")
+    if day.strip()
+)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> datetime.date:
+    """n-th `weekday` (Monday is 0) of the month; n = -1 is the last one."""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + datetime.timedelta(days=offset + 7 * (n - 1))
+    next_month = datetime.date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> datetime.date:
+    """Western Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def _observed(day: datetime.date) -> datetime.date:
+    if day.weekday() == 5:
+        return day - datetime.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + datetime.timedelta(days=1)
+    return day
+
+
+@functools.lru_cache(maxsize=16)
+def market_holidays(year: int) -> frozenset:
+    """Returns the full-day exchange holidays of `year`."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),    # Washington's Birthday
+        _easter(year) - datetime.timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),   # Memorial Day
+        _observed(datetime.date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),    # Labor Day
+        _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        _observed(datetime.date(year, 12, 25)),  # Christmas
+    }
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(datetime.date(year, 6, 19)))  # Juneteenth
+    return frozenset(holidays)
+
+
+def is_trading_day(day: datetime.date) -> bool:
+    """True when the exchange is open on `day`."""
+    return (
+        day.weekday() < 5
+        and day not in market_holidays(day.year)
+        and day not in EXTRA_CLOSURES
+    )
+
+
+def previous_trading_day(day: datetime.date) -> datetime.date:
+    """Returns the last trading day strictly before `day`."""
+    current_date = day - datetime.timedelta(days=1)
+    while not is_trading_day(current_date):
+        current_date -= datetime.timedelta(days=1)
+    return current_date
+
+
+def last_trading_day(today: datetime.date | None = None) -> datetime.date:
+    """
+    Returns the last trading day before `today` (default: the current date),
+    i.e. the close the previous-day data refers to.
+    """
+    return previous_trading_day(today or datetime.date.today())
+
+
+if __name__ == "__main__":
+    year = datetime.date.today().year
+    for holiday in sorted(market_holidays(year)):
+        print(holiday.isoformat(), holiday.strftime("%A"))
+    print("Last trading day:", last_trading_day())
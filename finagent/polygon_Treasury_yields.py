@@ -1,54 +1,81 @@
-from polygon import RESTClient
 import datetime
 import json
+import logging
+import os
+import threading
 
+from finagent.cache import cached
+from finagent.instrumentation import note_bytes
+from finagent.market_calendar import last_trading_day
+from finagent.tool_output import dumps_table
 
-def _get_last_available_date():
-    today = datetime.date.today()
-    # Go back to yesterday initially
-    current_date = today - datetime.timedelta(days=1)
-    
-    # Loop backwards until a weekday is found
-    while current_date.weekday() > 4: # Monday is 0, Sunday is 6
-        current_date -= datetime.timedelta(days=1)
-    return current_date
+logger = logging.getLogger(__name__)
 
+# docs
+# https://polygon.io/docs/rest/economy/treasury-yields
+
+# POLYGON_API_KEY environment variable is used when set, otherwise the hardcoded key.
+POLYGON_API_KEY = os.environ.get("POLYGON_API_KEY", "28Q3Y6RI4mlMoadL5xBBPC11nDVoP6L4")
+
+# How far back the range query looks. Treasury yields follow the bond market
+# calendar, which has a few closures the stock exchange does not (e.g. Columbus
+# Day), so the window is generous; it still costs a single request.
+LOOKBACK_DAYS = 10
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """Returns the module-wide client so its HTTP connection pool is reused."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Imported here: the polygon client is only needed once the tool runs.
+                from polygon import RESTClient
+
+                _client = RESTClient(POLYGON_API_KEY)
+    return _client
+
+
+@cached("treasury_yields")
 def get_treasury_yields():
-    # docs
-    # https://polygon.io/docs/rest/economy/treasury-yields
-
-    # client = RESTClient("XXXXXX") # hardcoded api_key is used
-    client = RESTClient("28Q3Y6RI4mlMoadL5xBBPC11nDVoP6L4") # Replace "YOUR_POLYGON_API_KEY" with your actual key
-    #client = RESTClient()  # POLYGON_API_KEY environment variable is used
-    #client = RESTClient()  # Use environment variable for API key
-    
-    # yesterday = datetime.date.today() - datetime.timedelta(days=1)
-    # yesterday_str = yesterday.strftime("%Y-%m-%d")
-    
-    current_date = _get_last_available_date()
-    max_retries = 7 # Try up to a week back for long weekends
-    retries = 0
-    
-    while retries < max_retries:
-        date_str = current_date.strftime("%Y-%m-%d")
-        treasury_yields_data_generator = client.list_treasury_yields(date=date_str)
-        treasury_yields_data = list(treasury_yields_data_generator) # Convert generator to a list
-        
-        if treasury_yields_data:
-            break # Data found, exit loop
-        
-        print(f"No data for {date_str}, trying previous day...")
-        current_date -= datetime.timedelta(days=1)
-        retries += 1
-    
-    if not treasury_yields_data:
-        print("Could not retrieve treasury yields data after multiple attempts.")
+    """
+    Returns the most recent daily treasury yield curve on or before the last
+    trading day, in one request.
+
+    Returns:
+        str: A compact JSON table {"columns": [...], "rows": [[...]]} with one row
+             (date plus yield_* fields in percent), or an empty JSON list if no
+             data was found.
+    """
+    end_date = last_trading_day()
+    start_date = end_date - datetime.timedelta(days=LOOKBACK_DAYS)
+
+    # Newest row first and limit=1: a single request. The raw response is
+    # decoded here so its size can be counted.
+    response = _get_client().list_treasury_yields(
+        date_gte=start_date.isoformat(),
+        date_lte=end_date.isoformat(),
+        sort="date",
+        order="desc",
+        limit=1,
+        raw=True,
+    )
+    note_bytes(len(response.data))
+    results = json.loads(response.data).get("results") or []
+    latest = results[0] if results else None
+
+    if latest is None:
+        logger.warning("No treasury yields data between %s and %s.", start_date, end_date)
         return json.dumps([])
-    
-    yields_list = []
-    for item in treasury_yields_data:
-        yields_list.append(item.__dict__)
-    return json.dumps(yields_list, indent=4)
+
+    if latest.get("date") != end_date.isoformat():
+        logger.debug("No treasury yields for %s, using %s.", end_date, latest.get("date"))
+
+    row = {key: value for key, value in latest.items() if value is not None}
+    return dumps_table([row])
 
 if __name__ == "__main__":
     yields = get_treasury_yields()
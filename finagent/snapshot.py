@@ -0,0 +1,146 @@
+#
+# snapshot.py
+#
+# Precomputed morning-brief snapshots.
+#
+# The numeric sections of the brief are identical for every user on a given
+# trading date. snapshot_job.py (next to main.py) fetches all tool data before
+# the open and writes one JSON file per as-of trading date. The cache layer
+# consults that file before going upstream, so tools served from a snapshot do
+# no network calls at all.
+#
+# Snapshot file layout (snapshots/YYYY-MM-DD.json):
+#   {
+#     "trading_date": "2025-10-10",
+#     "generated_at": "2025-10-13T12:30:05+00:00",
+#     "entries": {"<tool>:<normalized args>": {"tool": ..., "source": ..., "result": ...}}
+#   }
+#
+
+import datetime
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = Path(os.environ.get(
+    "FINAGENT_SNAPSHOT_DIR",
+    Path(__file__).resolve().parent.parent / "snapshots",
+))
+
+# Returned by lookup() when the snapshot has no entry for a call.
+MISSING = object()
+
+_lock = threading.Lock()
+_loaded = {}  # trading date -> (file mtime, snapshot dict)
+
+
+def snapshot_path(trading_date: str) -> Path:
+    return SNAPSHOT_DIR / f"{trading_date}.json"
+
+
+def entry_key(tool: str, normalized_args) -> str:
+    """Stable string key for a tool call; tuples and lists serialize alike."""
+    return f"{tool}:{json.dumps(normalized_args, default=str, separators=(',', ':'))}"
+
+
+def load_snapshot(trading_date: str) -> dict | None:
+    """Returns the snapshot for `trading_date`, re-reading the file only when it changes."""
+    path = snapshot_path(trading_date)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        loaded = _loaded.get(trading_date)
+        if loaded and loaded[0] == mtime:
+            return loaded[1]
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not read snapshot %s: %s", path, e)
+        return None
+
+    with _lock:
+        _loaded[trading_date] = (mtime, snapshot)
+    return snapshot
+
+
+def lookup(cache_key: tuple):
+    """
+    Returns the snapshot result for a cache key built by cache.make_key, or MISSING.
+    """
+    _, tool, normalized_args, trading_date = cache_key
+    snapshot = load_snapshot(trading_date)
+    if not snapshot:
+        return MISSING
+    entry = snapshot.get("entries", {}).get(entry_key(tool, normalized_args))
+    if entry is None:
+        return MISSING
+    return entry["result"]
+
+
+def write_snapshot(trading_date: str, entries: dict) -> Path:
+    """Atomically writes the snapshot for `trading_date` and returns its path."""
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    path = snapshot_path(trading_date)
+    tmp_path = path.with_suffix(".json.tmp")
+    snapshot = {
+        "trading_date": trading_date,
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "entries": entries,
+    }
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return path
+
+
+def _embeddable(result):
+    """
+    Tool results are JSON strings; nesting them as strings would escape every
+    quote, so they are embedded as JSON values when they parse.
+    """
+    if isinstance(result, str):
+        try:
+            return json.loads(result)
+        except ValueError:
+            return result
+    return result
+
+
+def load_brief_snapshot() -> str:
+    """
+    Returns all precomputed numeric sections of the morning brief for the last
+    trading day: world indices, commodities, market movers and treasury yields.
+
+    Use this before calling any data agent. If it returns data, build the
+    numeric tables of the brief from it directly.
+
+    Returns:
+        str: A JSON string {"as_of": date, "generated_at": ..., "sections": {tool: result}},
+             or an error message as a string if no snapshot exists.
+    """
+    # Imported here to avoid a cycle: the cache imports this module.
+    from finagent.cache import _as_of_trading_date
+
+    trading_date = _as_of_trading_date().isoformat()
+    snapshot = load_snapshot(trading_date)
+    if not snapshot:
+        return f"Error: No morning brief snapshot available for {trading_date}."
+
+    sections = {
+        entry["tool"]: _embeddable(entry["result"])
+        for entry in snapshot.get("entries", {}).values()
+    }
+    return json.dumps(
+        {"as_of": trading_date, "generated_at": snapshot.get("generated_at"), "sections": sections},
+        separators=(',', ':'),
+        default=str,
+    )
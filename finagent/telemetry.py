@@ -0,0 +1,157 @@
+#
+# telemetry.py
+#
+# Logging and metrics for the streaming app and the finagent tools.
+#
+# Logging: records are put on an in-memory queue by a QueueHandler and written
+# to stderr by a background QueueListener thread, so the event loop never blocks
+# on a stdout/stderr write. Per-chunk debug events go through a dedicated logger
+# with a sampling filter.
+#
+# Metrics: Prometheus counters and histograms for connections, turns, streamed
+# text and tool latency (fed by instrumentation.py), rendered by `render_metrics()` for the /metrics endpoint.
+# With several uvicorn workers, PROMETHEUS_MULTIPROC_DIR (set by
+# `prepare_multiprocess_metrics()` before the workers start) makes every worker
+# write its samples there and /metrics aggregate them, whichever worker answers.
+#
+# Requirements:
+# - prometheus_client: pip install prometheus_client
+#
+
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import tempfile
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# Fraction of per-chunk debug events that are logged (0.0 - 1.0).
+CHUNK_LOG_SAMPLE_RATE = float(os.environ.get("CHUNK_LOG_SAMPLE_RATE", "0.01"))
+
+# Logger for high-volume per-chunk events; sampled by ChunkSampler.
+chunk_logger = logging.getLogger("finagent.chunks")
+
+_listener = None
+
+
+class ChunkSampler(logging.Filter):
+    """Lets through every n-th record, where n = 1 / rate."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.every:
+            return False
+        return next(self._counter) % self.every == 0
+
+
+def setup_logging(level: str = LOG_LEVEL):
+    """
+    Routes all logging through a queue drained by a background thread.
+    Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s: %(message)s"
+    ))
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+    chunk_logger.addFilter(ChunkSampler(CHUNK_LOG_SAMPLE_RATE))
+    # httpx logs every request at INFO; that is per tool call on the hot path.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def shutdown_logging():
+    """Flushes queued records. Called from the FastAPI lifespan at shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# Metrics
+
+WS_CONNECTIONS = Counter(
+    "finagent_ws_connections_total", "WebSocket connections accepted")
+WS_ACTIVE = Gauge(
+    "finagent_ws_active_connections", "WebSocket connections currently open",
+    multiprocess_mode="livesum")
+TURNS = Counter(
+    "finagent_turns_total", "Agent turns finished", ["outcome"])
+STREAMED_CHUNKS = Counter(
+    "finagent_streamed_chunks_total", "Partial text events (token chunks) streamed to clients")
+STREAMED_CHARS = Counter(
+    "finagent_streamed_chars_total", "Characters of agent text streamed to clients")
+QUEUE_WAIT = Histogram(
+    "finagent_admission_queue_wait_seconds", "Time spent waiting for admission", ["queue"],
+    buckets=(0, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+QUEUE_DEPTH = Gauge(
+    "finagent_admission_queue_depth", "Requests waiting for admission", ["queue"],
+    multiprocess_mode="livesum")
+ADMISSION_REJECTED = Counter(
+    "finagent_admission_rejected_total", "Requests rejected by admission control", ["queue", "reason"])
+PROMPT_DEDUP = Counter(
+    "finagent_prompt_dedup_total", "Opening prompts by dedup outcome (lead, joined, cached, fallback)", ["outcome"])
+STREAM_RESUMES = Counter(
+    "finagent_stream_resumes_total", "Reconnects with a last_seq, by replay outcome", ["outcome"])
+TOOL_LATENCY = Histogram(
+    "finagent_tool_latency_seconds", "Tool call wall time", ["tool"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+TOOL_ERRORS = Counter(
+    "finagent_tool_errors_total", "Tool calls that failed", ["tool", "error"])
+
+
+def prepare_multiprocess_metrics():
+    """
+    Points PROMETHEUS_MULTIPROC_DIR at an empty directory for the worker
+    processes (which import prometheus_client after this runs). Keeps an
+    explicitly configured directory but clears stale files from it.
+    """
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+    else:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="finagent-metrics-")
+
+
+def mark_worker_exit():
+    """Drops this worker's live gauges from the aggregate. Called at shutdown."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Returns (body, content type) in the Prometheus text exposition format."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,40 @@
+#
+# threadpool.py
+#
+# Bounded thread pool for the synchronous tools (yfinance, polygon RESTClient).
+#
+# ADK calls plain functions directly on the event loop that also serves every
+# WebSocket in main.py, so a blocking tool would stall token streaming for all
+# users. `offloaded` turns a blocking tool into an async one that runs on this
+# pool instead.
+#
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = int(os.environ.get("FINAGENT_TOOL_THREADS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="finagent-tool")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs `func(*args, **kwargs)` on the tool thread pool and awaits the result."""
+    loop = asyncio.get_running_loop()
+    # Copy the caller's context so context variables stay visible in the thread.
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(_executor, call)
+
+
+def offloaded(func):
+    """
+    Wraps a blocking tool function in an async function with the same name,
+    signature and docstring, so ADK exposes it unchanged to the model.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,131 @@
+#
+# tool_output.py
+#
+# Compact, columnar serialization of tool results for the LLM.
+#
+# Tool results go straight into the model context, where indentation and
+# repeated keys cost prompt tokens on every sub-agent hop. Tools that opt in
+# return one JSON object with a header row and value rows instead of a list of
+# dicts:
+#
+#   {"columns":["ticker","price","change_percent"],
+#    "rows":[["AAPL",178.5,-0.45],["MSFT",402.1,1.2]]}
+#
+# Numeric columns are parsed ("4.12 TUSD" -> 4120000000000, "−0.45%" -> -0.45,
+# "—" -> null), and internal fields whose name starts with "_" are dropped.
+# Extra top-level fields (e.g. "as_of" or per-row "errors") can be passed as
+# keyword arguments.
+#
+# Usage:
+#   from finagent.tool_output import dumps_table
+#
+#   return dumps_table(stocks, numeric=("price", "change_percent"))
+#
+
+import json
+import math
+import re
+
+# Suffix multipliers used by TradingView and Yahoo (e.g. "45.6 M", "1.23T").
+_MULTIPLIERS = {"K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+# Optional sign, number, optional multiplier, then an optional currency code or
+# percent sign: "+1.23%", "4.12 TUSD", "$178.50", "1,234.5".
+_NUMBER = re.compile(r'^([+-]?)\$?([\d,]*\.?\d+)\s*([KMBT])?\s*(?:[A-Z]{3}|%)?$')
+
+# Placeholders meaning "no value".
+_EMPTY = {"", "\u2014", "\u2013", "-", "N/A", "n/a", "None"}
+
+
+def parse_number(value):
+    """
+    Parses a display string such as "−0.45%", "4.12 TUSD" or "45.6 M" into a
+    number. Placeholders ("—", "N/A", "") become None; anything else that is
+    not a number is returned unchanged.
+    """
+    if not isinstance(value, str):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value
+
+    # TradingView uses U+2212 for minus and narrow no-break spaces before units.
+    text = value.replace('\u2212', '-').replace('\u202f', ' ').replace('\xa0', ' ').strip()
+    if text in _EMPTY:
+        return None
+
+    match = _NUMBER.match(text)
+    if not match:
+        return value
+    sign, digits, suffix = match.groups()
+    number = float(digits.replace(',', ''))
+    if suffix:
+        number = round(number * _MULTIPLIERS[suffix])
+    if sign == '-':
+        number = -number
+    if isinstance(number, float) and number.is_integer() and '.' not in digits:
+        number = int(number)
+    return number
+
+
+def _clean(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        return round(value, 4)
+    return value
+
+
+def to_table(records: list[dict], columns: list[str] | None = None, numeric=()) -> dict:
+    """
+    Converts a list of dicts into {"columns": [...], "rows": [[...], ...]}.
+
+    Args:
+        records (list[dict]): The tool's rows.
+        columns (list[str] | None): Column order. Defaults to the keys of the
+                                    records in first-seen order, minus fields
+                                    starting with "_".
+        numeric (Iterable[str]): Columns whose string values are parsed with
+                                 parse_number.
+
+    Returns:
+        dict: The columnar table.
+    """
+    if columns is None:
+        columns = []
+        for record in records:
+            for key in record:
+                if not key.startswith('_') and key not in columns:
+                    columns.append(key)
+
+    numeric = set(numeric)
+    rows = []
+    for record in records:
+        row = []
+        for column in columns:
+            value = record.get(column)
+            if column in numeric:
+                value = parse_number(value)
+            row.append(_clean(value))
+        rows.append(row)
+    return {"columns": columns, "rows": rows}
+
+
+def dumps_table(records: list[dict], columns: list[str] | None = None, numeric=(), **extra) -> str:
+    """
+    Serializes `records` as a compact columnar JSON string (see to_table).
+    Keyword arguments with a value other than None are added as top-level fields.
+    """
+    table = to_table(records, columns=columns, numeric=numeric)
+    table.update((key, value) for key, value in extra.items() if value is not None)
+    return json.dumps(table, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def table_records(table) -> list[dict]:
+    """
+    Inverse of dumps_table: returns the rows of a columnar table (JSON string
+    or dict) as a list of dicts.
+    """
+    if isinstance(table, str):
+        table = json.loads(table)
+    columns = table["columns"]
+    return [dict(zip(columns, row)) for row in table["rows"]]
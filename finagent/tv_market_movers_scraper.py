@@ -6,16 +6,82 @@
 #
 # Requirements:
 # - requests: For making HTTP requests to the website.
-# - beautifulsoup4: For parsing the HTML content.
+# - httpx: For the async variant that shares a keep-alive connection pool.
+# - lxml: Fast streaming HTML parser (preferred).
+# - beautifulsoup4: Fallback HTML parser when lxml is not installed.
 #
 # You can install these with pip:
-# pip install requests beautifulsoup4
+# pip install requests "httpx[http2]" lxml beautifulsoup4
 #
 
-import requests
-from bs4 import BeautifulSoup
+import heapq
+import io
+import re
+import httpx
 import json
 
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+from finagent.cache import cached
+from finagent.lazy import lazy_import
+from finagent import http_client
+from finagent.tool_output import dumps_table, table_records
+from finagent.threadpool import run_blocking
+
+# Only needed by the BeautifulSoup fallback and the sync fetch; see lazy.py.
+bs4 = lazy_import("bs4")
+requests = lazy_import("requests")
+
+MARKET_MOVERS_URL = "https://www.tradingview.com/markets/stocks-usa/market-movers-large-cap/"
+
+# Number of stocks returned by the tool, ranked by market cap.
+TOP_N = 10
+
+# Output field -> header prefixes used to locate its column. More specific
+# prefixes come first ("rel volume" before "volume", "eps dil growth" before
+# "eps dil").
+COLUMN_HEADERS = [
+    ('market_cap', ('market cap', 'mkt cap')),
+    ('price', ('price',)),
+    ('change_percent', ('change %', 'chg %', 'change')),
+    ('rel_volume', ('rel volume', 'rel vol')),
+    ('volume', ('volume', 'vol')),
+    ('p_e_ratio', ('p/e',)),
+    ('eps_dil_growth_ttm_yoy', ('eps dil growth',)),
+    ('eps_dil_ttm', ('eps dil', 'eps')),
+    ('div_yield_percent_ttm', ('div yield',)),
+    ('sector', ('sector',)),
+    ('analyst_rating', ('analyst rating', 'rating')),
+]
+
+# Column positions of the page layout the scraper was written against, in
+# output order. Used when the table has no recognizable header row.
+LEGACY_COLUMNS = {
+    'market_cap': 1,
+    'price': 2,
+    'change_percent': 3,
+    'volume': 4,
+    'rel_volume': 5,
+    'p_e_ratio': 6,
+    'eps_dil_ttm': 7,
+    'eps_dil_growth_ttm_yoy': 8,
+    'div_yield_percent_ttm': 9,
+    'sector': 10,
+    'analyst_rating': 11,
+}
+
+# Columns that are sent to the model as numbers rather than display strings.
+NUMERIC_COLUMNS = (
+    'market_cap', 'price', 'change_percent', 'volume', 'rel_volume', 'p_e_ratio',
+    'eps_dil_ttm', 'eps_dil_growth_ttm_yoy', 'div_yield_percent_ttm',
+)
+
+# Trailing currency code on values such as '4.12 TUSD'.
+_CURRENCY_SUFFIX = re.compile(r'(?<=[\d.TBMK])\s*[A-Z]{3}$')
+
 def _parse_market_cap(market_cap_str: str) -> float:
     """
     Helper function to parse market cap strings (e.g., '1.23T', '45.67B', '123.45M')
@@ -24,7 +90,7 @@ def _parse_market_cap(market_cap_str: str) -> float:
     if not market_cap_str:
         return 0.0
 
-    market_cap_str = market_cap_str.replace('$', '').strip()
+    market_cap_str = _CURRENCY_SUFFIX.sub('', market_cap_str.replace('$', '').strip()).strip()
     multiplier = 1.0
     if market_cap_str.endswith('T'):
         multiplier = 1_000_000_000_000.0
@@ -44,7 +110,215 @@ def _parse_market_cap(market_cap_str: str) -> float:
     except ValueError:
         return 0.0
 
-def scrape_tradingview_market_movers(url: str = "https://www.tradingview.com/markets/stocks-usa/market-movers-large-cap/") -> str:
+def _map_columns(header_texts: list[str]) -> dict:
+    """
+    Maps output fields to column indices by header name.
+
+    Returns:
+        dict: field -> column index. Falls back to LEGACY_COLUMNS when the
+              market cap column cannot be located.
+    """
+    columns = {}
+    for index, text in enumerate(header_texts):
+        text = ' '.join(text.lower().split())
+        for field, prefixes in COLUMN_HEADERS:
+            if field not in columns and text.startswith(prefixes):
+                columns[field] = index
+                break
+    if 'market_cap' not in columns:
+        return dict(LEGACY_COLUMNS)
+    return columns
+
+
+def _cell_text(cell, separator: str = '') -> str:
+    """lxml equivalent of BeautifulSoup's get_text(separator, strip=True)."""
+    return separator.join(part.strip() for part in cell.itertext() if part.strip())
+
+
+def _parse_market_movers_lxml(html: str, top_n: int = TOP_N) -> str:
+    """
+    Streams the market movers table with lxml and keeps only the top rows.
+
+    Rows are read one at a time and released as soon as they are processed.
+    Only the market cap cell is read for every row; the remaining cells are
+    extracted only for rows that enter the top-N heap.
+    """
+    rows = etree.iterparse(
+        io.BytesIO(html.encode('utf-8')),
+        events=('end',),
+        tag=('tr', 'table'),
+        html=True,
+        recover=True,
+    )
+
+    columns = None
+    found_table = False
+    heap = []  # (parsed market cap, -row index, stock_info), smallest first
+    row_index = 0
+    for _, elem in rows:
+        if elem.tag == 'table':
+            found_table = True
+            if heap:
+                break  # Only the first table with stock rows is used.
+            continue
+
+        cells = elem.findall('td')
+        if not cells:
+            header_cells = elem.findall('th')
+            if header_cells and columns is None:
+                columns = _map_columns([_cell_text(th, ' ') for th in header_cells])
+        else:
+            if columns is None:
+                columns = dict(LEGACY_COLUMNS)
+            # Rows too short for the mapped columns (e.g. ads) are skipped.
+            if max(columns.values()) < len(cells):
+                market_cap = _cell_text(cells[columns['market_cap']])
+                key = (_parse_market_cap(market_cap), -row_index)
+                row_index += 1
+                if len(heap) < top_n or key > heap[0][:2]:
+                    item = (*key, _extract_stock_info(cells, columns))
+                    if len(heap) < top_n:
+                        heapq.heappush(heap, item)
+                    else:
+                        heapq.heapreplace(heap, item)
+
+        # Release the row and any already processed siblings.
+        elem.clear(keep_tail=True)
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+    if not heap:
+        if not found_table:
+            return "Error: Could not find any table on the page."
+        return "Error: Could not find any stock data rows."
+
+    top_market_movers = [stock_info for *_, stock_info in heapq.nlargest(top_n, heap)]
+    return _serialize(top_market_movers)
+
+
+def _serialize(stocks: list[dict]) -> str:
+    """Compact columnar output; see tool_output.py."""
+    return dumps_table(stocks, columns=['ticker', 'name', *LEGACY_COLUMNS], numeric=NUMERIC_COLUMNS)
+
+
+def _extract_stock_info(cells, columns: dict) -> dict:
+    # The first cell contains both the ticker and the name.
+    parts = _cell_text(cells[0], ' ').split(' ', 1)
+    stock_info = {
+        'ticker': parts[0] if parts else '',
+        'name': parts[1] if len(parts) > 1 else '',
+    }
+    for field in LEGACY_COLUMNS:
+        index = columns.get(field)
+        stock_info[field] = _cell_text(cells[index]) if index is not None else ''
+    stock_info['_parsed_market_cap'] = _parse_market_cap(stock_info['market_cap'])
+    return stock_info
+
+
+def _parse_market_movers(html: str) -> str:
+    """
+    Parses the TradingView market movers page into the tool's JSON output.
+
+    Uses the streaming lxml engine when lxml is installed and BeautifulSoup
+    otherwise.
+
+    Args:
+        html (str): The HTML content of the market movers page.
+
+    Returns:
+        str: A compact JSON table ({"columns": [...], "rows": [[...]]}) with the
+             top 10 stocks by market cap, or an error message as a string if
+             the expected table is missing.
+    """
+    if etree is not None:
+        return _parse_market_movers_lxml(html)
+    return _parse_market_movers_bs4(html)
+
+
+def _parse_market_movers_bs4(html: str) -> str:
+    """
+    Parses the TradingView market movers page into the tool's JSON output.
+
+    Args:
+        html (str): The HTML content of the market movers page.
+
+    Returns:
+        str: A compact JSON table ({"columns": [...], "rows": [[...]]}) with the
+             top 10 stocks by market cap, or an error message as a string if
+             the expected table is missing.
+    """
+    # Parse the HTML content using BeautifulSoup.
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+
+    # Find the table containing the market data.
+    # The data is typically within a div with a specific data-tv-dataset-id,
+    # but the table structure is more reliable for direct scraping.
+    # We look for a table with a data-tv-entity-col-grouping="true" attribute.
+    # If that fails, we'll try a more general approach.
+    data_table = soup.find('table')
+
+    if not data_table:
+        return "Error: Could not find any table on the page."
+
+    # Find all table rows (tr) within the table body (tbody).
+    rows = data_table.find('tbody')
+
+    if not rows:
+        return "Error: Could not find tbody in the table."
+
+    rows = rows.find_all('tr')
+
+    if not rows:
+        return "Error: Could not find any stock data rows."
+
+    # Locate the columns by header name; without a header row the legacy
+    # positions apply.
+    header_cells = data_table.find_all('th')
+    if header_cells:
+        columns = _map_columns([th.get_text(separator=' ', strip=True) for th in header_cells])
+    else:
+        columns = dict(LEGACY_COLUMNS)
+    min_cells = max(columns.values()) + 1
+
+    stock_data = []
+    # Iterate over each row to extract the stock information.
+    for row in rows:
+        # Find all table data cells (td) in the current row.
+        cells = row.find_all('td')
+
+        # Ensure the row has every mapped column to avoid errors.
+        if len(cells) < min_cells:
+            continue
+
+        # Extract the data from each cell.
+        # The first cell contains both the ticker and the name.
+        symbol_cell_content = cells[0].get_text(separator=' ', strip=True)
+        # Attempt to split the ticker and name. Ticker is usually the first word.
+        parts = symbol_cell_content.split(' ', 1)
+
+        # Create a dictionary for the stock's data.
+        stock_info = {
+            'ticker': parts[0] if parts else '',
+            'name': parts[1] if len(parts) > 1 else '',
+        }
+        for field in LEGACY_COLUMNS:
+            index = columns.get(field)
+            stock_info[field] = cells[index].get_text(strip=True) if index is not None else ''
+        # Add parsed market cap for sorting
+        stock_info['_parsed_market_cap'] = _parse_market_cap(stock_info['market_cap'])
+        stock_data.append(stock_info)
+
+    # Sort the stock_data by market_cap in descending order and take the top 10.
+    stock_data_sorted = sorted(stock_data, key=lambda x: x.get('_parsed_market_cap', 0.0), reverse=True)
+    top_10_market_movers = stock_data_sorted[:10]
+
+    # Convert the list of dictionaries to a compact columnar JSON string.
+    # This is a good format for an agent to consume.
+    return _serialize(top_10_market_movers)
+
+
+@cached("market_movers")
+def scrape_tradingview_market_movers(url: str = MARKET_MOVERS_URL) -> str:
     """
     Scrapes the top 100 large-cap stocks from TradingView's market movers page.
 
@@ -57,9 +331,10 @@ def scrape_tradingview_market_movers(url: str = "https://www.tradingview.com/mar
                    Defaults to the large-cap market movers page.
 
     Returns:
-        str: A JSON formatted string containing a list of dictionaries. Each dictionary
-             represents a stock and its key metrics. Returns an error message as a string
-             if the scraping process fails.
+        str: A compact JSON table {"columns": [...], "rows": [[...]]}. Each row
+             represents a stock and its key metrics, with numbers already parsed
+             (market cap and volume in units, percentages as numbers). Returns an
+             error message as a string if the scraping process fails.
     """
     try:
         # Use a User-Agent header to mimic a web browser and avoid being blocked.
@@ -71,88 +346,41 @@ def scrape_tradingview_market_movers(url: str = "https://www.tradingview.com/mar
         # Raise an exception for bad status codes (4xx or 5xx).
         response.raise_for_status()
 
-        # Parse the HTML content using BeautifulSoup.
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return _parse_market_movers(response.text)
+
+    except requests.exceptions.RequestException as e:
+        # Handle network-related errors gracefully.
+        return f"Error during web request: {e}"
+    except Exception as e:
+        # Handle any other unexpected errors.
+        return f"An unexpected error occurred: {e}"
 
-        # Find the table containing the market data.
-        # The data is typically within a div with a specific data-tv-dataset-id,
-        # but the table structure is more reliable for direct scraping.
-        # We look for a table with a data-tv-entity-col-grouping="true" attribute.
-        # If that fails, we'll try a more general approach.
-        data_table = soup.find('table')
 
-        if not data_table:
-            return "Error: Could not find any table on the page."
+@cached("market_movers", name="scrape_tradingview_market_movers")
+async def scrape_tradingview_market_movers_async(url: str = MARKET_MOVERS_URL) -> str:
+    """
+    Scrapes the top 100 large-cap stocks from TradingView's market movers page.
 
-        # Find all table rows (tr) within the table body (tbody).
-        rows = data_table.find('tbody')
-
-        if not rows:
-            return "Error: Could not find tbody in the table."
-
-        rows = rows.find_all('tr')
-
-        if not rows:
-            return "Error: Could not find any stock data rows."
-
-        stock_data = []
-        # Iterate over each row to extract the stock information.
-        for row in rows:
-            # Find all table data cells (td) in the current row.
-            cells = row.find_all('td')
-            
-            # Ensure the row has the expected number of cells to avoid errors.
-            if len(cells) < 12:
-                continue
-
-            # Extract the data from each cell.
-            # The first cell contains both the ticker and the name.
-            symbol_cell_content = cells[0].get_text(separator=' ', strip=True)
-            # Attempt to split the ticker and name. Ticker is usually the first word.
-            parts = symbol_cell_content.split(' ', 1)
-            ticker = parts[0] if parts else ''
-            name = parts[1] if len(parts) > 1 else ''
-
-            market_cap = cells[1].get_text(strip=True)
-            price = cells[2].get_text(strip=True)
-            change_percent = cells[3].get_text(strip=True)
-            volume = cells[4].get_text(strip=True)
-            rel_volume = cells[5].get_text(strip=True)
-            p_e_ratio = cells[6].get_text(strip=True)
-            eps_dil_ttm = cells[7].get_text(strip=True)
-            eps_dil_growth_ttm_yoy = cells[8].get_text(strip=True)
-            div_yield_percent_ttm = cells[9].get_text(strip=True)
-            sector = cells[10].get_text(strip=True)
-            analyst_rating = cells[11].get_text(strip=True)
-
-            # Create a dictionary for the stock's data.
-            stock_info = {
-                'ticker': ticker,
-                'name': name,
-                'market_cap': market_cap,
-                'price': price,
-                'change_percent': change_percent,
-                'volume': volume,
-                'rel_volume': rel_volume,
-                'p_e_ratio': p_e_ratio,
-                'eps_dil_ttm': eps_dil_ttm,
-                'eps_dil_growth_ttm_yoy': eps_dil_growth_ttm_yoy,
-                'div_yield_percent_ttm': div_yield_percent_ttm,
-                'sector': sector,
-                'analyst_rating': analyst_rating,
-                '_parsed_market_cap': _parse_market_cap(market_cap) # Add parsed market cap for sorting
-            }
-            stock_data.append(stock_info)
-
-        # Sort the stock_data by market_cap in descending order and take the top 10.
-        stock_data_sorted = sorted(stock_data, key=lambda x: x.get('_parsed_market_cap', 0.0), reverse=True)
-        top_10_market_movers = stock_data_sorted[:10]
-
-        # Convert the list of dictionaries to a JSON formatted string.
-        # This is a good format for an agent to consume.
-        return json.dumps(top_10_market_movers, indent=4)
+    Async variant of scrape_tradingview_market_movers for use on the server's
+    event loop: the page is fetched through the shared keep-alive connection
+    pool and parsed on the tool thread pool, so a slow TradingView response
+    does not block other sessions.
 
-    except requests.exceptions.RequestException as e:
+    Args:
+        url (str): The URL of the TradingView market movers page.
+                   Defaults to the large-cap market movers page.
+
+    Returns:
+        str: A compact JSON table {"columns": [...], "rows": [[...]]}. Each row
+             represents a stock and its key metrics, with numbers already parsed
+             (market cap and volume in units, percentages as numbers). Returns an
+             error message as a string if the scraping process fails.
+    """
+    try:
+        html = await http_client.fetch_text(url)
+        return await run_blocking(_parse_market_movers, html)
+
+    except httpx.HTTPError as e:
         # Handle network-related errors gracefully.
         return f"Error during web request: {e}"
     except Exception as e:
@@ -169,7 +397,7 @@ if __name__ == "__main__":
         print(scraped_data)
     else:
         # For demonstration, we'll parse and print the top 10 results.
-        data_list = json.loads(scraped_data)
+        data_list = table_records(scraped_data)
         print("Successfully scraped data for", len(data_list), "stocks.")
         print("\nTop 10 stocks:")
         print(json.dumps(data_list, indent=4))
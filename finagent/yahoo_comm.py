@@ -1,36 +1,85 @@
-import yfinance as yf
+import os
 import json
+import logging
 
-def fetch_commodity_data(commodity_names: list[str]):
+from finagent.cache import cached
+from finagent.http_client import count_yfinance_bytes
+from finagent.lazy import lazy_import
+from finagent.tool_output import dumps_table
+from finagent.yahoo_quotes import add_change, history_field, last_two_closes
+
+logger = logging.getLogger(__name__)
+
+pd = lazy_import("pandas")
+yf = lazy_import("yfinance", on_load=count_yfinance_bytes)
+
+TARGET_COMMODITIES = {
+    "gold": "GC=F",
+    "silver": "SI=F",
+    "copper": "HG=F",
+    "natural gas": "NG=F",
+    "brent crude": "BZ=F",
+    "crude oil": "CL=F"
+}
+
+# Set FINAGENT_COMMODITY_BATCH=0 to fall back to one Ticker().info call per commodity.
+BATCHED = os.environ.get("FINAGENT_COMMODITY_BATCH", "1") != "0"
+
+
+def _batch_quotes(tickers: list[str]) -> "pd.DataFrame":
     """
-    Fetches commodity data using the yfinance library.
+    Downloads recent daily closes for all tickers in a single request and computes
+    price, change and change_percent for the whole batch at once.
 
-    Args:
-        commodity_names (list[str]): A list of commodity names to fetch data for.
-                                     The function will map these names to their
-                                     Yahoo Finance ticker symbols internally.
     Returns:
-        dict: A dictionary containing the scraped data for each commodity,
-              or an error message if the request fails.
+        pd.DataFrame: Indexed by ticker with columns price, previous_close, change
+                      and change_percent. Tickers without data are missing
+                      from the index.
     """
-    TARGET_COMMODITIES = {
-        "gold": "GC=F",
-        "silver": "SI=F",
-        "copper": "HG=F",
-        "natural gas": "NG=F",
-        "brent crude": "BZ=F",
-        "crude oil": "CL=F"
-    }
-    commodity_data = {}
-    print("Fetching data using yfinance...")
+    history = yf.download(
+        tickers,
+        period="5d",
+        interval="1d",
+        progress=False,
+        auto_adjust=False,
+        threads=False,
+    )
+    if history is None or history.empty:
+        return pd.DataFrame(columns=["price", "previous_close", "change", "change_percent"])
 
-    for name in commodity_names:
-        ticker = TARGET_COMMODITIES.get(name.lower())
-        if not ticker:
-            commodity_data[name] = {"error": f"Unknown commodity name: '{name}'."}
-            print(f"  - WARNING: {commodity_data[name]['error']}")
+    closes = history_field(history, "Close", tickers)
+    price, previous_close = last_two_closes(closes)
+    return add_change(pd.DataFrame({"price": price, "previous_close": previous_close}))
+
+
+def _fetch_batched(tickers_by_name: dict[str, str], commodity_data: dict):
+    try:
+        quotes = _batch_quotes(sorted(set(tickers_by_name.values())))
+    except Exception as e:
+        for name, ticker in tickers_by_name.items():
+            commodity_data[name] = {"error": f"Failed to fetch data for {name} ({ticker}): {e}"}
+            logger.error(commodity_data[name]['error'])
+        return
+
+    for name, ticker in tickers_by_name.items():
+        if ticker not in quotes.index or pd.isna(quotes.at[ticker, "price"]):
+            commodity_data[name] = {"error": f"Could not retrieve data for commodity '{name}' with ticker '{ticker}'."}
+            logger.warning(commodity_data[name]['error'])
             continue
 
+        row = quotes.loc[ticker]
+        commodity_data[name] = {
+            'name': name,
+            'symbol': ticker,
+            'price': round(float(row["price"]), 4),
+            'change': "N/A" if pd.isna(row["change"]) else round(float(row["change"]), 4),
+            'change_percent': "N/A" if pd.isna(row["change_percent"]) else round(float(row["change_percent"]), 4),
+        }
+        logger.debug("Found data for %s", name)
+
+
+def _fetch_per_ticker(tickers_by_name: dict[str, str], commodity_data: dict):
+    for name, ticker in tickers_by_name.items():
         try:
             ticker_data = yf.Ticker(ticker)
             info = ticker_data.info
@@ -43,15 +92,68 @@ def fetch_commodity_data(commodity_names: list[str]):
                 data_entry['change'] = info.get("regularMarketChange", "N/A")
                 data_entry['change_percent'] = info.get("regularMarketChangePercent", "N/A")
                 commodity_data[name] = data_entry
-                print(f"  - Found data for {name}")
+                logger.debug("Found data for %s", name)
             else:
                 commodity_data[name] = {"error": f"Could not retrieve data for commodity '{name}' with ticker '{ticker}'."}
-                print(f"  - WARNING: {commodity_data[name]['error']}")
+                logger.warning(commodity_data[name]['error'])
         except Exception as e:
             commodity_data[name] = {"error": f"Failed to fetch data for {name} ({ticker}): {e}"}
-            print(f"  - ERROR: {commodity_data[name]['error']}")
+            logger.error(commodity_data[name]['error'])
+
+
+@cached("commodities")
+def fetch_commodity_data(commodity_names: list[str]):
+    """
+    Fetches commodity data using the yfinance library.
+
+    Args:
+        commodity_names (list[str]): A list of commodity names to fetch data for.
+                                     The function will map these names to their
+                                     Yahoo Finance ticker symbols internally.
+    Returns:
+        str: A compact JSON table {"columns": [...], "rows": [[...]]} with one row
+             per commodity (name, symbol, price, change, change_percent). Names that
+             could not be fetched are listed under "errors" with the reason.
+    """
+    commodity_data = {}
+    logger.debug("Fetching data using yfinance...")
+
+    tickers_by_name = {}
+    for name in commodity_names:
+        ticker = TARGET_COMMODITIES.get(name.lower())
+        if not ticker:
+            commodity_data[name] = {"error": f"Unknown commodity name: '{name}'."}
+            logger.warning(commodity_data[name]['error'])
+            continue
+        tickers_by_name[name] = ticker
+
+    if tickers_by_name:
+        if BATCHED:
+            _fetch_batched(tickers_by_name, commodity_data)
+        else:
+            _fetch_per_ticker(tickers_by_name, commodity_data)
+
+    # Keep the caller's ordering of names.
+    rows = []
+    errors = {}
+    for name in commodity_names:
+        entry = commodity_data.get(name)
+        if entry is None:
+            continue
+        if "error" in entry:
+            errors[name] = entry["error"]
+        else:
+            rows.append(entry)
 
-    return commodity_data
+    if not rows:
+        # Returned as an error string so it is not cached.
+        return f"Error: Could not fetch any commodity data: {json.dumps(errors)}"
+    return dumps_table(
+        rows,
+        columns=["name", "symbol", "price", "change", "change_percent"],
+        numeric=("price", "change", "change_percent"),
+        errors=errors or None,
+    )
 
 if __name__ == "__main__":
     # URL for Yahoo Finance's commodities page
@@ -73,9 +175,8 @@ if __name__ == "__main__":
     scraped_info = fetch_commodity_data(["gold", "silver", "copper", "natural gas", "brent crude", "crude oil"])
 
     print("\n--- Scraped Commodity Futures Data ---")
-    if "error" in scraped_info:
-        print(json.dumps({"error": scraped_info["error"]}))
-    else:
-        # Convert the dictionary of dictionaries to a list of dictionaries
-        output_list = [data for data in scraped_info.values()]
-        print(json.dumps(output_list, indent=2))
+    try:
+        print(json.dumps(json.loads(scraped_info), indent=2))
+    except ValueError:
+        # Failures come back as "Error: ..." strings
+        print(scraped_info)
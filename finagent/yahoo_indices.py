@@ -0,0 +1,110 @@
+import json
+import logging
+
+from finagent.cache import cached
+from finagent.tool_output import dumps_table
+from finagent.yahoo_quotes import add_change, fetch_quotes, format_market_time, frame_records
+
+logger = logging.getLogger(__name__)
+
+# Region -> {Yahoo symbol: display name}, in the order the brief shows them.
+WORLD_INDICES = {
+    "Americas": {
+        "^BVSP": "IBOVESPA",
+        "^RUT": "Russell 2000",
+        "^GSPTSE": "S&P/TSX Composite",
+        "^IXIC": "Nasdaq Composite",
+        "^GSPC": "S&P 500",
+        "^DJI": "Dow 30",
+        "DX-Y.NYB": "US Dollar Index",
+        "^VIX": "VIX",
+    },
+    "Europe": {
+        "^125904-USD-STRD": "MSCI Europe",
+        "^FTSE": "FTSE 100",
+        "^FCHI": "CAC 40",
+        "^GDAXI": "DAX",
+        "^STOXX50E": "EURO STOXX 50",
+        "^XDE": "Euro Currency Index",
+        "^XDB": "British Pound Index",
+    },
+    "Asia": {
+        "^HSI": "Hang Seng",
+        "000001.SS": "SSE Composite (Shanghai)",
+        "^N225": "Nikkei 225",
+        "^AXJO": "S&P/ASX 200",
+        "^BSESN": "S&P BSE Sensex",
+        "^KS11": "KOSPI Composite",
+        "^XDN": "Japanese Yen Index",
+        "^XDA": "Australian Dollar Index",
+    },
+}
+
+OUTPUT_COLUMNS = ["region", "symbol", "name", "price", "change", "change_percent", "market_time"]
+NUMERIC_COLUMNS = ("price", "change", "change_percent")
+
+
+@cached("world_indices")
+def scrape_world_indices() -> str:
+    """
+    Fetches the world indices and currency indices of the morning brief
+    (Americas, Europe, Asia) from Yahoo Finance in one bulk request.
+
+    Returns:
+        str: A compact JSON table {"columns": [...], "rows": [[...]]} with one row
+             per index (region, symbol, name, price, change, change_percent,
+             market_time), grouped by region. Symbols that could not be fetched
+             are listed per region under "missing"; a region with no data at all
+             is listed under "unavailable_regions".
+    """
+    regions = {
+        symbol: region
+        for region, indices in WORLD_INDICES.items()
+        for symbol in indices
+    }
+    names = {symbol: name for indices in WORLD_INDICES.values() for symbol, name in indices.items()}
+
+    try:
+        quotes = fetch_quotes(list(regions))
+    except Exception as e:
+        logger.error("Failed to fetch world indices: %s", e)
+        return f"Error: Failed to fetch world indices: {e}"
+
+    # One frame in display order; the change is computed for the whole batch.
+    quotes = add_change(quotes.reindex(list(regions)))
+    quotes["region"] = quotes.index.map(regions)
+    quotes["name"] = quotes.index.map(names)
+    quotes["market_time"] = quotes["market_time"].map(format_market_time)
+
+    found = quotes["price"].notna()
+    if not found.any():
+        # Returned as an error string so it is not cached.
+        return "Error: Could not fetch any world index data."
+
+    missing = {}
+    unavailable = []
+    for region, indices in WORLD_INDICES.items():
+        region_missing = [symbol for symbol in indices if not found[symbol]]
+        if len(region_missing) == len(indices):
+            unavailable.append(region)
+        elif region_missing:
+            missing[region] = region_missing
+    if missing or unavailable:
+        logger.warning("World indices incomplete: missing %s, unavailable %s", missing, unavailable)
+
+    return dumps_table(
+        frame_records(quotes[found]),
+        columns=OUTPUT_COLUMNS,
+        numeric=NUMERIC_COLUMNS,
+        missing=missing or None,
+        unavailable_regions=unavailable or None,
+    )
+
+
+if __name__ == "__main__":
+    result = scrape_world_indices()
+    try:
+        print(json.dumps(json.loads(result), indent=2))
+    except ValueError:
+        # Failures come back as "Error: ..." strings
+        print(result)
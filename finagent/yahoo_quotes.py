@@ -0,0 +1,171 @@
+#
+# yahoo_quotes.py
+#
+# Bulk Yahoo Finance quotes shared by the price tools.
+#
+# One request to Yahoo's v7 quote endpoint returns price, previous close, P/E,
+# market cap and the 52-week range for up to QUOTE_CHUNK_SIZE symbols, so a
+# tool call costs one request per chunk instead of a Ticker().info call (two
+# requests) per symbol. The request goes through yfinance's own session, which
+# takes care of Yahoo's cookie and crumb. If the quote endpoint fails, the same
+# columns are derived from a single yf.download() of one year of daily bars;
+# P/E and market cap are then missing.
+#
+# Usage:
+#   from finagent.yahoo_quotes import fetch_quotes
+#
+#   quotes = fetch_quotes(["AAPL", "MSFT"])  # DataFrame indexed by symbol
+#
+
+import datetime
+import logging
+import os
+
+from finagent.http_client import count_yfinance_bytes
+from finagent.lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+pd = lazy_import("pandas")
+yf = lazy_import("yfinance", on_load=count_yfinance_bytes)
+
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+
+# Symbols per quote request.
+QUOTE_CHUNK_SIZE = int(os.environ.get("FINAGENT_QUOTE_CHUNK_SIZE", "200"))
+
+# Yahoo quote field -> column name.
+QUOTE_FIELDS = {
+    "shortName": "name",
+    "currency": "currency",
+    "regularMarketPrice": "price",
+    "regularMarketPreviousClose": "previous_close",
+    "trailingPE": "pe_ratio",
+    "epsTrailingTwelveMonths": "eps",
+    "marketCap": "market_cap",
+    "fiftyTwoWeekLow": "week52_low",
+    "fiftyTwoWeekHigh": "week52_high",
+    "regularMarketTime": "market_time",
+}
+COLUMNS = list(QUOTE_FIELDS.values())
+NUMERIC_COLUMNS = [c for c in COLUMNS if c not in ("name", "currency")]
+
+
+def _quote_endpoint(symbols: list[str]) -> "pd.DataFrame":
+    """Fetches `symbols` from the v7 quote endpoint, one request per chunk."""
+    # YfData is yfinance's internal (cookie/crumb aware) session. Reached
+    # through `yf` so the byte counting hook is installed first.
+    data = yf.data.YfData()
+    results = []
+    for start in range(0, len(symbols), QUOTE_CHUNK_SIZE):
+        chunk = symbols[start:start + QUOTE_CHUNK_SIZE]
+        response = data.get_raw_json(
+            QUOTE_URL,
+            params={"symbols": ",".join(chunk), "formatted": "false"},
+        )
+        results.extend((response.get("quoteResponse") or {}).get("result") or [])
+
+    quotes = pd.DataFrame.from_records(results)
+    if quotes.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    quotes = quotes.set_index("symbol").reindex(columns=list(QUOTE_FIELDS)).rename(columns=QUOTE_FIELDS)
+    quotes[NUMERIC_COLUMNS] = quotes[NUMERIC_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    return quotes[~quotes.index.duplicated()]
+
+
+def history_field(history: "pd.DataFrame", name: str, symbols: list[str]) -> "pd.DataFrame":
+    """One field ("Close", "Low", ...) of a yf.download() frame, one column per symbol."""
+    frame = history[name]
+    if isinstance(frame, pd.Series):
+        # Older yfinance versions return flat columns for a single symbol.
+        frame = frame.to_frame(name=symbols[0])
+    return frame
+
+
+def last_two_closes(closes: "pd.DataFrame") -> tuple["pd.Series", "pd.Series"]:
+    """
+    The last close and the close before it per symbol, from daily closes with
+    one column per symbol.
+
+    Markets on different calendars (and futures sessions) leave NaN gaps, so
+    the valid closes are counted per symbol rather than taking the last rows.
+
+    Returns:
+        tuple: (price, previous_close) Series indexed by symbol
+    """
+    valid = closes.notna()
+    valid_count = valid.cumsum()
+    is_previous = valid & valid_count.eq(valid_count.iloc[-1] - 1, axis="columns")
+    return closes.ffill().iloc[-1], closes.where(is_previous).max()
+
+
+def add_change(quotes: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Sets the change and change_percent columns of a quotes frame from its price
+    and previous_close columns, for the whole batch at once. A missing or
+    non-positive previous close gives NaN.
+    """
+    previous_close = quotes["previous_close"].where(quotes["previous_close"] > 0)
+    quotes["change"] = quotes["price"] - previous_close
+    quotes["change_percent"] = quotes["change"] / previous_close * 100
+    return quotes
+
+
+def _history_quotes(symbols: list[str]) -> "pd.DataFrame":
+    """Derives price, previous close and 52-week range from one year of daily bars."""
+    history = yf.download(
+        symbols,
+        period="1y",
+        interval="1d",
+        progress=False,
+        auto_adjust=False,
+        threads=False,
+    )
+    if history is None or history.empty:
+        return pd.DataFrame(columns=COLUMNS)
+
+    closes = history_field(history, "Close", symbols)
+    price, previous_close = last_two_closes(closes)
+
+    quotes = pd.DataFrame({
+        "price": price,
+        "previous_close": previous_close,
+        "week52_low": history_field(history, "Low", symbols).min(),
+        "week52_high": history_field(history, "High", symbols).max(),
+        "market_time": closes.notna().iloc[::-1].idxmax().map(lambda day: day.timestamp()),
+    })
+    quotes = quotes.reindex(columns=COLUMNS)
+    return quotes[quotes["price"].notna()]
+
+
+def fetch_quotes(symbols: list[str]) -> "pd.DataFrame":
+    """
+    Fetches quotes for all `symbols` in bulk.
+
+    Args:
+        symbols (list[str]): Yahoo Finance symbols, e.g. ["AAPL", "^GSPC"]
+
+    Returns:
+        pd.DataFrame: Indexed by symbol with the COLUMNS columns. Symbols without
+                      data are missing from the index.
+    """
+    if not symbols:
+        return pd.DataFrame(columns=COLUMNS)
+    try:
+        return _quote_endpoint(symbols)
+    except Exception as e:
+        logger.warning("Yahoo quote endpoint failed (%s), falling back to daily history", e)
+    return _history_quotes(symbols)
+
+
+def format_market_time(seconds) -> str | None:
+    """Quote time (epoch seconds) as "YYYY-MM-DD HH:MM UTC"."""
+    if seconds is None or pd.isna(seconds):
+        return None
+    return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+
+def frame_records(frame: "pd.DataFrame", index_name: str = "symbol") -> list[dict]:
+    """Turns a quotes frame into a list of dicts with NaN as None."""
+    frame = frame.rename_axis(index_name).reset_index()
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
@@ -0,0 +1,104 @@
+import json
+import logging
+import re
+
+from finagent.cache import cached
+from finagent.lazy import lazy_import
+from finagent.tool_output import dumps_table
+from finagent.yahoo_quotes import add_change, fetch_quotes, format_market_time, frame_records
+
+logger = logging.getLogger(__name__)
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+OUTPUT_COLUMNS = [
+    "symbol", "name", "currency", "price", "change", "change_percent", "pe_ratio",
+    "market_cap", "week52_low", "week52_high", "week52_position", "from_week52_high_percent",
+    "market_time",
+]
+NUMERIC_COLUMNS = OUTPUT_COLUMNS[3:-1]
+
+
+def _parse_tickers(tickers) -> list[str]:
+    """Accepts a list of tickers (or a "AAPL, MSFT" string) and returns unique upper-case symbols."""
+    if isinstance(tickers, str):
+        tickers = re.split(r"[\s,;]+", tickers)
+    symbols = []
+    for ticker in tickers or []:
+        symbol = str(ticker).strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+
+def derive_fields(quotes: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Computes the derived columns for the whole batch at once: change and change
+    percent against the previous close, P/E from EPS where Yahoo has none, and
+    where the price sits in its 52-week range.
+    """
+    quotes = add_change(quotes.copy())
+    price = quotes["price"]
+
+    eps = quotes["eps"].where(quotes["eps"] > 0)
+    quotes["pe_ratio"] = quotes["pe_ratio"].fillna(price / eps)
+
+    low, high = quotes["week52_low"], quotes["week52_high"]
+    span = (high - low).where(high > low)
+    quotes["week52_position"] = np.clip((price - low) / span * 100, 0, 100)
+    quotes["from_week52_high_percent"] = (price / high.where(high > 0) - 1) * 100
+    return quotes
+
+
+@cached("stock_prices")
+def get_stock_price(tickers: list[str]) -> str:
+    """
+    Gets the current price, P/E ratio, market cap and 52-week range for stocks.
+
+    All tickers are fetched in one bulk request.
+
+    Args:
+        tickers (list[str]): Ticker symbols, e.g. ["AAPL", "MSFT"]
+
+    Returns:
+        str: A compact JSON table {"columns": [...], "rows": [[...]]} with one row
+             per ticker (symbol, name, currency, price, change, change_percent,
+             pe_ratio, market_cap, week52_low, week52_high, week52_position as
+             0-100% of the range, from_week52_high_percent, market_time of the
+             quote). Tickers without data are listed under "errors".
+    """
+    symbols = _parse_tickers(tickers)
+    if not symbols:
+        return "Error: No ticker symbols given."
+
+    try:
+        quotes = fetch_quotes(symbols)
+    except Exception as e:
+        logger.error("Failed to fetch stock prices for %s: %s", symbols, e)
+        return f"Error: Failed to fetch stock prices for {', '.join(symbols)}: {e}"
+
+    # Keep the caller's ordering of tickers.
+    quotes = derive_fields(quotes.reindex(symbols))
+    quotes["market_time"] = quotes["market_time"].map(format_market_time)
+    found = quotes["price"].notna()
+    errors = {symbol: "No quote data found for this ticker." for symbol in quotes.index[~found]}
+    if not found.any():
+        # Returned as an error string so it is not cached.
+        return f"Error: Could not fetch any stock prices: {json.dumps(errors)}"
+
+    return dumps_table(
+        frame_records(quotes[found]),
+        columns=OUTPUT_COLUMNS,
+        numeric=NUMERIC_COLUMNS,
+        errors=errors or None,
+    )
+
+
+if __name__ == "__main__":
+    result = get_stock_price(["AAPL", "MSFT", "NVDA"])
+    try:
+        print(json.dumps(json.loads(result), indent=2))
+    except ValueError:
+        # Failures come back as "Error: ..." strings
+        print(result)
@@ -1,70 +1,158 @@
 import os
-import json
 import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
+# Load environment variables before the app modules read their settings
+load_dotenv()
+
 from google.genai.types import Part, Content
-from google.adk.runners import InMemoryRunner
+from google.adk.runners import Runner
 from google.adk.agents import LiveRequestQueue
 from google.adk.agents.run_config import RunConfig
-from google.adk.sessions.in_memory_session_service import InMemorySessionService
 
-from fastapi import FastAPI, WebSocket
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, Response
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response
 
-from finagent.agent import root_agent
+from finagent.brief_modes import BRIEF_MODES, DEFAULT_BRIEF_MODE
+from finagent import brief_timing, history, http_client, telemetry, instrumentation
+from finagent.cache import cache_stats
+from streaming.assets import AssetStore
+from streaming.outbound import SlowConsumerError, CLOSE_TRY_AGAIN_LATER
+from streaming.protocol import decode_frame, negotiate, receive_message, send_message
+from streaming.resume import LiveSession, close_live_sessions, get_live_session
+from streaming.admission import admission, QueueFullError
+from streaming.dedup import PROMPT_DEDUP, prompt_dedup, prompt_key, context_note
+from streaming.tool_tables import TOOL_TABLES, TableForwarder
+from streaming.sessions import build_session_service, is_shared, keep_owned, open_session, release_owned
 
-# Load environment variables
-load_dotenv()
+telemetry.setup_logging()
+logger = logging.getLogger("streaming_app")
 
 # Get the directory where main.py is located
 BASE_DIR = Path(__file__).resolve().parent
 
 # Application configuration
 APP_NAME = "financial_streaming_app"
-session_service = InMemorySessionService()
 
-# Initialize FastAPI app
-app = FastAPI()
+# Sessions live in SQLite by default so any worker can resume them; see
+# streaming/sessions.py for the SESSION_STORE options.
+session_service = build_session_service()
 
-# Serve static files - use absolute path
-STATIC_DIR = BASE_DIR / "static"
+# Number of process-wide runners sharing `session_service`. Runners hold no
+# per-connection state, so one is usually enough; a small pool spreads the
+# pre-market connection spike across several.
+RUNNER_POOL_SIZE = max(1, int(os.environ.get("RUNNER_POOL_SIZE", "1")))
+runner_pool: list[Runner] = []
+_runner_cycle = None
+
+# Client messages kept while a connection waits for a session slot.
+MAX_EARLY_MESSAGES = 8
+
+
+async def build_runner_pool(size: int) -> list[Runner]:
+    """
+    Builds and warms the runners shared by every WebSocket connection.
+    
+    The agent tree is imported here rather than at module import, so the
+    process starts serving sooner; tool dependencies such as pandas and
+    yfinance are only imported by the first tool call.
+    
+    Args:
+        size (int): Number of runners in the pool
+    
+    Returns:
+        list[Runner]: Runners sharing the module-level session service
+    """
+    from finagent.agent import root_agent
+    
+    runners = [
+        Runner(
+            app_name=APP_NAME,
+            agent=root_agent,
+            session_service=session_service,
+        )
+        for _ in range(size)
+    ]
+    
+    # Resolve the model once so the first connection does not pay for it,
+    # and round-trip a throwaway session through the session service.
+    _ = root_agent.canonical_model
+    warmup = await session_service.create_session(app_name=APP_NAME, user_id="__warmup__")
+    await session_service.delete_session(
+        app_name=APP_NAME,
+        user_id="__warmup__",
+        session_id=warmup.id,
+    )
+    return runners
 
-# Ensure static directory exists
-if not STATIC_DIR.exists():
-    print(f"WARNING: Static directory not found at {STATIC_DIR}")
-    print(f"Current working directory: {os.getcwd()}")
-    print(f"Base directory: {BASE_DIR}")
-else:
-    print(f"Static directory found at: {STATIC_DIR}")
 
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+def get_runner() -> Runner:
+    """Returns the next runner from the shared pool (round robin)"""
+    if _runner_cycle is None:
+        raise RuntimeError("Runner pool is not initialized; is the app lifespan running?")
+    return next(_runner_cycle)
 
 
-async def start_agent_session(user_id: str, is_audio: bool = False):
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Preloads the static files and builds the runner pool at startup, releases them at shutdown"""
+    global runner_pool, _runner_cycle
+    assets.load()
+    runner_pool = await build_runner_pool(RUNNER_POOL_SIZE)
+    _runner_cycle = itertools.cycle(runner_pool)
+    logger.info("Runner pool ready: %d runner(s)", len(runner_pool))
+    yield
+    # Clears the ownership marker of sessions still in their grace period
+    await close_live_sessions()
+    runner_pool = []
+    _runner_cycle = None
+    await http_client.aclose()
+    history.flush()
+    telemetry.mark_worker_exit()
+    telemetry.shutdown_logging()
+
+
+# Initialize FastAPI app
+app = FastAPI(lifespan=lifespan)
+
+# Static files are preloaded and precompressed in the lifespan and served
+# from memory, with content-hashed URLs; see streaming/assets.py
+STATIC_DIR = BASE_DIR / "static"
+assets = AssetStore(STATIC_DIR, aliases={"/app.js": "js/app.js"})
+
+
+async def start_agent_session(user_id: str, is_audio: bool = False, brief_mode: str = DEFAULT_BRIEF_MODE):
     """
     Starts an ADK agent session for the given user.
     
+    The session id is derived from the user id, so a reconnect resumes the
+    stored session (and its history) instead of starting a new one.
+    
     Args:
         user_id (str): Unique identifier for the user
         is_audio (bool): Whether to use audio mode (False for text-only)
+        brief_mode (str): How morning briefs are built, one of BRIEF_MODES
     
     Returns:
-        tuple: (live_events, live_request_queue)
+        tuple: (live_events, live_request_queue, session)
     """
-    # Create a Runner
-    runner = InMemoryRunner(
-        app_name=APP_NAME,
-        agent=root_agent,
-    )
+    # Use a shared, pre-warmed Runner
+    runner = get_runner()
     
-    # Create a Session
-    session = await runner.session_service.create_session(
-        app_name=APP_NAME,
-        user_id=user_id,
+    # Resume the user's session or create it. Either way it is marked as run
+    # by this worker; one still run by another worker is left alone.
+    session, resumed = await open_session(
+        session_service,
+        APP_NAME,
+        user_id,
+        state={"brief_mode": brief_mode},
     )
+    if resumed:
+        logger.info("Resuming session %s (%d events)", session.id, len(session.events))
     
     # Set response modality (TEXT only for this implementation)
     modality = "TEXT"  # Always TEXT for this financial app
@@ -80,17 +168,38 @@ async def start_agent_session(user_id: str, is_audio: bool = False):
         run_config=run_config,
     )
     
-    return live_events, live_request_queue
+    return live_events, live_request_queue, session
 
 
-async def agent_to_client_messaging(websocket: WebSocket, live_events):
+async def agent_to_client_messaging(live: LiveSession, live_events):
     """
     Streams agent responses to the WebSocket client.
     
+    Partial text goes through the session's OutboundStream, which coalesces
+    it into fewer frames, numbers and journals them for replay, and sends them
+    to whichever connection is attached. This runs for the lifetime of the
+    LiveSession, so a turn keeps going while the client reconnects.
+    
+    Results of the data tools (commodities, indices, movers) are sent as
+    table messages as soon as each tool returns, ahead of the model's
+    narration (see streaming/tool_tables.py).
+    
     Args:
-        websocket (WebSocket): The WebSocket connection
+        live (LiveSession): The resumable session being streamed
         live_events: Async iterator of agent events
     """
+    outbound = live.outbound
+    # Tool calls made while iterating live_events are recorded into this list.
+    turn_trace = instrumentation.start_turn_trace()
+    tables = None
+    if TOOL_TABLES:
+        def share_table(table: dict, title: str):
+            # Sessions following this session's turn get its tables too
+            if live.shared_turn is not None:
+                live.shared_turn.publish_table(table, title)
+
+        tables = TableForwarder(outbound, on_table=share_table)
+        instrumentation.watch_tool_results(tables)
     try:
         async for event in live_events:
             # Handle turn completion or interruption
@@ -99,8 +208,23 @@ async def agent_to_client_messaging(websocket: WebSocket, live_events):
                     "turn_complete": event.turn_complete,
                     "interrupted": event.interrupted,
                 }
-                await websocket.send_text(json.dumps(message))
-                print(f"[AGENT TO CLIENT]: {message}")
+                outbound.send_message(message)
+                if live.shared_turn is not None:
+                    prompt_dedup.finish(live.shared_turn, interrupted=bool(event.interrupted))
+                    live.shared_turn = None
+                if live.turns_admitted:
+                    live.turns_admitted -= 1
+                    admission.turns.release(live.key)
+                if live.debug and turn_trace:
+                    outbound.send_message({
+                        "mime_type": "application/x-tool-trace+json",
+                        "data": list(turn_trace),
+                    })
+                turn_trace.clear()
+                if tables is not None:
+                    tables.end_turn()
+                telemetry.TURNS.labels(outcome="complete" if event.turn_complete else "interrupted").inc()
+                logger.debug("[AGENT TO CLIENT]: %s", message)
                 continue
             
             # Read the Content and its first Part
@@ -112,146 +236,373 @@ async def agent_to_client_messaging(websocket: WebSocket, live_events):
             
             # Handle text content (no audio in this implementation)
             if part.text and event.partial:
-                message = {
-                    "mime_type": "text/plain",
-                    "data": part.text
-                }
-                await websocket.send_text(json.dumps(message))
-                print(f"[AGENT TO CLIENT]: text/plain: {part.text[:50]}...")
+                outbound.send_text(part.text)
+                if live.shared_turn is not None:
+                    live.shared_turn.publish(part.text)
+                telemetry.STREAMED_CHUNKS.inc()
+                telemetry.STREAMED_CHARS.inc(len(part.text))
+                telemetry.chunk_logger.debug("[AGENT TO CLIENT]: text/plain: %.50s...", part.text)
                 
     except Exception as e:
-        print(f"Error in agent_to_client_messaging: {e}")
+        logger.error("Error in agent_to_client_messaging: %s", e)
         raise
 
 
-async def client_to_agent_messaging(websocket: WebSocket, live_request_queue: LiveRequestQueue):
+async def send_prompt(live: LiveSession, text: str):
+    """
+    Sends a prompt to the agent once a turn slot is free (see
+    streaming/admission.py); the slot is returned when the turn completes.
+    
+    Args:
+        live (LiveSession): The session whose LiveRequestQueue receives the prompt
+        text (str): The user's prompt
+    """
+    def on_position(position):
+        live.outbound.send_message({"queue": {"kind": "turn", "position": position}})
+    
+    try:
+        await admission.turns.acquire(live.key, on_position=on_position)
+    except QueueFullError:
+        live.outbound.send_message({"busy": True})
+        if live.shared_turn is not None:
+            prompt_dedup.finish(live.shared_turn, interrupted=True)
+            live.shared_turn = None
+        return
+    except asyncio.CancelledError:
+        if live.shared_turn is not None:
+            prompt_dedup.finish(live.shared_turn, interrupted=True)
+            live.shared_turn = None
+        raise
+    live.turns_admitted += 1
+    
+    # An answer shared from another session is not in this session's agent
+    # history, so it goes along with the next prompt
+    joined = live.joined_turn
+    if joined is not None:
+        live.joined_turn = None
+        if not joined.interrupted:
+            text = context_note(joined.prompt, joined.transcript) + text
+    
+    # Send text message to the agent
+    live.prompts_sent += 1
+    content = Content(role="user", parts=[Part.from_text(text=text)])
+    live.live_request_queue.send_content(content=content)
+    logger.debug("[CLIENT TO AGENT]: %s", text)
+
+
+def share_prompt(live: LiveSession, text: str) -> bool:
+    """
+    Applies prompt dedup (streaming/dedup.py) to the first prompt of a fresh
+    session: joins an identical turn in flight or serves its cached transcript,
+    or else registers this session as the leader of a new shared turn.
+    
+    Returns:
+        bool: True if the prompt was answered from a shared turn
+    """
+    if not PROMPT_DEDUP or live.prompts_sent or live.session.events:
+        return False
+    key = prompt_key(text)
+    if key is None:
+        return False
+    
+    turn = prompt_dedup.lookup(key)
+    if turn is None:
+        live.shared_turn = prompt_dedup.lead(key, text)
+        telemetry.PROMPT_DEDUP.labels(outcome="lead").inc()
+        return False
+    
+    telemetry.PROMPT_DEDUP.labels(outcome="cached" if turn.done.is_set() else "joined").inc()
+    logger.debug("Prompt from %s shares turn %r", live.key, key)
+    live.prompts_sent += 1
+    live.joined_turn = turn
+    # If the leader's turn is interrupted, run the prompt in this session
+    turn.subscribe(live, fallback=lambda live: asyncio.create_task(send_prompt(live, text)))
+    return True
+
+
+async def handle_client_message(live: LiveSession, message: dict):
+    """
+    Passes one client message to the agent: each prompt passes the per-user
+    rate limit and then either shares an identical turn (when PROMPT_DEDUP is
+    on) or waits for a turn slot.
+    """
+    mime_type = message.get("mime_type")
+    data = message.get("data")
+    
+    # Handle text messages only
+    if mime_type != "text/plain":
+        logger.warning("Unsupported mime type: %s", mime_type)
+        return
+    retry_after = admission.check_prompt_rate(live.key)
+    if retry_after:
+        live.outbound.send_message({"rate_limited": True, "retry_after": round(retry_after, 1)})
+        return
+    if live.joined_turn is not None:
+        # Let the shared answer finish before this session's own turn
+        await live.joined_turn.done.wait()
+    if share_prompt(live, data):
+        return
+    await send_prompt(live, data)
+
+
+async def client_to_agent_messaging(websocket: WebSocket, live: LiveSession, early: list[dict] = ()):
     """
     Relays client messages to the ADK agent.
     
+    Messages may come as JSON text or msgpack binary frames (see
+    streaming/protocol.py).
+    
     Args:
         websocket (WebSocket): The WebSocket connection
-        live_request_queue (LiveRequestQueue): Queue to send messages to the agent
+        live (LiveSession): The session whose LiveRequestQueue receives the messages
+        early (list[dict]): Messages received while the connection waited for
+                            admission, handled first
     """
     try:
+        for message in early:
+            await handle_client_message(live, message)
         while True:
-            # Receive and decode JSON message from client
-            message_json = await websocket.receive_text()
-            message = json.loads(message_json)
-            
-            mime_type = message.get("mime_type")
-            data = message.get("data")
-            
-            # Handle text messages only
-            if mime_type == "text/plain":
-                # Send text message to the agent
-                content = Content(role="user", parts=[Part.from_text(text=data)])
-                live_request_queue.send_content(content=content)
-                print(f"[CLIENT TO AGENT]: {data}")
-            else:
-                print(f"[WARNING] Unsupported mime type: {mime_type}")
+            # Receive and decode the next message from the client
+            message = await receive_message(websocket)
+            await handle_client_message(live, message)
                 
+    except WebSocketDisconnect as e:
+        # The client left (e.g. closed the tab); not an error
+        logger.debug("Client of session %s disconnected: code %s", live.key, e.code)
+        raise
     except Exception as e:
-        print(f"Error in client_to_agent_messaging: {e}")
+        logger.error("Error in client_to_agent_messaging: %s", e)
         raise
 
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Serves the main index.html page"""
-    index_path = STATIC_DIR / "index.html"
-    print(f"Attempting to serve index.html from: {index_path}")
-    print(f"File exists: {index_path.exists()}")
-    
-    if not index_path.exists():
-        return {"error": f"index.html not found at {index_path}", "static_dir": str(STATIC_DIR)}
-    return FileResponse(str(index_path))
+    return assets.response(request, "index.html")
 
 
 @app.get("/app.js")
-async def serve_app_js():
-    """Serves the app.js file as an ES module"""
-    # Check in static/js/ directory
-    js_path = STATIC_DIR / "js" / "app.js"
-    
-    if js_path.exists():
-        with open(js_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return Response(
-            content=content,
-            media_type="application/javascript; charset=utf-8"
-        )
-    
-    return Response(
-        content=f"console.error('app.js not found at {js_path}');",
-        status_code=404,
-        media_type="application/javascript"
-    )
+async def serve_app_js(request: Request):
+    """Serves app.js under its original URL (index.html uses the hashed one)"""
+    return assets.response(request, "js/app.js")
 
 
 @app.get("/vite.svg")
-async def serve_vite_svg():
+async def serve_vite_svg(request: Request):
     """Serves the vite.svg icon if it exists"""
-    svg_path = STATIC_DIR / "vite.svg"
-    if svg_path.exists():
-        return FileResponse(str(svg_path), media_type="image/svg+xml")
-    # Return 404 for missing optional icon
-    return Response(status_code=404)
+    return assets.response(request, "vite.svg")
+
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def serve_static(request: Request, path: str):
+    """Serves a preloaded file from static/, by plain or content-hashed name"""
+    return assets.response(request, path)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Serves Prometheus metrics in the text exposition format"""
+    body, content_type = telemetry.render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/debug/tool-stats")
+async def debug_tool_stats():
+    """Rolling per-tool latency percentiles, error classes, cache counters and recent parallel brief timings"""
+    return {
+        "tools": instrumentation.tool_stats(),
+        "cache": cache_stats(),
+        "briefs": list(brief_timing.recent_briefs),
+    }
+
+
+async def release_session(live: LiveSession):
+    """Called once a LiveSession is closed (after the reconnect grace period)"""
+    # Return the admission slots held by the session
+    for _ in range(live.turns_admitted):
+        admission.turns.release(live.key)
+    live.turns_admitted = 0
+    admission.sessions.release(live.key)
+    
+    # Subscribers of a turn this session was leading run the prompt themselves
+    if live.shared_turn is not None:
+        prompt_dedup.finish(live.shared_turn, interrupted=True)
+        live.shared_turn = None
+    
+    # In-memory sessions cannot be resumed elsewhere, so release them here;
+    # shared stores keep them for a later reconnect on any worker
+    if not is_shared(session_service):
+        await session_service.delete_session(
+            app_name=APP_NAME,
+            user_id=live.session.user_id,
+            session_id=live.session.id,
+        )
+    else:
+        await release_owned(session_service, live.session)
+
+
+async def wait_for_admission(websocket: WebSocket, user_id: str, codec) -> list[dict] | None:
+    """
+    Waits for a live session slot while watching the socket, so a client that
+    leaves the queue gives up its place.
+    
+    Messages the client sends meanwhile (e.g. a prompt sent right after
+    connecting) are kept, up to MAX_EARLY_MESSAGES, and handled once the
+    session runs; further ones are answered with a busy frame.
+    
+    Returns:
+        list[dict] | None: The messages received while waiting once admitted,
+                           or None if the client disconnected first
+    
+    Raises:
+        QueueFullError: If the session queue is full
+    """
+    def on_position(position):
+        asyncio.create_task(send_message(
+            websocket, codec, {"queue": {"kind": "session", "position": position}}
+        ))
+    
+    early = []
+    
+    async def keep(frame):
+        try:
+            message = decode_frame(frame)
+        except ValueError as e:
+            logger.warning("Undecodable message from client %s: %s", user_id, e)
+            return
+        if len(early) < MAX_EARLY_MESSAGES:
+            early.append(message)
+        else:
+            await send_message(websocket, codec, {"busy": True})
+    
+    acquire_task = asyncio.create_task(admission.sessions.acquire(user_id, on_position=on_position))
+    while True:
+        receive_task = asyncio.create_task(websocket.receive())
+        done, _ = await asyncio.wait([acquire_task, receive_task], return_when=asyncio.FIRST_COMPLETED)
+        if receive_task in done:
+            frame = receive_task.result()
+            if frame["type"] == "websocket.disconnect":
+                acquire_task.cancel()
+                if acquire_task.done() and not acquire_task.cancelled() and acquire_task.exception() is None:
+                    admission.sessions.release(user_id)
+                return None
+            await keep(frame)
+        if acquire_task in done:
+            # A frame not received yet stays queued in the connection
+            receive_task.cancel()
+            acquire_task.result()
+            return early
 
 
 @app.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: int, is_audio: str = "false"):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    user_id: int,
+    is_audio: str = "false",
+    brief_mode: str = DEFAULT_BRIEF_MODE,
+    debug: str = "false",
+    last_seq: int | None = None,
+):
     """
     WebSocket endpoint for client connections.
     
+    A client reconnecting within the grace period (see streaming/resume.py)
+    is attached to its running agent session and, when it sends the last seq
+    it received, gets the frames it missed replayed first.
+    
+    The wire format (msgpack or JSON) is negotiated with the WebSocket
+    subprotocol, see streaming/protocol.py.
+    
     Args:
         websocket (WebSocket): The WebSocket connection
         user_id (int): Unique client identifier
         is_audio (str): Audio mode flag (not used in text-only mode)
+        brief_mode (str): "sequential" or "parallel" morning brief
+        debug (str): "true" to receive a tool trace message after each turn
+        last_seq (int): Last frame seq the client received, when resuming
     """
-    # Accept WebSocket connection
-    await websocket.accept()
-    print(f"Client #{user_id} connected, text mode only")
+    # Accept WebSocket connection in the client's preferred wire format
+    codec, subprotocol = negotiate(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=subprotocol)
+    logger.info("Client #%s connected, text mode only, %s frames", user_id, codec.protocol)
+    telemetry.WS_CONNECTIONS.inc()
+    telemetry.WS_ACTIVE.inc()
     
+    user_id_str = str(user_id)
+    live = None
     try:
-        # Start agent session (text-only)
-        user_id_str = str(user_id)
-        live_events, live_request_queue = await start_agent_session(
-            user_id_str, 
-            is_audio=False  # Always False for text-only
-        )
+        # Resume the running agent session or start one (text-only)
+        live = get_live_session(user_id_str)
+        early = []
+        if live is None:
+            # Wait for a live session slot, reporting the queue position
+            try:
+                early = await wait_for_admission(websocket, user_id_str, codec)
+            except QueueFullError:
+                await websocket.close(code=CLOSE_TRY_AGAIN_LATER, reason="server busy")
+                return
+            if early is None:
+                return
+            
+            if brief_mode not in BRIEF_MODES:
+                brief_mode = DEFAULT_BRIEF_MODE
+            try:
+                live_events, live_request_queue, session = await start_agent_session(
+                    user_id_str, 
+                    is_audio=False,  # Always False for text-only
+                    brief_mode=brief_mode,
+                )
+            except BaseException:
+                admission.sessions.release(user_id_str)
+                raise
+            live = LiveSession(user_id_str, session, live_request_queue, on_close=release_session)
+            live.start(agent_to_client_messaging(live, live_events))
+            if is_shared(session_service):
+                live.heartbeat = asyncio.create_task(keep_owned(session_service, session))
         
-        # Create concurrent tasks for bidirectional communication
-        agent_to_client_task = asyncio.create_task(
-            agent_to_client_messaging(websocket, live_events)
-        )
+        outcome = await live.attach(websocket, last_seq=last_seq, debug=debug == "true", codec=codec)
+        if last_seq is not None:
+            telemetry.STREAM_RESUMES.labels(outcome=outcome).inc()
+            logger.info("Client #%s resumed after seq %s: %s", user_id, last_seq, outcome)
+        
+        # Relay client messages until the client leaves, the connection fails
+        # (e.g. slow consumer) or the agent run ends
         client_to_agent_task = asyncio.create_task(
-            client_to_agent_messaging(websocket, live_request_queue)
+            client_to_agent_messaging(websocket, live, early)
         )
-        
-        # Wait for either task to complete (or error)
-        tasks = [agent_to_client_task, client_to_agent_task]
+        connection_failed_task = asyncio.create_task(live.outbound.wait_failed())
         done, pending = await asyncio.wait(
-            tasks, 
-            return_when=asyncio.FIRST_EXCEPTION
+            [client_to_agent_task, connection_failed_task, live.pump], 
+            return_when=asyncio.FIRST_COMPLETED
         )
         
-        # Cancel pending tasks
-        for task in pending:
-            task.cancel()
-            
-        # Check if any task raised an exception
-        for task in done:
-            if task.exception():
-                print(f"Task error: {task.exception()}")
+        # Cancel this connection's pending tasks; the agent run is left alone
+        for task in (client_to_agent_task, connection_failed_task):
+            if task in pending:
+                task.cancel()
+        
+        if connection_failed_task in done:
+            error = connection_failed_task.result()
+            logger.warning("Connection error for client #%s: %s", user_id, error)
+            if isinstance(error, SlowConsumerError):
+                await websocket.close(code=CLOSE_TRY_AGAIN_LATER, reason="slow consumer")
+        
+        if live.pump in done:
+            if live.pump.exception():
+                logger.warning("Task error: %s", live.pump.exception())
+            await live.close()
+        elif client_to_agent_task in done and client_to_agent_task.exception():
+            logger.debug("Client task ended: %s", client_to_agent_task.exception())
                 
     except Exception as e:
-        print(f"WebSocket error for client #{user_id}: {e}")
+        logger.error("WebSocket error for client #%s: %s", user_id, e)
     finally:
-        # Close LiveRequestQueue
-        if 'live_request_queue' in locals():
-            live_request_queue.close()
+        # Keep the agent running for the grace period so the client can resume
+        if live is not None:
+            live.detach(websocket)
         
-        print(f"Client #{user_id} disconnected")
+        telemetry.WS_ACTIVE.dec()
+        logger.info("Client #%s disconnected", user_id)
 
 
 # Run the application
@@ -259,9 +610,21 @@ if __name__ == "__main__":
     import uvicorn
     # Use port 8080 for Google Cloud Shell compatibility
     port = int(os.environ.get("PORT", 8080))
+    # Number of worker processes (uvicorn's own WEB_CONCURRENCY convention)
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+    # Compress WebSocket frames when the client supports it (all browsers do);
+    # set WS_PER_MESSAGE_DEFLATE=0 to trade bandwidth for CPU
+    per_message_deflate = os.environ.get("WS_PER_MESSAGE_DEFLATE", "1") != "0"
+    if workers > 1:
+        if not is_shared(session_service):
+            logger.warning("SESSION_STORE=memory with %d workers: reconnects may lose their session", workers)
+        telemetry.prepare_multiprocess_metrics()
     uvicorn.run(
-        app, 
+        # Workers import the app themselves, which needs an import string
+        "main:app" if workers > 1 else app, 
         host="0.0.0.0", 
         port=port,
+        workers=workers,
+        ws_per_message_deflate=per_message_deflate,
         log_level="info"
     )
@@ -0,0 +1,101 @@
+#
+# snapshot_job.py
+#
+# Precomputes the numeric sections of the morning brief (world indices,
+# commodities, market movers, treasury yields) for the last trading day and
+# writes them to snapshots/YYYY-MM-DD.json. While that file exists, the tools serve every
+# matching request from it instead of calling Yahoo, TradingView or Polygon.
+# The fetched values are also appended to the price history (finagent/history.py).
+#
+# Run it once before the US open, e.g. from cron (UTC, weekdays at 12:30):
+#   30 12 * * 1-5  cd /path/to/app && python snapshot_job.py
+#
+# Usage:
+#   python snapshot_job.py [--force]
+#
+
+import argparse
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from finagent import history, snapshot
+from finagent.cache import make_key, _as_of_trading_date, _is_cacheable
+from finagent.polygon_Treasury_yields import get_treasury_yields
+from finagent.tv_market_movers_scraper import scrape_tradingview_market_movers
+from finagent.yahoo_comm import fetch_commodity_data, TARGET_COMMODITIES
+from finagent.yahoo_indices import scrape_world_indices
+
+# (cache source, cached tool function, keyword arguments the agents call it with)
+SNAPSHOT_CALLS = [
+    ("world_indices", scrape_world_indices, {}),
+    ("commodities", fetch_commodity_data, {"commodity_names": list(TARGET_COMMODITIES)}),
+    ("market_movers", scrape_tradingview_market_movers, {}),
+    ("treasury_yields", get_treasury_yields, {}),
+]
+
+
+def build_entries() -> tuple[dict, list[str]]:
+    """
+    Calls every tool upstream (bypassing cache and snapshot) and collects the results.
+
+    Returns:
+        tuple: (snapshot entries, names of the tools that failed)
+    """
+    entries = {}
+    failed = []
+    for source, tool, kwargs in SNAPSHOT_CALLS:
+        upstream = tool.__wrapped__
+        start = time.perf_counter()
+        try:
+            result = upstream(**kwargs)
+        except Exception as e:
+            result = f"Error: {e}"
+        elapsed = time.perf_counter() - start
+
+        if not _is_cacheable(result):
+            print(f"  - ERROR: {upstream.__name__} failed after {elapsed:.1f}s: {result}")
+            failed.append(upstream.__name__)
+            continue
+
+        _, tool_name, normalized_args, _ = make_key(source, upstream, (), kwargs)
+        history.record(source, result)
+        entries[snapshot.entry_key(tool_name, normalized_args)] = {
+            "tool": tool_name,
+            "source": source,
+            "args": kwargs,
+            "result": result,
+        }
+        print(f"  - {tool_name}: ok in {elapsed:.1f}s")
+    return entries, failed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Precompute the morning brief snapshot")
+    parser.add_argument("--force", action="store_true", help="Overwrite an existing snapshot")
+    args = parser.parse_args()
+
+    load_dotenv()
+    # The tools only fetch current data, so the snapshot is always for the
+    # last trading day.
+    trading_date = _as_of_trading_date().isoformat()
+    path = snapshot.snapshot_path(trading_date)
+    if path.exists() and not args.force:
+        print(f"Snapshot for {trading_date} already exists at {path} (use --force to rebuild)")
+        return 0
+
+    print(f"Building snapshot for {trading_date}...")
+    entries, failed = build_entries()
+    if not entries:
+        print("No tool returned data; snapshot not written.")
+        return 1
+
+    history.flush()
+    path = snapshot.write_snapshot(trading_date, entries)
+    print(f"Wrote {len(entries)} entries to {path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
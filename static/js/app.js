@@ -1,5 +1,11 @@
-// Connect the server with a WebSocket connection
-const sessionId = Math.random().toString().substring(10);
+// Connect the server with a WebSocket connection.
+// The id is kept in sessionStorage so reconnects and page reloads in this tab
+// resume the same server-side session (on whichever worker they reach).
+let sessionId = sessionStorage.getItem("finagentSessionId");
+if (!sessionId) {
+  sessionId = String(Math.floor(Math.random() * 1e12));
+  sessionStorage.setItem("finagentSessionId", sessionId);
+}
 
 // Detect if running in Google Cloud Shell or locally
 const isCloudShell = window.location.hostname.includes('cloudshell') || 
@@ -15,6 +21,15 @@ if (isCloudShell) {
   console.log("Detected Google Cloud Shell environment");
 }
 
+// Optional settings from the page URL, e.g. /?brief_mode=parallel&debug=true
+const pageParams = new URLSearchParams(window.location.search);
+const briefMode = pageParams.get("brief_mode");
+const debugTrace = pageParams.get("debug") === "true";
+// Wire formats to offer (see protocol.js); ?protocol=json forces JSON frames
+const wireProtocols = pageParams.get("protocol") === "json"
+  ? [JSON_PROTOCOL]
+  : [MSGPACK_PROTOCOL, JSON_PROTOCOL];
+
 const ws_url = ws_protocol + "//" + ws_host + "/ws/" + sessionId;
 console.log("WebSocket URL:", ws_url);
 
@@ -25,78 +40,156 @@ const messageForm = document.getElementById("messageForm");
 const messageInput = document.getElementById("message");
 const messagesDiv = document.getElementById("messages");
 const sendButton = document.getElementById("sendButton");
-let currentMessageId = null;
+// Agent turn being streamed (see render.js), null between turns
+let currentTurn = null;
+ChatView.init(messagesDiv);
+
+// Sequence number of the last frame received; sent on reconnect so the server
+// replays what was missed while disconnected
+let lastSeq = null;
+
+// Close code the server uses when this connection was replaced by a newer one
+const CLOSE_SUPERSEDED = 4001;
+
+// Shows the connection state in a single status line instead of replacing
+// the conversation
+function setStatus(text, className) {
+  let status = document.getElementById("connection-status");
+  if (!status) {
+    status = document.createElement("p");
+    status.id = "connection-status";
+    messagesDiv.appendChild(status);
+  }
+  status.className = className;
+  status.textContent = text;
+}
 
 // WebSocket handlers
 function connectWebsocket() {
   // Connect websocket (text mode only)
-  websocket = new WebSocket(ws_url + "?is_audio=false");
+  let query = "?is_audio=false";
+  if (briefMode) {
+    query += "&brief_mode=" + encodeURIComponent(briefMode);
+  }
+  if (debugTrace) {
+    query += "&debug=true";
+  }
+  if (lastSeq !== null) {
+    query += "&last_seq=" + lastSeq;
+  }
+  websocket = new WebSocket(ws_url + query, wireProtocols);
+  websocket.binaryType = "arraybuffer";
 
   // Handle connection open
   websocket.onopen = function () {
-    console.log("WebSocket connection opened.");
-    messagesDiv.innerHTML = '<p class="text-gray-500">Connected. Ready to analyze financial data...</p>';
-    sendButton.disabled = false;
-    addSubmitHandler();
+    console.log("WebSocket connection opened (" + (websocket.protocol || "json") + ").");
+    setStatus("Connected. Waiting for the server...", "text-gray-500");
   };
 
   // Handle incoming messages
   websocket.onmessage = function (event) {
-    const message_from_server = JSON.parse(event.data);
+    const message_from_server = decodeFrame(event.data);
     console.log("[AGENT TO CLIENT]", message_from_server);
 
+    // Stream status, first frame of every connection once admitted
+    if (message_from_server.stream !== undefined) {
+      setStatus("Connected. Ready to analyze financial data...", "text-gray-500");
+      sendButton.disabled = false;
+      addSubmitHandler();
+      if (message_from_server.stream !== "replayed") {
+        if (lastSeq !== null && currentTurn !== null) {
+          // The rest of the message in progress could not be replayed
+          ChatView.finishTurn(currentTurn, " [response interrupted]");
+          currentTurn = null;
+        }
+        lastSeq = message_from_server.last_seq;
+      }
+      return;
+    }
+
+    // Skip frames already received (e.g. replayed twice)
+    if (message_from_server.seq !== undefined) {
+      if (lastSeq !== null && message_from_server.seq <= lastSeq) {
+        return;
+      }
+      lastSeq = message_from_server.seq;
+    }
+
+    // Position in the server's admission queue (0 once admitted)
+    if (message_from_server.queue !== undefined) {
+      const queue = message_from_server.queue;
+      if (queue.position > 0) {
+        const waitingFor = queue.kind === "session" ? "a free session" : "your turn";
+        setStatus("Server busy: waiting for " + waitingFor + ", position " + queue.position + " in queue...", "text-yellow-600");
+      } else {
+        setStatus("Connected. Ready to analyze financial data...", "text-gray-500");
+      }
+      return;
+    }
+
+    if (message_from_server.rate_limited === true) {
+      setStatus("Too many requests. Try again in " + Math.ceil(message_from_server.retry_after) + " s.", "text-red-500");
+      return;
+    }
+
+    if (message_from_server.busy === true) {
+      setStatus("Server busy. Please try again shortly.", "text-red-500");
+      return;
+    }
+
+    // Per-turn tool trace (only sent when connected with debug=true)
+    if (message_from_server.mime_type === "application/x-tool-trace+json") {
+      console.table(message_from_server.data);
+      return;
+    }
+
     // Check if the turn is complete
     if (message_from_server.turn_complete === true) {
-      currentMessageId = null;
+      if (currentTurn !== null) {
+        ChatView.finishTurn(currentTurn);
+        currentTurn = null;
+      }
       console.log("Turn completed - ready for next message");
       return;
     }
 
     // Check if interrupted
     if (message_from_server.interrupted === true) {
-      currentMessageId = null;
+      if (currentTurn !== null) {
+        ChatView.finishTurn(currentTurn);
+        currentTurn = null;
+      }
       console.log("Turn interrupted");
       return;
     }
 
-    // If it's text, display it
-    if (message_from_server.mime_type === "text/plain") {
-      // Add a new message for a new turn
-      if (currentMessageId === null) {
-        currentMessageId = Math.random().toString(36).substring(7);
-        const messageWrapper = document.createElement("div");
-        messageWrapper.className = "mb-4 p-4 bg-blue-50 rounded-lg";
-        messageWrapper.id = "wrapper-" + currentMessageId;
-        
-        const messageLabel = document.createElement("div");
-        messageLabel.className = "text-xs font-semibold text-blue-600 mb-2";
-        messageLabel.textContent = "Agent Response:";
-        messageWrapper.appendChild(messageLabel);
-        
-        const message = document.createElement("p");
-        message.className = "text-gray-800 whitespace-pre-wrap";
-        message.id = currentMessageId;
-        messageWrapper.appendChild(message);
-        
-        messagesDiv.appendChild(messageWrapper);
+    // A full table, shown in the current response after the text so far
+    if (message_from_server.mime_type === TABLE_MIME_TYPE) {
+      if (currentTurn === null) {
+        currentTurn = ChatView.startAgentTurn();
       }
+      ChatView.appendTable(currentTurn, message_from_server.data, message_from_server.title);
+      return;
+    }
 
-      // Add message text to the existing message element
-      const message = document.getElementById(currentMessageId);
-      if (message) {
-        message.textContent += message_from_server.data;
+    // If it's text, queue it for the next render (a new turn starts a new message)
+    if (message_from_server.mime_type === "text/plain") {
+      if (currentTurn === null) {
+        currentTurn = ChatView.startAgentTurn();
       }
-
-      // Scroll down to the bottom of the messagesDiv
-      messagesDiv.scrollTop = messagesDiv.scrollHeight;
+      ChatView.appendChunk(currentTurn, message_from_server.data);
     }
   };
 
   // Handle connection close
-  websocket.onclose = function () {
+  websocket.onclose = function (event) {
     console.log("WebSocket connection closed.");
     sendButton.disabled = true;
-    messagesDiv.innerHTML = '<p class="text-red-500">Connection closed. Reconnecting...</p>';
+    if (event.code === CLOSE_SUPERSEDED) {
+      setStatus("Session continued in another connection.", "text-gray-500");
+      return;
+    }
+    setStatus("Connection closed. Reconnecting...", "text-red-500");
     setTimeout(function () {
       console.log("Reconnecting...");
       connectWebsocket();
@@ -105,7 +198,7 @@ function connectWebsocket() {
 
   websocket.onerror = function (e) {
     console.log("WebSocket error: ", e);
-    messagesDiv.innerHTML = '<p class="text-red-500">Connection error. Check console for details.</p>';
+    setStatus("Connection error. Check console for details.", "text-red-500");
   };
 }
 
@@ -133,7 +226,7 @@ function addSubmitHandler() {
       userMessage.textContent = message;
       userMessageWrapper.appendChild(userMessage);
       
-      messagesDiv.appendChild(userMessageWrapper);
+      ChatView.addTurn(userMessageWrapper);
       messageInput.value = "";
 
       // Send message to server
@@ -145,19 +238,18 @@ function addSubmitHandler() {
       console.log("[CLIENT TO AGENT]", message);
       
       // Scroll to bottom
-      messagesDiv.scrollTop = messagesDiv.scrollHeight;
+      ChatView.scrollToBottom();
     }
     return false;
   };
 }
 
-// Send a message to the server as a JSON string
+// Send a message to the server in the negotiated wire format
 function sendMessage(message) {
   if (websocket && websocket.readyState === WebSocket.OPEN) {
-    const messageJson = JSON.stringify(message);
-    websocket.send(messageJson);
+    websocket.send(encodeFrame(websocket, message));
   } else {
     console.error("WebSocket is not open. Current state:", websocket?.readyState);
-    messagesDiv.innerHTML += '<p class="text-red-500">Error: Not connected to server</p>';
+    setStatus("Error: Not connected to server", "text-red-500");
   }
 }
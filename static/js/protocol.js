@@ -0,0 +1,191 @@
+// Wire formats of the /ws endpoint (see streaming/protocol.py).
+//
+// The client offers the formats it understands as WebSocket subprotocols,
+// most preferred first. The server accepts msgpack when it has the msgpack
+// package installed, and JSON otherwise; servers that predate the
+// negotiation accept neither, and then JSON text frames are used as before.
+//
+// MsgPack below is a small encoder/decoder for the subset of msgpack the app
+// uses: nil, booleans, numbers, strings, binary, arrays and maps.
+
+const MSGPACK_PROTOCOL = "finagent.msgpack.v2";
+const JSON_PROTOCOL = "finagent.json.v1";
+const TABLE_MIME_TYPE = "application/x-table";
+
+const MsgPack = (function () {
+  const textEncoder = new TextEncoder();
+  const textDecoder = new TextDecoder();
+
+  function encode(value) {
+    const bytes = [];
+    const scratch = new DataView(new ArrayBuffer(8));
+
+    function pushUint(size, n) {
+      if (size === 1) {
+        bytes.push(n);
+      } else if (size === 2) {
+        bytes.push(n >>> 8, n & 0xff);
+      } else {
+        bytes.push(n >>> 24, (n >>> 16) & 0xff, (n >>> 8) & 0xff, n & 0xff);
+      }
+    }
+
+    function pushLength(length, fix, fixMax, codes) {
+      if (fix !== null && length <= fixMax) {
+        bytes.push(fix | length);
+      } else if (codes[0] !== null && length < 0x100) {
+        bytes.push(codes[0], length);
+      } else if (length < 0x10000) {
+        bytes.push(codes[1]);
+        pushUint(2, length);
+      } else {
+        bytes.push(codes[2]);
+        pushUint(4, length);
+      }
+    }
+
+    function write(v) {
+      if (v === null || v === undefined) {
+        bytes.push(0xc0);
+      } else if (v === false) {
+        bytes.push(0xc2);
+      } else if (v === true) {
+        bytes.push(0xc3);
+      } else if (typeof v === "number") {
+        if (Number.isInteger(v) && v >= 0 && v < 0x100000000) {
+          if (v < 0x80) bytes.push(v);
+          else if (v < 0x100) bytes.push(0xcc, v);
+          else if (v < 0x10000) { bytes.push(0xcd); pushUint(2, v); }
+          else { bytes.push(0xce); pushUint(4, v); }
+        } else if (Number.isInteger(v) && v < 0 && v >= -0x80000000) {
+          if (v >= -32) bytes.push(v & 0xff);
+          else { bytes.push(0xd2); pushUint(4, v >>> 0); }
+        } else {
+          scratch.setFloat64(0, v);
+          bytes.push(0xcb);
+          for (let i = 0; i < 8; i++) bytes.push(scratch.getUint8(i));
+        }
+      } else if (typeof v === "string") {
+        const utf8 = textEncoder.encode(v);
+        pushLength(utf8.length, 0xa0, 31, [0xd9, 0xda, 0xdb]);
+        for (let i = 0; i < utf8.length; i++) bytes.push(utf8[i]);
+      } else if (v instanceof Uint8Array) {
+        pushLength(v.length, null, 0, [0xc4, 0xc5, 0xc6]);
+        for (let i = 0; i < v.length; i++) bytes.push(v[i]);
+      } else if (Array.isArray(v)) {
+        pushLength(v.length, 0x90, 15, [null, 0xdc, 0xdd]);
+        v.forEach(write);
+      } else {
+        const keys = Object.keys(v).filter((key) => v[key] !== undefined);
+        pushLength(keys.length, 0x80, 15, [null, 0xde, 0xdf]);
+        keys.forEach((key) => { write(key); write(v[key]); });
+      }
+    }
+
+    write(value);
+    return new Uint8Array(bytes);
+  }
+
+  function decode(buffer) {
+    const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    let offset = 0;
+
+    function uint(size) {
+      let n;
+      if (size === 1) n = view.getUint8(offset);
+      else if (size === 2) n = view.getUint16(offset);
+      else if (size === 4) n = view.getUint32(offset);
+      else n = Number(view.getBigUint64(offset));
+      offset += size;
+      return n;
+    }
+
+    function int(size) {
+      let n;
+      if (size === 1) n = view.getInt8(offset);
+      else if (size === 2) n = view.getInt16(offset);
+      else if (size === 4) n = view.getInt32(offset);
+      else n = Number(view.getBigInt64(offset));
+      offset += size;
+      return n;
+    }
+
+    function str(length) {
+      const s = textDecoder.decode(bytes.subarray(offset, offset + length));
+      offset += length;
+      return s;
+    }
+
+    function bin(length) {
+      const b = bytes.slice(offset, offset + length);
+      offset += length;
+      return b;
+    }
+
+    function array(length) {
+      const a = new Array(length);
+      for (let i = 0; i < length; i++) a[i] = read();
+      return a;
+    }
+
+    function map(length) {
+      const m = {};
+      for (let i = 0; i < length; i++) {
+        const key = read();
+        m[key] = read();
+      }
+      return m;
+    }
+
+    function read() {
+      const code = bytes[offset++];
+      if (code < 0x80) return code;
+      if (code < 0x90) return map(code & 0x0f);
+      if (code < 0xa0) return array(code & 0x0f);
+      if (code < 0xc0) return str(code & 0x1f);
+      if (code >= 0xe0) return code - 0x100;
+      switch (code) {
+        case 0xc0: return null;
+        case 0xc2: return false;
+        case 0xc3: return true;
+        case 0xc4: return bin(uint(1));
+        case 0xc5: return bin(uint(2));
+        case 0xc6: return bin(uint(4));
+        case 0xca: { const f = view.getFloat32(offset); offset += 4; return f; }
+        case 0xcb: { const f = view.getFloat64(offset); offset += 8; return f; }
+        case 0xcc: return uint(1);
+        case 0xcd: return uint(2);
+        case 0xce: return uint(4);
+        case 0xcf: return uint(8);
+        case 0xd0: return int(1);
+        case 0xd1: return int(2);
+        case 0xd2: return int(4);
+        case 0xd3: return int(8);
+        case 0xd9: return str(uint(1));
+        case 0xda: return str(uint(2));
+        case 0xdb: return str(uint(4));
+        case 0xdc: return array(uint(2));
+        case 0xdd: return array(uint(4));
+        case 0xde: return map(uint(2));
+        case 0xdf: return map(uint(4));
+        default:
+          throw new Error("Unsupported msgpack type 0x" + code.toString(16));
+      }
+    }
+
+    return read();
+  }
+
+  return { encode: encode, decode: decode };
+})();
+
+// Decodes a frame by its type: binary frames are msgpack, text frames JSON
+function decodeFrame(data) {
+  return typeof data === "string" ? JSON.parse(data) : MsgPack.decode(data);
+}
+
+// Encodes a message in the format the server accepted for this socket
+function encodeFrame(websocket, message) {
+  return websocket.protocol === MSGPACK_PROTOCOL ? MsgPack.encode(message) : JSON.stringify(message);
+}
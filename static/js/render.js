@@ -0,0 +1,357 @@
+// Rendering of the conversation in #messages.
+//
+// Streamed text is not written to the DOM per frame: chunks are buffered and
+// flushed once per animation frame as appended text nodes, so a long brief
+// costs one small DOM append and at most one scroll per frame instead of a
+// string copy and a layout per chunk.
+//
+// Markdown tables in the text ("| a | b |" rows after a "|---|---|" line) are
+// built row by row as <table> elements while they stream in. Server-built
+// tables (application/x-table messages) use the same markup.
+//
+// Old turns are virtualized: once a turn is LIVE_TURNS turns behind the
+// newest and out of view, its DOM is replaced by an empty placeholder of the
+// same height holding the turn's HTML as a string, and restored when it is
+// scrolled back near the viewport. Beyond STORED_TURNS placeholders the
+// oldest turns are dropped, so long sessions keep a flat footprint.
+
+const ChatView = (function () {
+  const LIVE_TURNS = 30;
+  const STORED_TURNS = 300;
+  // Distance from the bottom (px) within which the view follows new text
+  const STICK_THRESHOLD = 48;
+
+  let container = null;
+  let stickToBottom = true;
+  let turnCount = 0;
+  const turnIndex = new WeakMap();      // turn element -> position in the session
+  const visible = new Set();            // turn elements near the viewport
+  const storedHtml = new Map();         // placeholder -> HTML of the virtualized turn
+  let observer = null;
+
+  const dirty = new Set();              // agent turns with unflushed text
+  let flushScheduled = false;
+
+  function init(element) {
+    container = element;
+    container.addEventListener("scroll", function () {
+      stickToBottom = container.scrollHeight - container.scrollTop - container.clientHeight < STICK_THRESHOLD;
+    }, { passive: true });
+    observer = new IntersectionObserver(onIntersection, { root: container, rootMargin: "800px 0px" });
+  }
+
+  function scrollToBottom() {
+    if (stickToBottom) {
+      container.scrollTop = container.scrollHeight;
+    }
+  }
+
+  // ---- Turns and virtualization ----
+
+  function addTurn(element) {
+    element.classList.add("turn");
+    turnIndex.set(element, turnCount++);
+    container.appendChild(element);
+    observer.observe(element);
+
+    // The turn that just fell LIVE_TURNS behind may already be out of view,
+    // in which case no intersection change will report it
+    const old = container.querySelectorAll(":scope > .turn:not(.turn-virtual)");
+    for (const turn of old) {
+      if (turnCount - turnIndex.get(turn) <= LIVE_TURNS) {
+        break;
+      }
+      if (!visible.has(turn)) {
+        virtualize(turn, turn.getBoundingClientRect().height);
+      }
+    }
+  }
+
+  function onIntersection(entries) {
+    for (const entry of entries) {
+      const turn = entry.target;
+      if (entry.isIntersecting) {
+        visible.add(turn);
+        if (storedHtml.has(turn)) {
+          restore(turn);
+        }
+      } else {
+        visible.delete(turn);
+        if (!storedHtml.has(turn) && turnCount - turnIndex.get(turn) > LIVE_TURNS) {
+          virtualize(turn, entry.boundingClientRect.height);
+        }
+      }
+    }
+  }
+
+  function virtualize(turn, height) {
+    const placeholder = document.createElement("div");
+    placeholder.className = "turn turn-virtual mb-4";
+    placeholder.style.height = height + "px";
+    turnIndex.set(placeholder, turnIndex.get(turn));
+    storedHtml.set(placeholder, turn.outerHTML);
+
+    observer.unobserve(turn);
+    visible.delete(turn);
+    turn.replaceWith(placeholder);
+    observer.observe(placeholder);
+    dropOldest();
+  }
+
+  function restore(placeholder) {
+    const template = document.createElement("template");
+    template.innerHTML = storedHtml.get(placeholder);
+    const turn = template.content.firstElementChild;
+    turnIndex.set(turn, turnIndex.get(placeholder));
+    storedHtml.delete(placeholder);
+
+    observer.unobserve(placeholder);
+    visible.delete(placeholder);
+    placeholder.replaceWith(turn);
+    observer.observe(turn);
+  }
+
+  function dropOldest() {
+    if (storedHtml.size <= STORED_TURNS) {
+      return;
+    }
+    // Map iteration follows insertion order, which is not the page order
+    // once turns have been restored and virtualized again
+    let oldest = null;
+    for (const placeholder of storedHtml.keys()) {
+      if (oldest === null || turnIndex.get(placeholder) < turnIndex.get(oldest)) {
+        oldest = placeholder;
+      }
+    }
+    observer.unobserve(oldest);
+    storedHtml.delete(oldest);
+    oldest.remove();
+
+    if (!document.getElementById("turns-dropped")) {
+      const note = document.createElement("p");
+      note.id = "turns-dropped";
+      note.className = "text-xs text-gray-400 mb-4";
+      note.textContent = "Earlier messages were removed to save memory.";
+      container.insertBefore(note, container.querySelector(":scope > .turn"));
+    }
+  }
+
+  // ---- Tables ----
+
+  function createTable(columns, title) {
+    const wrapper = document.createElement("div");
+    wrapper.className = "my-2 overflow-x-auto";
+    if (title) {
+      const caption = document.createElement("div");
+      caption.className = "text-sm font-semibold text-gray-700 mb-1";
+      caption.textContent = title;
+      wrapper.appendChild(caption);
+    }
+
+    const table = document.createElement("table");
+    table.className = "min-w-full text-sm text-left border border-gray-200";
+    const headRow = table.createTHead().insertRow();
+    for (const column of columns) {
+      const th = document.createElement("th");
+      th.className = "px-2 py-1 bg-gray-100 border-b border-gray-200";
+      th.textContent = column;
+      headRow.appendChild(th);
+    }
+    wrapper.appendChild(table);
+    return { element: wrapper, body: table.createTBody() };
+  }
+
+  function appendRow(body, cells) {
+    const tr = body.insertRow();
+    for (const value of cells) {
+      const td = tr.insertCell();
+      td.className = "px-2 py-1 border-b border-gray-100";
+      td.textContent = value === null || value === undefined ? "" : String(value);
+    }
+  }
+
+  function isTableRow(line) {
+    return line.trimStart().startsWith("|");
+  }
+
+  function isSeparatorRow(line) {
+    return /^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$/.test(line);
+  }
+
+  function splitCells(line) {
+    let row = line.trim();
+    if (row.startsWith("|")) row = row.slice(1);
+    if (row.endsWith("|")) row = row.slice(0, -1);
+    return row.split("|").map((cell) => cell.trim());
+  }
+
+  // ---- Agent turns ----
+
+  function startAgentTurn() {
+    const wrapper = document.createElement("div");
+    wrapper.className = "mb-4 p-4 bg-blue-50 rounded-lg";
+
+    const label = document.createElement("div");
+    label.className = "text-xs font-semibold text-blue-600 mb-2";
+    label.textContent = "Agent Response:";
+    wrapper.appendChild(label);
+
+    const turn = {
+      wrapper: wrapper,
+      paragraph: null,
+      pending: "",        // chunks received since the last flush
+      carry: "",          // start of a line that may turn out to be a table row
+      midLine: false,     // the last text written ended inside a line
+      header: null,       // possible table header row, waiting for its separator
+      table: null,        // table being filled: {element, body}
+      text: "",           // text to append to the paragraph in this flush
+    };
+    newParagraph(turn);
+    addTurn(wrapper);
+    return turn;
+  }
+
+  function newParagraph(turn) {
+    turn.paragraph = document.createElement("p");
+    turn.paragraph.className = "text-gray-800 whitespace-pre-wrap";
+    turn.wrapper.appendChild(turn.paragraph);
+  }
+
+  function writeText(turn) {
+    if (turn.text) {
+      turn.paragraph.appendChild(document.createTextNode(turn.text));
+      turn.text = "";
+    }
+  }
+
+  // Ends the table in progress; text after it goes into a new paragraph
+  function closeTable(turn) {
+    if (turn.table) {
+      turn.table = null;
+      newParagraph(turn);
+    }
+  }
+
+  function plainLine(turn, line, newline) {
+    if (turn.header !== null) {
+      turn.text += turn.header + "\n";
+      turn.header = null;
+    }
+    closeTable(turn);
+    turn.text += line + (newline ? "\n" : "");
+  }
+
+  function tableLine(turn, line) {
+    if (turn.table) {
+      if (!isSeparatorRow(line)) {
+        appendRow(turn.table.body, splitCells(line));
+      }
+    } else if (turn.header !== null && isSeparatorRow(line)) {
+      writeText(turn);
+      turn.table = createTable(splitCells(turn.header));
+      turn.header = null;
+      turn.wrapper.appendChild(turn.table.element);
+    } else {
+      if (turn.header !== null) {
+        turn.text += turn.header + "\n";
+      }
+      turn.header = line;
+    }
+  }
+
+  // Moves a turn's buffered text into the DOM. Unless `final`, a trailing
+  // partial line that may be a table row is kept back for the next flush.
+  function flushTurn(turn, final) {
+    const lines = (turn.carry + turn.pending).split("\n");
+    turn.carry = "";
+    turn.pending = "";
+    const last = lines.pop();
+
+    lines.forEach(function (line, i) {
+      if (i === 0 && turn.midLine) {
+        turn.text += line + "\n";
+      } else if (isTableRow(line)) {
+        tableLine(turn, line);
+      } else {
+        plainLine(turn, line, true);
+      }
+    });
+    if (lines.length > 0) {
+      turn.midLine = false;
+    }
+
+    if (last) {
+      if (turn.midLine) {
+        turn.text += last;
+      } else if (isTableRow(last)) {
+        if (final) {
+          tableLine(turn, last);
+        } else {
+          turn.carry = last;
+        }
+      } else {
+        plainLine(turn, last, false);
+        turn.midLine = true;
+      }
+    }
+    if (final && turn.header !== null) {
+      plainLine(turn, "", false);
+    }
+    writeText(turn);
+  }
+
+  function flush() {
+    flushScheduled = false;
+    for (const turn of dirty) {
+      flushTurn(turn, false);
+    }
+    dirty.clear();
+    scrollToBottom();
+  }
+
+  function appendChunk(turn, text) {
+    turn.pending += text;
+    dirty.add(turn);
+    if (!flushScheduled) {
+      flushScheduled = true;
+      requestAnimationFrame(flush);
+    }
+  }
+
+  // Writes out everything still buffered for a turn that has ended
+  function finishTurn(turn, suffix) {
+    dirty.delete(turn);
+    flushTurn(turn, true);
+    if (suffix) {
+      turn.paragraph.appendChild(document.createTextNode(suffix));
+    }
+    // One text node per paragraph instead of one per frame
+    turn.wrapper.normalize();
+    scrollToBottom();
+  }
+
+  // Shows a server-built table in the turn, after the text so far
+  function appendTable(turn, table, title) {
+    dirty.delete(turn);
+    flushTurn(turn, true);
+    closeTable(turn);
+    const built = createTable(table.columns, title);
+    for (const row of table.rows) {
+      appendRow(built.body, row);
+    }
+    turn.paragraph.after(built.element);
+    newParagraph(turn);
+    turn.midLine = false;
+    scrollToBottom();
+  }
+
+  return {
+    init: init,
+    addTurn: addTurn,
+    scrollToBottom: scrollToBottom,
+    startAgentTurn: startAgentTurn,
+    appendChunk: appendChunk,
+    appendTable: appendTable,
+    finishTurn: finishTurn,
+  };
+})();
@@ -0,0 +1,240 @@
+#
+# admission.py
+#
+# Admission control for the /ws endpoint.
+#
+# Two budgets are enforced per worker process, each through a FairQueue:
+#
+# - live sessions (MAX_LIVE_SESSIONS): a new connection waits here before an
+#   agent session is started;
+# - running turns (MAX_CONCURRENT_TURNS, at most MAX_TURNS_PER_USER per user):
+#   a prompt waits here before it is sent to the model, which bounds the total
+#   upstream LLM concurrency.
+#
+# Waiters are served round robin across users, so one user with many queued
+# requests cannot starve the others, and they are told their queue position
+# as it changes. Prompts are additionally rate limited per user with a token
+# bucket (USER_PROMPTS_PER_MINUTE, burst USER_PROMPT_BURST).
+#
+# With several uvicorn workers the budgets apply to each worker separately.
+#
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque, defaultdict
+
+from finagent import telemetry
+
+logger = logging.getLogger(__name__)
+
+MAX_LIVE_SESSIONS = int(os.environ.get("MAX_LIVE_SESSIONS", "200"))
+MAX_CONCURRENT_TURNS = int(os.environ.get("MAX_CONCURRENT_TURNS", "32"))
+MAX_TURNS_PER_USER = int(os.environ.get("MAX_TURNS_PER_USER", "1"))
+USER_PROMPTS_PER_MINUTE = float(os.environ.get("USER_PROMPTS_PER_MINUTE", "12"))
+USER_PROMPT_BURST = int(os.environ.get("USER_PROMPT_BURST", "4"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "1000"))
+
+
+class QueueFullError(Exception):
+    """Raised when a FairQueue already has its maximum number of waiters."""
+
+
+class FairQueue:
+    """
+    Concurrency limiter with a global capacity, an optional per-key limit and
+    round-robin service across keys.
+
+    Args:
+        name (str): Label for metrics and logs ("session", "turn")
+        capacity (int): Slots in use at most at any time
+        per_key_limit (int | None): Slots one key may hold at once
+        max_waiting (int): Waiters beyond this are rejected with QueueFullError
+    """
+
+    def __init__(self, name: str, capacity: int, per_key_limit: int | None = None,
+                 max_waiting: int = ADMISSION_MAX_QUEUE):
+        self.name = name
+        self.capacity = capacity
+        self.per_key_limit = per_key_limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self._active_by_key = defaultdict(int)
+        self._waiting = OrderedDict()  # key -> deque of waiters, in service order
+        self._count = 0
+
+    def _can_run(self, key) -> bool:
+        return (
+            self.active < self.capacity
+            and (self.per_key_limit is None or self._active_by_key.get(key, 0) < self.per_key_limit)
+        )
+
+    def _grant(self, key):
+        self.active += 1
+        self._active_by_key[key] += 1
+
+    async def acquire(self, key, on_position=None):
+        """
+        Waits for a slot for `key`.
+
+        Args:
+            key: The user the slot is for
+            on_position: Optional callback called with the 1-based queue position
+                         whenever it changes, and with 0 once admitted
+
+        Raises:
+            QueueFullError: If max_waiting requests are already queued
+        """
+        if not self._waiting and self._can_run(key):
+            self._grant(key)
+            telemetry.QUEUE_WAIT.labels(queue=self.name).observe(0)
+            return
+
+        if self._count >= self.max_waiting:
+            telemetry.ADMISSION_REJECTED.labels(queue=self.name, reason="queue_full").inc()
+            raise QueueFullError(f"{self.name} queue is full ({self._count} waiting)")
+
+        waiter = {
+            "future": asyncio.get_running_loop().create_future(),
+            "on_position": on_position,
+            "position": None,
+        }
+        self._waiting.setdefault(key, deque()).append(waiter)
+        self._count += 1
+        telemetry.QUEUE_DEPTH.labels(queue=self.name).set(self._count)
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await waiter["future"]
+        except asyncio.CancelledError:
+            if waiter["future"].done() and not waiter["future"].cancelled():
+                # Admitted just as the waiter gave up: hand the slot back.
+                self.release(key)
+            else:
+                self._remove(key, waiter)
+            raise
+        telemetry.QUEUE_WAIT.labels(queue=self.name).observe(time.monotonic() - started)
+        if on_position is not None:
+            on_position(0)
+
+    def release(self, key):
+        """Returns a slot held by `key` and admits the next waiter(s)."""
+        self.active -= 1
+        self._active_by_key[key] -= 1
+        if self._active_by_key[key] <= 0:
+            del self._active_by_key[key]
+        self._dispatch()
+
+    def _remove(self, key, waiter):
+        waiters = self._waiting.get(key)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self._count -= 1
+            if not waiters:
+                del self._waiting[key]
+            telemetry.QUEUE_DEPTH.labels(queue=self.name).set(self._count)
+            self._notify_positions()
+
+    def _dispatch(self):
+        """Admits waiters round robin over keys while slots are free."""
+        admitted = True
+        while admitted and self._waiting and self.active < self.capacity:
+            admitted = False
+            for key in list(self._waiting):
+                if not self._can_run(key):
+                    continue
+                waiters = self._waiting[key]
+                waiter = waiters.popleft()
+                self._count -= 1
+                # Served keys go to the back of the rotation.
+                del self._waiting[key]
+                if waiters:
+                    self._waiting[key] = waiters
+                self._grant(key)
+                waiter["future"].set_result(None)
+                admitted = True
+                break
+        telemetry.QUEUE_DEPTH.labels(queue=self.name).set(self._count)
+        self._notify_positions()
+
+    def _notify_positions(self):
+        """
+        Tells every waiter its position: round r of the rotation serves the
+        r-th waiter of each key, in key order.
+        """
+        queues = [list(waiters) for waiters in self._waiting.values()]
+        position = 0
+        depth = 0
+        while queues:
+            for waiters in queues:
+                position += 1
+                waiter = waiters[depth]
+                if position != waiter["position"]:
+                    waiter["position"] = position
+                    if waiter["on_position"] is not None:
+                        try:
+                            waiter["on_position"](position)
+                        except Exception as e:
+                            logger.debug("Queue position callback failed: %s", e)
+            depth += 1
+            queues = [waiters for waiters in queues if len(waiters) > depth]
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Takes one token. Returns 0 on success, otherwise the seconds until a
+        token is available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class AdmissionController:
+    """The session and turn queues plus the per-user prompt rate limit."""
+
+    def __init__(self):
+        self.sessions = FairQueue("session", MAX_LIVE_SESSIONS)
+        self.turns = FairQueue("turn", MAX_CONCURRENT_TURNS, per_key_limit=MAX_TURNS_PER_USER)
+        self._buckets = {}
+
+    def check_prompt_rate(self, user_id: str) -> float:
+        """
+        Applies the per-user prompt rate limit.
+
+        Returns:
+            float: 0 if the prompt may proceed, otherwise seconds to wait
+        """
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) > 10_000:
+                self._prune_buckets()
+            bucket = self._buckets[user_id] = TokenBucket(USER_PROMPTS_PER_MINUTE / 60, USER_PROMPT_BURST)
+        retry_after = bucket.take()
+        if retry_after:
+            telemetry.ADMISSION_REJECTED.labels(queue="turn", reason="rate_limited").inc()
+        return retry_after
+
+    def _prune_buckets(self):
+        """Drops buckets that have refilled completely; they are recreated on demand."""
+        now = time.monotonic()
+        for user_id, bucket in list(self._buckets.items()):
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.burst:
+                del self._buckets[user_id]
+
+
+admission = AdmissionController()
@@ -0,0 +1,205 @@
+#
+# assets.py
+#
+# In-memory static asset serving for the streaming app.
+#
+# At startup every file under static/ is read once, hashed and, for text
+# types, precompressed with gzip (and brotli when the `brotli` package is
+# installed). Requests are then answered from memory:
+#
+# - each file is also served under a content-hashed name, e.g.
+#   /static/js/app.3f2a1b9c.js, with "Cache-Control: immutable" for a year;
+#   index.html refers to the hashed names, so browsers fetch a changed file
+#   after a deploy and never revalidate an unchanged one;
+# - the unhashed URLs (/, /app.js, /static/...) stay available with
+#   "Cache-Control: no-cache": browsers revalidate them with If-None-Match
+#   and get a 304 while the file is unchanged;
+# - the encoding is negotiated from Accept-Encoding (br, gzip, identity).
+#
+# Requirements:
+# - brotli (optional): pip install brotli
+#
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import re
+from pathlib import Path
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Only these types are worth compressing; images and fonts already are.
+_COMPRESSIBLE = re.compile(r"^(text/|application/(javascript|json|xml)|image/svg\+xml)")
+_MIN_COMPRESS_BYTES = 256
+
+
+class Asset:
+    """
+    One preloaded file and its encoded variants.
+
+    Args:
+        path (str): Path relative to the static directory, e.g. "js/app.js"
+        media_type (str): Content-Type of the file
+        body (bytes): File contents
+    """
+
+    def __init__(self, path: str, media_type: str, body: bytes):
+        self.path = path
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()
+        # content-coding -> bytes
+        self.bodies = _compress(body) if _COMPRESSIBLE.match(media_type) else {"identity": body}
+
+    @property
+    def hashed_path(self) -> str:
+        stem, dot, suffix = self.path.rpartition(".")
+        if not dot or "/" in suffix:
+            return f"{self.path}.{self.digest[:8]}"
+        return f"{stem}.{self.digest[:8]}.{suffix}"
+
+    def etag(self, encoding: str) -> str:
+        # Strong validators differ per content-coding.
+        return f'"{self.digest[:16]}"' if encoding == "identity" else f'"{self.digest[:16]}-{encoding}"'
+
+
+def _compress(body: bytes) -> dict:
+    bodies = {"identity": body}
+    if len(body) < _MIN_COMPRESS_BYTES:
+        return bodies
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(compressed) < len(body):
+        bodies["gzip"] = compressed
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11)
+        if len(compressed) < len(body):
+            bodies["br"] = compressed
+    return bodies
+
+
+def _accepted_encodings(header: str) -> set:
+    """Codings the client accepts (q > 0); identity is always acceptable."""
+    accepted = {"identity"}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = re.search(r"q=([\d.]+)", params)
+        if coding and not (quality and float(quality.group(1)) == 0):
+            accepted.add(coding)
+    return accepted
+
+
+class AssetStore:
+    """
+    Preloaded files of a static directory.
+
+    Args:
+        static_dir (Path): Directory to serve
+        aliases (dict): Extra URL paths (as written in HTML) for files, e.g.
+                        {"/app.js": "js/app.js"}
+    """
+
+    def __init__(self, static_dir: Path, aliases: dict | None = None):
+        self.static_dir = Path(static_dir)
+        self.aliases = aliases or {}
+        self._by_path = {}
+        self._by_hashed_path = {}
+
+    def load(self):
+        """Reads, hashes and compresses every file; HTML is loaded last so it can refer to hashed names."""
+        self._by_path.clear()
+        self._by_hashed_path.clear()
+        if not self.static_dir.is_dir():
+            logger.warning("Static directory not found at %s", self.static_dir)
+            return
+
+        files = sorted(p for p in self.static_dir.rglob("*") if p.is_file())
+        html = [p for p in files if p.suffix == ".html"]
+        for file in [p for p in files if p.suffix != ".html"] + html:
+            body = file.read_bytes()
+            if file.suffix == ".html":
+                body = self._link_hashed(body)
+            self._add(file.relative_to(self.static_dir).as_posix(), body)
+
+        total = sum(len(a.bodies["identity"]) for a in self._by_path.values())
+        logger.info("Preloaded %d static file(s), %d bytes", len(self._by_path), total)
+
+    def _add(self, path: str, body: bytes):
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+        asset = Asset(path, media_type, body)
+        self._by_path[path] = asset
+        self._by_hashed_path[asset.hashed_path] = asset
+
+    def _link_hashed(self, html: bytes) -> bytes:
+        """Points the HTML's references to loaded files at their hashed URLs."""
+        text = html.decode("utf-8")
+        references = {f"/static/{path}": asset for path, asset in self._by_path.items()}
+        references.update(
+            (url, self._by_path[path]) for url, path in self.aliases.items() if path in self._by_path
+        )
+        for url, asset in references.items():
+            text = re.sub(
+                r'(?<=["\'])' + re.escape(url) + r'(?=["\'])',
+                self.url_for(asset.path),
+                text,
+            )
+        return text.encode("utf-8")
+
+    def get(self, path: str) -> tuple[Asset | None, bool]:
+        """
+        Looks up a request path relative to the static directory.
+
+        Returns:
+            tuple: (asset or None, whether the path was the hashed, immutable name)
+        """
+        asset = self._by_hashed_path.get(path)
+        if asset is not None:
+            return asset, True
+        return self._by_path.get(path), False
+
+    def url_for(self, path: str) -> str:
+        """Hashed URL of a file, e.g. url_for("js/app.js") -> "/static/js/app.3f2a1b9c.js"."""
+        asset = self._by_path.get(path)
+        return f"/static/{asset.hashed_path if asset else path}"
+
+    def response(self, request: Request, path: str) -> Response:
+        """Serves `path` (hashed or not) for `request`, honouring If-None-Match and Accept-Encoding."""
+        asset, immutable = self.get(path)
+        if asset is None:
+            return Response(status_code=404)
+
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        encoding = next((e for e in ("br", "gzip") if e in asset.bodies and e in accepted), "identity")
+        headers = {
+            "ETag": asset.etag(encoding),
+            "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+        }
+        if len(asset.bodies) > 1:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or tags & {asset.etag(e) for e in asset.bodies}:
+                return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        body = asset.bodies[encoding]
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(content=body, headers=headers, media_type=asset.media_type)
@@ -0,0 +1,197 @@
+#
+# dedup.py
+#
+# Request-level deduplication of identical opening prompts (opt-in).
+#
+# Around the open many users send the same "morning brief" or "AAPL, MSFT"
+# prompt within seconds, and each one would run a full agent turn. With
+# PROMPT_DEDUP=1 the first prompt of a fresh session is keyed on its normalized
+# text plus the trading date:
+#
+# - the first session with a new key runs the turn as usual and becomes the
+#   leader: its pump publishes the text and the data tables (see
+#   tool_tables.py) it streams to the SharedTurn;
+# - sessions sending the same prompt while that turn is in flight subscribe to
+#   it, get the text and tables streamed so far and then follow it live,
+#   without taking a turn slot or calling the model;
+# - for DEDUP_TTL_SECONDS after completion the transcript is served from the
+#   cache.
+#
+# Only the first prompt of a session is shared, since later answers depend on
+# the conversation. The shared exchange is not in the subscriber's own agent
+# history, so it is passed along with that session's next prompt (see
+# `context_note`). If the leader's turn is interrupted, each subscriber's
+# `fallback` is called so it can run the prompt itself.
+#
+# Configuration (environment variables):
+#   PROMPT_DEDUP         "1" to enable (default off)
+#   DEDUP_TTL_SECONDS    how long completed transcripts are served (default 60)
+#   DEDUP_MAX_ENTRIES    completed transcripts kept at most (default 256)
+#
+
+import asyncio
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+
+from finagent import telemetry
+from finagent.market_calendar import last_trading_day
+
+logger = logging.getLogger(__name__)
+
+PROMPT_DEDUP = os.environ.get("PROMPT_DEDUP", "0").lower() in ("1", "true", "yes")
+DEDUP_TTL_SECONDS = float(os.environ.get("DEDUP_TTL_SECONDS", "60"))
+DEDUP_MAX_ENTRIES = int(os.environ.get("DEDUP_MAX_ENTRIES", "256"))
+
+# Words, tickers ("^GSPC", "BRK.B", "DX-Y.NYB") and numbers; everything else
+# (spacing, commas, trailing punctuation) is ignored when comparing prompts.
+_TOKEN_RE = re.compile(r"[\w^$-]+(?:\.[\w-]+)*")
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Reduces a prompt to the form used for matching, so "AAPL, MSFT" and
+    "aapl msft." share a key.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(_TOKEN_RE.findall(text))
+
+
+def prompt_key(text: str) -> str | None:
+    """Dedup key for a prompt: trading date plus the normalized text."""
+    normalized = normalize_prompt(text)
+    if not normalized:
+        return None
+    return f"{last_trading_day().isoformat()}|{normalized}"
+
+
+def context_note(prompt: str, answer: str) -> str:
+    """
+    Text that carries a shared exchange into the subscriber's next prompt,
+    since it is not part of that session's agent history.
+    """
+    return (
+        "For context, earlier in this conversation the user asked:\n"
+        f"{prompt}\n"
+        "and you answered:\n"
+        f"{answer}\n\n"
+        "The user's next message follows.\n\n"
+    )
+
+
+class SharedTurn:
+    """
+    One agent turn whose streamed text and tables are shared by several sessions.
+
+    Args:
+        key (str): Dedup key of the prompt
+        prompt (str): The leader's prompt, as sent
+    """
+
+    def __init__(self, key: str, prompt: str):
+        self.key = key
+        self.prompt = prompt
+        self.chunks = []
+        self.frames = []  # ("text", text) or ("table", table, title), in stream order
+        self.subscribers = []  # (LiveSession, fallback)
+        self.done = asyncio.Event()
+        self.interrupted = False
+        self.completed_at = None
+
+    @property
+    def transcript(self) -> str:
+        return "".join(self.chunks)
+
+    def publish(self, text: str):
+        """Records a text chunk from the leader and forwards it to subscribers."""
+        self.chunks.append(text)
+        self.frames.append(("text", text))
+        for live, _ in self.subscribers:
+            if not live.closed:
+                live.outbound.send_text(text)
+
+    def publish_table(self, table: dict, title: str):
+        """Records a data table sent by the leader and forwards it to subscribers."""
+        self.frames.append(("table", table, title))
+        for live, _ in self.subscribers:
+            if not live.closed:
+                live.outbound.send_table(table, title=title)
+
+    def subscribe(self, live, fallback=None):
+        """
+        Streams this turn to `live`: the text and tables so far at once, the
+        rest as it arrives (or everything, if the turn already completed).
+
+        Args:
+            live (LiveSession): The subscribing session
+            fallback: Called with `live` if the leader's turn is interrupted
+        """
+        for kind, *frame in self.frames:
+            if kind == "text":
+                live.outbound.send_text(*frame)
+            else:
+                table, title = frame
+                live.outbound.send_table(table, title=title)
+        if self.done.is_set():
+            live.outbound.send_message({"turn_complete": True, "interrupted": False})
+        else:
+            self.subscribers.append((live, fallback))
+
+    def finish(self, interrupted: bool = False):
+        """Ends the turn for every subscriber."""
+        self.interrupted = interrupted
+        self.completed_at = time.monotonic()
+        self.done.set()
+        subscribers, self.subscribers = self.subscribers, []
+        for live, fallback in subscribers:
+            if live.closed:
+                continue
+            live.outbound.send_message({"turn_complete": not interrupted, "interrupted": interrupted})
+            if interrupted and fallback is not None:
+                telemetry.PROMPT_DEDUP.labels(outcome="fallback").inc()
+                fallback(live)
+
+
+class PromptDedup:
+    """Registry of in-flight and recently completed shared turns."""
+
+    def __init__(self, ttl: float = DEDUP_TTL_SECONDS, max_entries: int = DEDUP_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._in_flight = {}
+        self._completed = OrderedDict()
+
+    def lookup(self, key: str) -> SharedTurn | None:
+        """Returns the in-flight turn for `key`, or its completed turn while fresh."""
+        turn = self._in_flight.get(key)
+        if turn is not None:
+            return turn
+        turn = self._completed.get(key)
+        if turn is not None and time.monotonic() - turn.completed_at > self.ttl:
+            del self._completed[key]
+            return None
+        return turn
+
+    def lead(self, key: str, prompt: str) -> SharedTurn:
+        """Registers a new in-flight turn for `key`."""
+        turn = SharedTurn(key, prompt)
+        self._in_flight[key] = turn
+        return turn
+
+    def finish(self, turn: SharedTurn, interrupted: bool = False):
+        """Ends `turn`; a completed (not interrupted) transcript is cached."""
+        if self._in_flight.get(turn.key) is turn:
+            del self._in_flight[turn.key]
+        turn.finish(interrupted)
+        if interrupted or not turn.chunks or self.ttl <= 0:
+            return
+        self._completed[turn.key] = turn
+        self._completed.move_to_end(turn.key)
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+
+prompt_dedup = PromptDedup()
@@ -0,0 +1,284 @@
+#
+# outbound.py
+#
+# Per-connection outbound queue for the agent-to-client WebSocket stream.
+#
+# The agent emits one partial event per few tokens. Sending each of them as its
+# own frame produces thousands of tiny frames per brief, and when a client reads
+# slowly the frames pile up in memory without limit. OutboundStream sits between
+# the agent and the socket:
+#
+# - partial text is coalesced into one frame per time window (default 30 ms) or
+#   once it reaches a size threshold (default 4 KB), whichever comes first;
+# - control messages (turn_complete, interrupted, ...) and full tables flush
+#   pending text first and are sent immediately, preserving order;
+# - the bytes buffered per client are bounded; a client that falls behind is
+#   either disconnected ("close") or has new text dropped ("drop").
+#
+# With a `journal` (see resume.py) every frame is recorded with a sequence
+# number before it is queued, and the socket can be detached and re-attached:
+# while detached frames only go to the journal, and on attach the frames the
+# client missed are replayed from it. In this mode a failing or slow socket
+# only ends the current attachment; the producer keeps running.
+#
+# Frames are encoded with the codec negotiated for the attached socket (JSON
+# or msgpack, see protocol.py).
+#
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+from streaming.protocol import JSON, TABLE_MIME_TYPE
+
+FLUSH_INTERVAL = float(os.environ.get("OUTBOUND_FLUSH_MS", "30")) / 1000
+MAX_FRAME_BYTES = int(os.environ.get("OUTBOUND_FRAME_BYTES", "4096"))
+MAX_BUFFER_BYTES = int(os.environ.get("OUTBOUND_MAX_BUFFER_BYTES", str(1024 * 1024)))
+SEND_TIMEOUT = float(os.environ.get("OUTBOUND_SEND_TIMEOUT", "10"))
+SLOW_CONSUMER_POLICY = os.environ.get("OUTBOUND_SLOW_POLICY", "close")  # "close" or "drop"
+
+# WebSocket close code for "try again later", used for slow consumers.
+CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class SlowConsumerError(Exception):
+    """Raised when a client cannot keep up and was disconnected by policy."""
+
+
+class OutboundStream:
+    """
+    Coalescing, memory-bounded sender for one WebSocket connection.
+
+    Producers call `send_text` / `send_message` (both non-blocking). A writer
+    task started with `start()` performs the socket writes; `aclose()` drains
+    it and disconnects the client if it was flagged as a slow consumer.
+    """
+
+    def __init__(
+        self,
+        websocket=None,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_frame_bytes: int = MAX_FRAME_BYTES,
+        max_buffer_bytes: int = MAX_BUFFER_BYTES,
+        slow_policy: str = SLOW_CONSUMER_POLICY,
+        send_timeout: float = SEND_TIMEOUT,
+        journal=None,
+        codec=JSON,
+    ):
+        self.websocket = websocket
+        self.codec = codec
+        self.journal = journal
+        self.flush_interval = flush_interval
+        self.max_frame_bytes = max_frame_bytes
+        self.max_buffer_bytes = max_buffer_bytes
+        self.slow_policy = slow_policy
+        self.send_timeout = send_timeout
+
+        self._pending = []  # partial text not yet cut into a frame
+        self._pending_bytes = 0
+        self._pending_since = None
+        self._ready = deque()  # (message, size) waiting to be written
+        self._buffered_bytes = 0
+        self._dropped_bytes = 0
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._writer = None
+        self._failed = None  # future for the current attachment (journal mode)
+        self.error = None
+
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    # Producer side
+
+    def send_text(self, text: str):
+        """Queues a partial text chunk for coalescing."""
+        self.check()
+        size = len(text.encode("utf-8"))
+        if self._buffered_bytes + size > self.max_buffer_bytes and self._on_overflow(size):
+            return
+
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        self._pending.append(text)
+        self._pending_bytes += size
+        self._buffered_bytes += size
+        if self._pending_bytes >= self.max_frame_bytes:
+            self._cut_frame()
+        self._wakeup.set()
+
+    def send_message(self, message: dict):
+        """Queues a control message; pending text is flushed ahead of it."""
+        self.check()
+        self._cut_frame()
+        size = len(json.dumps(message))
+        self._buffered_bytes += size
+        self._enqueue(message, size)
+        self._wakeup.set()
+
+    def send_table(self, table: dict, **fields):
+        """
+        Queues a full table ({"columns": [...], "rows": [[...]]}) as one typed
+        frame; extra `fields` (e.g. title) go into the frame.
+        """
+        self.send_message({"mime_type": TABLE_MIME_TYPE, "data": table, **fields})
+
+    def check(self):
+        """
+        Raises the writer's error, if any, so the producer stops early. In
+        journal mode socket errors never reach the producer.
+        """
+        if self.error is not None and self.journal is None:
+            raise self.error
+
+    # Attachments (journal mode)
+
+    def attach(self, websocket, replay=(), codec=JSON):
+        """
+        Sends to `websocket` from now on, encoded with `codec`, starting with
+        the `replay` frames (already journaled ones the client has not seen).
+        """
+        self.detach()
+        self.websocket = websocket
+        self.codec = codec
+        self.error = None
+        for message in replay:
+            size = len(json.dumps(message))
+            self._ready.append((message, size))
+            self._buffered_bytes += size
+        self._failed = asyncio.get_running_loop().create_future()
+        if self._writer is None or self._writer.done():
+            self.start()
+        self._wakeup.set()
+
+    def detach(self):
+        """Stops sending; frames queued for the old socket stay in the journal."""
+        self.websocket = None
+        while self._ready:
+            _, size = self._ready.popleft()
+            self._buffered_bytes -= size
+        self._dropped_bytes = 0
+
+    async def wait_failed(self) -> Exception:
+        """Waits until the current attachment fails and returns the error."""
+        return await asyncio.shield(self._failed)
+
+    # Lifecycle
+
+    def start(self):
+        """Starts the writer task."""
+        self._writer = asyncio.create_task(self._run())
+
+    async def aclose(self, drain_timeout: float = 5.0):
+        """
+        Flushes what is queued and stops the writer. A client flagged as a slow
+        consumer is disconnected with close code 1013 instead.
+        """
+        self._closing = True
+        self._wakeup.set()
+        if self._writer is not None:
+            try:
+                await asyncio.wait_for(self._writer, drain_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self.error = self.error or SlowConsumerError("could not drain before close")
+            except Exception:
+                pass
+
+        if isinstance(self.error, SlowConsumerError) and self.websocket is not None:
+            try:
+                await self.websocket.close(code=CLOSE_TRY_AGAIN_LATER, reason="slow consumer")
+            except Exception:
+                pass
+
+    # Writer
+
+    async def _run(self):
+        try:
+            while self.error is None or self.journal is not None:
+                if not self._ready and not self._pending:
+                    if self._closing:
+                        return
+                    await self._wait()
+                    continue
+
+                if not self._ready:
+                    remaining = self._pending_since + self.flush_interval - time.monotonic()
+                    if remaining > 0 and not self._closing:
+                        await self._wait(remaining)
+                        continue
+                    self._cut_frame()
+                    if not self._ready:
+                        continue  # detached: the frame went to the journal only
+
+                message, size = self._ready.popleft()
+                self._buffered_bytes -= size
+                payload = self.codec.encode(message)
+                send = self.websocket.send_bytes if self.codec.binary else self.websocket.send_text
+                try:
+                    await asyncio.wait_for(send(payload), self.send_timeout)
+                except asyncio.TimeoutError:
+                    self._fail(SlowConsumerError(f"send blocked for more than {self.send_timeout}s"))
+                    continue
+                except Exception as e:
+                    if self.journal is None:
+                        raise
+                    self._fail(e)
+                    continue
+                self.frames_sent += 1
+                self.bytes_sent += len(payload)
+        except Exception as e:
+            self.error = self.error or e
+
+    async def _wait(self, timeout: float | None = None):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    # Internals
+
+    def _cut_frame(self):
+        if not self._pending:
+            return
+        message = {"mime_type": "text/plain", "data": "".join(self._pending)}
+        if self._dropped_bytes:
+            message["dropped"] = self._dropped_bytes
+            self._dropped_bytes = 0
+        size = self._pending_bytes
+        self._pending = []
+        self._pending_bytes = 0
+        self._pending_since = None
+        self._enqueue(message, size)
+
+    def _enqueue(self, message: dict, size: int):
+        """Journals the frame and queues it for the socket, if one is attached."""
+        if self.journal is not None:
+            self.journal.append(message)
+        if self.websocket is None:
+            self._buffered_bytes -= size
+            return
+        self._ready.append((message, size))
+
+    def _fail(self, error: Exception):
+        self.error = error
+        if self.journal is not None:
+            self.detach()
+            if self._failed is not None and not self._failed.done():
+                self._failed.set_result(error)
+
+    def _on_overflow(self, size: int) -> bool:
+        """Handles a client over its buffer limit; returns True if the chunk was dropped."""
+        if self.journal is not None:
+            # The client can reconnect and resume from the journal.
+            self._fail(SlowConsumerError(f"client buffered more than {self.max_buffer_bytes} bytes"))
+            self._wakeup.set()
+            return False
+        if self.slow_policy == "drop":
+            self._dropped_bytes += size
+            return True
+        self.error = SlowConsumerError(f"client buffered more than {self.max_buffer_bytes} bytes")
+        self._wakeup.set()
+        raise self.error
@@ -0,0 +1,119 @@
+#
+# protocol.py
+#
+# Wire formats of the /ws endpoint.
+#
+# The client lists the formats it understands in the WebSocket subprotocol
+# header (Sec-WebSocket-Protocol), most preferred first, and the server
+# accepts the first one it supports:
+#
+# - "finagent.msgpack.v2": every frame is a binary frame holding one
+#   msgpack-encoded message; offered only when the `msgpack` package is
+#   installed;
+# - "finagent.json.v1": every frame is a text frame holding one JSON message.
+#   This is also what clients that send no subprotocol get, so older pages
+#   keep working.
+#
+# The messages themselves are the same maps in both formats, e.g.
+# {"mime_type": "text/plain", "data": "...", "seq": 12}. Full tables have
+# their own message type instead of being streamed as text:
+#
+#   {"mime_type": "application/x-table", "data": {"columns": [...], "rows": [[...]]}, "title": "..."}
+#
+# Frames in either direction are decoded by their type (binary: msgpack,
+# text: JSON), so a client may always fall back to JSON text frames.
+# permessage-deflate is negotiated by the server (see main.py) on top of both.
+#
+# Requirements:
+# - msgpack (optional): pip install msgpack
+#
+
+import json
+
+from starlette.websockets import WebSocketDisconnect
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_PROTOCOL = "finagent.json.v1"
+MSGPACK_PROTOCOL = "finagent.msgpack.v2"
+
+TABLE_MIME_TYPE = "application/x-table"
+
+
+class JsonCodec:
+    """JSON text frames."""
+
+    protocol = JSON_PROTOCOL
+    binary = False
+
+    def encode(self, message: dict) -> str:
+        return json.dumps(message)
+
+
+class MsgpackCodec:
+    """msgpack binary frames."""
+
+    protocol = MSGPACK_PROTOCOL
+    binary = True
+
+    def encode(self, message: dict) -> bytes:
+        return msgpack.packb(message, use_bin_type=True)
+
+
+JSON = JsonCodec()
+
+# Supported protocols, most compact first.
+CODECS = {JSON_PROTOCOL: JSON}
+if msgpack is not None:
+    CODECS = {MSGPACK_PROTOCOL: MsgpackCodec(), **CODECS}
+
+
+def negotiate(offered: list[str]) -> tuple[JsonCodec | MsgpackCodec, str | None]:
+    """
+    Picks the client's most preferred protocol that the server supports.
+
+    Args:
+        offered (list[str]): Subprotocols requested by the client, in its order
+
+    Returns:
+        tuple: (codec, subprotocol to accept, or None if the client offered none
+               we support; it then gets JSON)
+    """
+    for protocol in offered:
+        if protocol in CODECS:
+            return CODECS[protocol], protocol
+    return JSON, None
+
+
+async def send_message(websocket, codec, message: dict):
+    """Sends one message in the connection's format."""
+    payload = codec.encode(message)
+    if codec.binary:
+        await websocket.send_bytes(payload)
+    else:
+        await websocket.send_text(payload)
+
+
+def decode_frame(frame: dict) -> dict:
+    """Decodes a "websocket.receive" ASGI message: binary frames are msgpack, text frames JSON."""
+    if frame.get("bytes") is not None:
+        if msgpack is None:
+            raise ValueError("binary frame received but msgpack is not installed")
+        return msgpack.unpackb(frame["bytes"], raw=False)
+    return json.loads(frame["text"])
+
+
+async def receive_message(websocket) -> dict:
+    """
+    Receives and decodes the next message.
+
+    Raises:
+        WebSocketDisconnect: When the client disconnects
+    """
+    frame = await websocket.receive()
+    if frame["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(frame.get("code", 1000), frame.get("reason"))
+    return decode_frame(frame)
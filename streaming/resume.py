@@ -0,0 +1,230 @@
+#
+# resume.py
+#
+# Resumable agent streams.
+#
+# A LiveSession owns one agent run (live_events + LiveRequestQueue) and its
+# OutboundStream, independently of any particular WebSocket. Every outbound
+# frame gets a sequence number ("seq") and is kept in a bounded ReplayBuffer.
+#
+# When the socket drops, the session is detached but the agent keeps running
+# for a grace period (RESUME_GRACE_SECONDS, default 30). A client that
+# reconnects with ?last_seq=N within that window is re-attached and receives
+# every frame after N before the live stream continues. The first frame on each
+# connection reports the outcome:
+#
+#   {"stream": "new" | "replayed" | "reset", "last_seq": <newest seq>, "replayed": <frames>}
+#
+# "reset" means the frames after N are no longer buffered (or the session ended
+# in the meantime), so the client should consider the message in progress
+# incomplete.
+#
+# Sessions are kept per worker process: a reconnect that reaches another worker
+# cannot replay frames. While this worker still runs the session (including
+# the grace period), the stored ADK session is marked as its own and the
+# other worker starts a fallback session instead (see sessions.py).
+#
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+
+from streaming.outbound import OutboundStream
+from streaming.protocol import JSON
+
+logger = logging.getLogger(__name__)
+
+RESUME_GRACE_SECONDS = float(os.environ.get("RESUME_GRACE_SECONDS", "30"))
+REPLAY_BUFFER_FRAMES = int(os.environ.get("REPLAY_BUFFER_FRAMES", "2048"))
+REPLAY_BUFFER_BYTES = int(os.environ.get("REPLAY_BUFFER_BYTES", str(2 * 1024 * 1024)))
+
+# WebSocket close code sent to a connection replaced by a newer one.
+CLOSE_SUPERSEDED = 4001
+
+# key -> LiveSession for this worker process
+_live_sessions = {}
+
+
+class ReplayBuffer:
+    """Ring buffer of the most recent outbound frames, numbered from 1."""
+
+    def __init__(self, max_frames: int = REPLAY_BUFFER_FRAMES, max_bytes: int = REPLAY_BUFFER_BYTES):
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.last_seq = 0
+        self._frames = deque()  # (seq, message, size)
+        self._bytes = 0
+
+    def append(self, message: dict) -> int:
+        """Stamps `message` with the next seq and stores it."""
+        self.last_seq += 1
+        message["seq"] = self.last_seq
+        data = message.get("data")
+        if isinstance(data, str):
+            size = len(data)
+        else:
+            # Control messages are small; tables are not
+            size = len(json.dumps(data)) if data else 64
+        self._frames.append((self.last_seq, message, size))
+        self._bytes += size
+        while self._frames and (len(self._frames) > self.max_frames or self._bytes > self.max_bytes):
+            _, _, evicted = self._frames.popleft()
+            self._bytes -= evicted
+        return self.last_seq
+
+    def since(self, last_seq: int) -> list[dict] | None:
+        """
+        Returns the frames after `last_seq`, or None if some of them were
+        already evicted.
+        """
+        if last_seq > self.last_seq:
+            return None  # seq from an earlier run of this session
+        if last_seq == self.last_seq:
+            return []
+        if not self._frames or self._frames[0][0] > last_seq + 1:
+            return None
+        return [message for seq, message, _ in self._frames if seq > last_seq]
+
+
+class LiveSession:
+    """
+    One agent run that outlives individual WebSocket connections.
+
+    Args:
+        key (str): Registry key (the WebSocket user id)
+        session: The ADK session
+        live_request_queue (LiveRequestQueue): Input queue of the run
+        on_close: Optional coroutine function called with the LiveSession
+                  once it is closed
+        grace (float): Seconds to keep running without a connection
+    """
+
+    def __init__(self, key: str, session, live_request_queue, on_close=None, grace: float = RESUME_GRACE_SECONDS):
+        self.key = key
+        self.session = session
+        self.live_request_queue = live_request_queue
+        self.replay = ReplayBuffer()
+        self.outbound = OutboundStream(journal=self.replay)
+        self.websocket = None
+        self.debug = False
+        self.pump = None
+        # Task renewing the stored session's ownership marker (see
+        # sessions.py), if any
+        self.heartbeat = None
+        # Admitted turns (see admission.py) that have not completed yet
+        self.turns_admitted = 0
+        # Prompts sent so far, and the shared turn (see dedup.py) this session
+        # leads or follows, if any
+        self.prompts_sent = 0
+        self.shared_turn = None
+        self.joined_turn = None
+        self.closed = False
+        self.grace = grace
+        self._on_close = on_close
+        self._expiry = None
+
+    def start(self, pump):
+        """Registers the session and runs `pump` (the agent-to-outbound coroutine)."""
+        _live_sessions[self.key] = self
+        self.outbound.start()
+        self.pump = asyncio.create_task(pump)
+
+    async def attach(self, websocket, last_seq: int | None = None, debug: bool = False, codec=JSON) -> str:
+        """
+        Makes `websocket` the session's connection, replacing any previous one,
+        and replays the frames after `last_seq`. Frames are encoded with
+        `codec` (see protocol.py).
+
+        Returns:
+            str: "new", "replayed" or "reset"
+        """
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+
+        previous = self.websocket
+        if previous is not None and previous is not websocket:
+            self.outbound.detach()
+            try:
+                await previous.close(code=CLOSE_SUPERSEDED, reason="resumed on a new connection")
+            except Exception:
+                pass
+
+        replay = [] if last_seq is None else self.replay.since(last_seq)
+        if last_seq is None:
+            outcome = "new"
+        elif replay is None:
+            outcome, replay = "reset", []
+        else:
+            outcome = "replayed"
+
+        # The status frame goes first and is not journaled. Nothing awaits
+        # between reading the buffer and attaching, so no frame is missed.
+        status = {
+            "stream": outcome,
+            "last_seq": self.replay.last_seq if outcome != "replayed" else last_seq,
+            "replayed": len(replay),
+        }
+        self.websocket = websocket
+        self.debug = debug
+        self.outbound.attach(websocket, [status, *replay], codec=codec)
+        return outcome
+
+    def detach(self, websocket):
+        """
+        Called when `websocket` disconnects. The agent keeps running for the
+        grace period unless a new connection attaches.
+        """
+        if self.websocket is not websocket or self.closed:
+            return
+        self.websocket = None
+        self.outbound.detach()
+        self._expiry = asyncio.create_task(self._expire())
+
+    async def _expire(self):
+        await asyncio.sleep(self.grace)
+        logger.info("No reconnect for session %s within %ss, closing", self.key, self.grace)
+        self._expiry = None
+        await self.close()
+
+    async def close(self):
+        """Stops the agent run and releases the session."""
+        if self.closed:
+            return
+        self.closed = True
+        if _live_sessions.get(self.key) is self:
+            del _live_sessions[self.key]
+        if self._expiry is not None:
+            self._expiry.cancel()
+            self._expiry = None
+
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+        self.live_request_queue.close()
+        if self.pump is not None and not self.pump.done():
+            self.pump.cancel()
+            try:
+                await self.pump
+            except BaseException:
+                pass
+        await self.outbound.aclose()
+        if self._on_close is not None:
+            await self._on_close(self)
+
+
+def get_live_session(key: str) -> LiveSession | None:
+    """Returns the running session for `key` in this worker, if any."""
+    live = _live_sessions.get(key)
+    if live is not None and live.pump is not None and live.pump.done():
+        # The agent run ended on its own; release it instead of resuming.
+        asyncio.create_task(live.close())
+        return None
+    return live
+
+
+async def close_live_sessions():
+    """Closes every session of this worker, e.g. at shutdown."""
+    for live in list(_live_sessions.values()):
+        await live.close()
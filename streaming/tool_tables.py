@@ -0,0 +1,131 @@
+#
+# tool_tables.py
+#
+# Data tables sent to the client straight from tool results.
+#
+# The numeric sections of a brief (commodities, world indices, market movers)
+# are tables the tools already return in columnar form. Instead of waiting for
+# the model to digest the JSON and narrate it, each whitelisted tool result is
+# sent as an application/x-table message (see protocol.py) the moment the tool
+# returns, so the tables appear after roughly the slowest data fetch. The
+# model's text follows as usual.
+#
+# The data tools run inside sub-agents behind AgentTool, whose events never
+# reach the root agent's live event stream; the results are therefore taken
+# from the instrumented tool wrappers (finagent/instrumentation.py), which
+# report to a listener set per connection. Results of load_brief_snapshot are
+# split into one table per whitelisted section.
+#
+# Each table is sent once per turn, even if a tool is called again. Tables of a
+# turn shared through prompt deduplication are passed on to the subscribed
+# sessions as well (see dedup.py).
+#
+# Configuration (environment variables):
+#   TOOL_TABLES    "0" disables the tables (default "1")
+#
+
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+TOOL_TABLES = os.environ.get("TOOL_TABLES", "1") != "0"
+
+# Whitelisted tools and the title of their table.
+TABLE_TOOLS = {
+    "fetch_commodity_data": "Commodities",
+    "scrape_world_indices": "World indices",
+    "scrape_tradingview_market_movers_async": "Market movers",
+    # Snapshot sections are keyed by the sync variant's name.
+    "scrape_tradingview_market_movers": "Market movers",
+}
+
+SNAPSHOT_TOOL = "load_brief_snapshot"
+
+
+def _as_table(result) -> dict | None:
+    """The {"columns", "rows"} part of a columnar tool result, or None."""
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return None
+    if not isinstance(result, dict) or not result.get("rows") or "columns" not in result:
+        return None
+    return {"columns": result["columns"], "rows": result["rows"]}
+
+
+def tool_tables(tool: str, result) -> list[tuple[str, str, dict]]:
+    """
+    Extracts the tables to show for one tool result.
+
+    Args:
+        tool (str): Name of the function tool
+        result: Its result (normally a JSON string)
+
+    Returns:
+        list[tuple]: (table key, title, {"columns", "rows"}) per table
+    """
+    if tool == SNAPSHOT_TOOL:
+        try:
+            snapshot = json.loads(result)
+        except (TypeError, ValueError):
+            return []
+        as_of = snapshot.get("as_of")
+        tables = []
+        for section, data in (snapshot.get("sections") or {}).items():
+            title = TABLE_TOOLS.get(section)
+            table = _as_table(data) if title else None
+            if table:
+                tables.append((title, f"{title} ({as_of})" if as_of else title, table))
+        return tables
+
+    title = TABLE_TOOLS.get(tool)
+    table = _as_table(result) if title else None
+    return [(title, title, table)] if table else []
+
+
+class TableForwarder:
+    """
+    Tool result listener of one live session: sends whitelisted tool results
+    as table messages on the session's OutboundStream.
+
+    Tools may return on a worker thread, so messages are handed to the event
+    loop the forwarder was created on.
+
+    Args:
+        outbound (OutboundStream): The session's outbound stream
+        on_table: Optional callback(table, title), called on the event loop
+                  for each table sent (e.g. to share it with other sessions)
+    """
+
+    def __init__(self, outbound, on_table=None):
+        self.outbound = outbound
+        self.on_table = on_table
+        self.loop = asyncio.get_running_loop()
+        self.sent = set()  # table keys sent in the current turn
+
+    def __call__(self, tool: str, result):
+        if tool != SNAPSHOT_TOOL and tool not in TABLE_TOOLS:
+            return
+        for key, title, table in tool_tables(tool, result):
+            self.loop.call_soon_threadsafe(self._send, key, title, table)
+
+    def _send(self, key: str, title: str, table: dict):
+        if key in self.sent:
+            return
+        self.sent.add(key)
+        if self.on_table is not None:
+            self.on_table(table, title)
+        try:
+            self.outbound.send_table(table, title=title)
+        except Exception as e:
+            # The connection is gone; the model's answer reports the data anyway.
+            logger.debug("Table %s not sent: %s", title, e)
+            return
+        logger.debug("[AGENT TO CLIENT]: table %s (%d rows)", title, len(table["rows"]))
+
+    def end_turn(self):
+        self.sent.clear()